@@ -4,7 +4,7 @@ import json
 import shutil
 import voluptuous as vol
 
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
@@ -12,12 +12,21 @@ import homeassistant.helpers.device_registry as dr
 import homeassistant.helpers.entity_registry as er
 
 from .const import (
-    DOMAIN, PLATFORMS, CONF_IMEI, CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE,
+    DOMAIN, PLATFORMS, CONF_IMEI, CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE, CONF_HISTORY_BACKEND,
     DEFAULT_ELECTRICITY_PRICE, MANUFACTURER,
     PERSISTENT_DATA_PATH, HISTORY_FILE, LOG_FILE,
     LEGACY_HISTORY_FILE, LEGACY_LOG_FILE,
 )
 from .errors import ErrorDetector, ErrorCategory, ErrorSeverity, get_error_detector
+from .history_store import (
+    AGGREGATE_FIELDS,
+    HISTORY_HEAD_SIZE,
+    get_history_store,
+    async_close_history_store,
+    async_migrate_shared_history,
+)
+from .meter_engine import CYCLES
+from .meter_ledger import get_meter_ledger
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -563,7 +572,6 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         monthly_value = call.data.get("monthly", 2.26)
         yearly_value = call.data.get("yearly", 2.26)
         source_value_param = call.data.get("source_value")
-        electricity_price = DEFAULT_ELECTRICITY_PRICE  # EUR/kWh
 
         # Determine which entities to update based on device_id
         if device_id:
@@ -640,60 +648,39 @@ async def async_setup_services(hass: HomeAssistant) -> None:
                 )
                 return
 
-        # Build target entity IDs
+        # Target meters and the cost to restore on each
+        costs = {"daily": daily_value, "weekly": weekly_value, "monthly": monthly_value, "yearly": yearly_value}
         if imei_short:
             targets = {
-                f"sensor.scooter_energy_consumption_daily_{imei_short}": {
-                    "consumption": daily_value / electricity_price,
-                    "cycle_start": source_value - (daily_value / electricity_price)
-                },
-                f"sensor.scooter_energy_consumption_weekly_{imei_short}": {
-                    "consumption": weekly_value / electricity_price,
-                    "cycle_start": source_value - (weekly_value / electricity_price)
-                },
-                f"sensor.scooter_energy_consumption_monthly_{imei_short}": {
-                    "consumption": monthly_value / electricity_price,
-                    "cycle_start": source_value - (monthly_value / electricity_price)
-                },
-                f"sensor.scooter_energy_consumption_yearly_{imei_short}": {
-                    "consumption": yearly_value / electricity_price,
-                    "cycle_start": source_value - (yearly_value / electricity_price)
-                },
+                f"sensor.scooter_energy_consumption_{cycle}_{imei_short}": value
+                for cycle, value in costs.items()
             }
         else:
             # Legacy mode
             targets = {
-                "sensor.scooter_energy_consumption_daily": {
-                    "consumption": daily_value / electricity_price,
-                    "cycle_start": source_value - (daily_value / electricity_price)
-                },
-                "sensor.scooter_energy_consumption_weekly": {
-                    "consumption": weekly_value / electricity_price,
-                    "cycle_start": source_value - (weekly_value / electricity_price)
-                },
-                "sensor.scooter_energy_consumption_monthly": {
-                    "consumption": monthly_value / electricity_price,
-                    "cycle_start": source_value - (monthly_value / electricity_price)
-                },
-                "sensor.scooter_energy_consumption_yearly": {
-                    "consumption": yearly_value / electricity_price,
-                    "cycle_start": source_value - (yearly_value / electricity_price)
-                },
+                f"sensor.scooter_energy_consumption_{cycle}": value
+                for cycle, value in costs.items()
             }
 
         # Find and update sensor objects via hass.data[DOMAIN]["sensors"]
         updated_count = 0
         domain_sensors = hass.data.get(DOMAIN, {}).get("sensors", {})
 
-        for entity_id, values in targets.items():
+        for entity_id, cost in targets.items():
             sensor = domain_sensors.get(entity_id)
             if sensor and hasattr(sensor, "_cycle_start_value"):
-                sensor._attr_native_value = round(values["consumption"], 3)
-                sensor._cycle_start_value = round(values["cycle_start"], 3)
+                # kWh at the price in force now (schedule or tariff sensor),
+                # not the default price
+                electricity_price = sensor.current_price() or DEFAULT_ELECTRICITY_PRICE
+                consumption = cost / electricity_price
+                cycle_start = source_value - consumption
+                sensor._attr_native_value = round(consumption, 3)
+                sensor._cycle_start_value = round(cycle_start, 3)
+                sensor._cost = cost
                 sensor.async_write_ha_state()
 
-                _LOGGER.info("Restored %s: %.3f kWh (cycle_start: %.3f kWh)",
-                             entity_id, values["consumption"], values["cycle_start"])
+                _LOGGER.info("Restored %s: %.3f kWh at %.4f EUR/kWh (cycle_start: %.3f kWh)",
+                             entity_id, consumption, electricity_price, cycle_start)
                 updated_count += 1
             else:
                 _LOGGER.warning("Sensor object not found for %s", entity_id)
@@ -713,6 +700,61 @@ async def async_setup_services(hass: HomeAssistant) -> None:
                     source="restore_energy_costs",
                 )
 
+    def entry_for_call(call: ServiceCall) -> ConfigEntry:
+        """Return the config entry of the scooter selected by a service call."""
+        device_id = call.data.get("device_id")
+        entries = hass.config_entries.async_entries(DOMAIN)
+
+        if device_id:
+            device = dr.async_get(hass).async_get(device_id)
+            if not device:
+                raise HomeAssistantError(f"Device {device_id} not found")
+            imei = next((ident[1] for ident in device.identifiers if ident[0] == DOMAIN), None)
+            entry = next((e for e in entries if imei and e.data.get(CONF_IMEI) == imei), None)
+            if entry is None:
+                # Single-device installs have no IMEI in their device identifiers
+                entry = next((e for e in entries if not e.data.get(CONF_MULTI_DEVICE)), None)
+            if entry is None:
+                raise HomeAssistantError(f"No Silence Scooter entry found for device {device_id}")
+        elif len(entries) == 1:
+            entry = entries[0]
+        else:
+            raise HomeAssistantError("Several scooters are configured, please select a device")
+        return entry
+
+    async def query_trips(call: ServiceCall) -> ServiceResponse:
+        """Return the trips of a scooter over a date range, with aggregates."""
+        entry = entry_for_call(call)
+        store = get_history_store(
+            hass,
+            entry.data.get(CONF_IMEI, ""),
+            entry.data.get(CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE),
+            entry.data.get(CONF_HISTORY_BACKEND),
+        )
+        return await store.async_query(
+            start=call.data.get("start"),
+            end=call.data.get("end"),
+            limit=call.data["limit"],
+            offset=call.data["offset"],
+            aggregates=call.data["aggregates"],
+        )
+
+    async def query_meter_periods(call: ServiceCall) -> ServiceResponse:
+        """Return the closed utility meter cycles of a scooter over a date range."""
+        entry = entry_for_call(call)
+        ledger = get_meter_ledger(
+            hass,
+            entry.data.get(CONF_IMEI, ""),
+            entry.data.get(CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE),
+        )
+        return await ledger.async_query(
+            meter=call.data.get("meter"),
+            cycle=call.data.get("cycle"),
+            start=call.data.get("start"),
+            end=call.data.get("end"),
+            limit=call.data["limit"],
+        )
+
     # Register services
     if not hass.services.has_service(DOMAIN, "reset_tracked_counters"):
         hass.services.async_register(DOMAIN, "reset_tracked_counters", reset_tracked_counters)
@@ -736,6 +778,46 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         )
         _LOGGER.info("Service restore_energy_costs registered")
 
+    QUERY_TRIPS_SCHEMA = vol.Schema({
+        vol.Optional("device_id"): cv.string,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("limit", default=HISTORY_HEAD_SIZE): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),
+        vol.Optional("offset", default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional("aggregates", default=list(AGGREGATE_FIELDS)): vol.All(
+            cv.ensure_list, [vol.In(list(AGGREGATE_FIELDS))]
+        ),
+    })
+
+    if not hass.services.has_service(DOMAIN, "query_trips"):
+        hass.services.async_register(
+            DOMAIN,
+            "query_trips",
+            query_trips,
+            schema=QUERY_TRIPS_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+        _LOGGER.info("Service query_trips registered")
+
+    QUERY_METER_PERIODS_SCHEMA = vol.Schema({
+        vol.Optional("device_id"): cv.string,
+        vol.Optional("meter"): cv.string,
+        vol.Optional("cycle"): vol.In(CYCLES),
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("limit", default=100): vol.All(vol.Coerce(int), vol.Range(min=0, max=10000)),
+    })
+
+    if not hass.services.has_service(DOMAIN, "query_meter_periods"):
+        hass.services.async_register(
+            DOMAIN,
+            "query_meter_periods",
+            query_meter_periods,
+            schema=QUERY_METER_PERIODS_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+        _LOGGER.info("Service query_meter_periods registered")
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Silence Scooter from a config entry."""
@@ -745,6 +827,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Runs in the executor to keep the event loop clean (filesystem I/O).
     await hass.async_add_executor_job(_migrate_persistent_data)
 
+    # Give each multi-device scooter its own history file (one-time)
+    await async_migrate_shared_history(hass)
+
     try:
         # Get IMEI (optional for single-device mode)
         imei = entry.data.get(CONF_IMEI, "")
@@ -762,6 +847,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             )
             return False
 
+        # Fold any trips journaled before the last shutdown back into the history file
+        get_history_store(
+            hass, imei, multi_device, entry.data.get(CONF_HISTORY_BACKEND)
+        ).async_schedule_compaction()
+
         # Initialize storage (isolated per entry)
         hass.data.setdefault(DOMAIN, {})
         # Initialize error detection system (per entry)
@@ -775,8 +865,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             "config": entry.data,
             "error_detector": error_detector,
         }
-        # Also store at domain level for backward compat with automations
-        hass.data[DOMAIN]["sensors"] = {}
+        # Also store at domain level for backward compat with automations.
+        # Shared by all entries (entity ids are unique): never reset it here,
+        # it would drop the sensors of the scooters already set up.
+        hass.data[DOMAIN].setdefault("sensors", {})
         hass.data[DOMAIN]["config"] = entry.data
 
         imei_log = imei[-4:] if imei else "single-device"
@@ -858,6 +950,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         if detector:
             detector.cleanup()
 
+        # Flush the trip journal into the history file
+        await async_close_history_store(
+            hass, imei, entry.data.get(CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE)
+        )
+
         # Unload platforms
         unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
         _LOGGER.info("Platforms unloaded: %s", unload_ok)
@@ -1,15 +1,15 @@
 """Automations for the Silence Scooter integration."""
 import logging
 import asyncio
-import subprocess
+import time
 
 from datetime import datetime, timedelta
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.event import (
+    async_call_later,
     async_track_state_change_event,
-    async_track_time_interval,
 )
-from homeassistant.components.number import SERVICE_SET_VALUE
+from homeassistant.util.location import distance as gps_distance
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.exceptions import HomeAssistantError
 from .const import (
@@ -17,22 +17,43 @@ from .const import (
     CONF_CONFIRMATION_DELAY,
     CONF_PAUSE_MAX_DURATION,
     CONF_WATCHDOG_DELAY,
+    CONF_TRACKER_MIN_DISTANCE,
+    CONF_TRACKER_MIN_INTERVAL,
+    CONF_RECORD_GPS_TRACK,
     CONF_OUTDOOR_TEMP_SOURCE,
     CONF_OUTDOOR_TEMP_ENTITY,
     DEFAULT_CONFIRMATION_DELAY,
     DEFAULT_PAUSE_MAX_DURATION,
     DEFAULT_WATCHDOG_DELAY,
+    DEFAULT_TRACKER_MIN_DISTANCE,
+    DEFAULT_TRACKER_MIN_INTERVAL,
+    DEFAULT_RECORD_GPS_TRACK,
     DEFAULT_OUTDOOR_TEMP_SOURCE,
     OUTDOOR_TEMP_SOURCE_SCOOTER,
     OUTDOOR_TEMP_SOURCE_EXTERNAL,
     SENSOR_SCOOTER_AMBIENT_TEMP,
 )
 from homeassistant.util import dt as dt_util
-from .helpers import log_event, update_history, is_date_valid, get_valid_datetime
+from .helpers import (
+    entity_write_batch,
+    get_valid_datetime,
+    is_date_valid,
+    log_event,
+    parse_state_datetime,
+    set_datetime_value,
+    set_number_value,
+)
+from .history_store import get_history_store
+from .trip_session import async_close_trip_session, get_trip_session
+from .timers import get_timer_manager
 from .errors import ErrorCategory, ErrorSeverity, get_error_detector
 
 STARTUP_TIME = dt_util.utcnow()
 
+# Latitude, longitude and battery of one MQTT message arrive as separate
+# state changes: wait this long (seconds) to send them as one tracker update
+TRACKER_DEBOUNCE = 1.0
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -267,40 +288,16 @@ async def update_trip_statistics(
     # Update tracked_distance
     tracked_dist = get_sensor_float_value(hass, NUMBER_TRACKED_DISTANCE, 0.0)
     tracked_dist += distance
-    await hass.services.async_call(
-        "number",
-        SERVICE_SET_VALUE,
-        {
-            "entity_id": NUMBER_TRACKED_DISTANCE,
-            "value": tracked_dist
-        },
-        blocking=True
-    )
+    await set_number_value(hass, NUMBER_TRACKED_DISTANCE, tracked_dist)
 
     # Update tracked_battery_used
     tracked_batt = get_sensor_float_value(hass, NUMBER_TRACKED_BATT_USED, 0.0)
     tracked_batt += batt_consumption
-    await hass.services.async_call(
-        "number",
-        SERVICE_SET_VALUE,
-        {
-            "entity_id": NUMBER_TRACKED_BATT_USED,
-            "value": tracked_batt
-        },
-        blocking=True
-    )
+    await set_number_value(hass, NUMBER_TRACKED_BATT_USED, tracked_batt)
 
     # Update energy_consumption_base
     energy_val = get_sensor_float_value(hass, entity_id("sensor.scooter_energy_consumption"), 0.0)
-    await hass.services.async_call(
-        "number",
-        SERVICE_SET_VALUE,
-        {
-            "entity_id": entity_id("number.scooter_energy_consumption_base"),
-            "value": energy_val
-        },
-        blocking=True
-    )
+    await set_number_value(hass, entity_id("number.scooter_energy_consumption_base"), energy_val)
 
 
 # ============================================================================
@@ -348,7 +345,6 @@ async def async_setup_automations(
 
     # Pour la logique "Last start"
     INPUT_DT_END_TIME = entity_id("datetime.scooter_end_time")
-    SENSOR_MAX_SPEED = entity_id("sensor.scooter_last_trip_max_speed")  # Writable sensor
     NUMBER_ODO_DEBUT = entity_id("number.scooter_odo_debut")
     INPUT_DT_START_TIME = entity_id("datetime.scooter_start_time")
     NUMBER_BATT_SOC_DEBUT = entity_id("number.scooter_battery_soc_debut")
@@ -376,85 +372,26 @@ async def async_setup_automations(
     BINARY_SENSOR_BATTERY_IN = entity_id("binary_sensor.silence_scooter_battery_in")
 
     #
-    # Dictionnaire pour stocker les tâches planifiées
+    # Timers of the stop path (confirmation delay, pause tolerance, watchdog),
+    # per scooter: cancelled on unload, deadlines persisted across restarts
     # - nécessaire pour la gestion du "for: 00:02:00" (2 minutes)
     #
-    scheduled_tasks = {}
-
-    # Shared trip-tracking state, stored in hass.data so that functions
-    # defined OUTSIDE setup_automations (like do_stop_trip) can access it.
-    # The closure-based approach alone fails because do_stop_trip is a
-    # module-level function; it cannot capture local variables here.
-    #
-    # Keys:
-    #   last_trip_start_monotonic: monotonic time() of the last trip start
-    #     (used by the ODO/battery tracking handlers to skip the stale-
-    #     value repair during the first 5s to avoid a race with
-    #     _do_last_start() writing odo_debut).
-    #   odo_tracking_fired / battery_tracking_fired: set by the tracking
-    #     handlers on their first firing during the current trip. Reset at
-    #     trip start. do_stop_trip reads them to distinguish "tracked
-    #     value" from "never tracked".
-    hass.data.setdefault(DOMAIN, {}).setdefault(
-        "trip_tracking_state",
-        {
-            "last_trip_start_monotonic": None,
-            "odo_tracking_fired": False,
-            "battery_tracking_fired": False,
-        },
-    )
-    _tracking_state = hass.data[DOMAIN]["trip_tracking_state"]
-
-    # Backwards-compatible local dict wrappers so the existing closures
-    # below keep working without change. They all write/read via the
-    # shared hass.data dict.
-    class _StateRef:
-        def __init__(self, key):
-            self._key = key
-
-        def get(self, default=None):
-            return _tracking_state.get(self._key, default)
-
-        def __setitem__(self, k, v):
-            assert k == "value"
-            _tracking_state[self._key] = v
+    timers = get_timer_manager(hass, imei, multi_device)
+    await timers.async_load()
 
-        def __getitem__(self, k):
-            assert k == "value"
-            return _tracking_state.get(self._key)
-
-    last_trip_start_monotonic = _StateRef("last_trip_start_monotonic")
-    odo_tracking_fired = _StateRef("odo_tracking_fired")
-    battery_tracking_fired = _StateRef("battery_tracking_fired")
+    # In-memory trip state (start/end, ODO and SoC bounds, max speed),
+    # mirrored to the entities above only when a value changes. It also holds
+    # the runtime state of the trip (start anchor, tracking flags, stop lock),
+    # per scooter, so do_stop_trip (module level) reaches the same state.
+    session = get_trip_session(hass, imei, multi_device)
+    session.async_start_listening()
 
     #
     # Fonction helper pour vérifier si un trajet est en cours
     #
     def is_trip_active():
         """Vérifie si un trajet est actuellement actif."""
-        end_time_st = hass.states.get(INPUT_DT_END_TIME)
-        if not end_time_st or end_time_st.state in ["unknown", "unavailable"]:
-            return False
-        
-        # Un trajet est actif si end_time est 1969/1970 OU si c'est dans le futur
-        if not is_date_valid(end_time_st.state):
-            # Vérifier que le trajet n'est pas trop vieux (>24h)
-            start_time_st = hass.states.get(INPUT_DT_START_TIME)
-            if start_time_st and is_date_valid(start_time_st.state):
-                start_dt = get_valid_datetime(start_time_st.state)
-                if start_dt:
-                    # Si le trajet a commencé il y a plus de 24h, il n'est plus actif
-                    if (dt_util.now() - start_dt).total_seconds() > 86400:
-                        _LOGGER.warning("⚠️ Trajet bloqué détecté (>24h), nettoyage nécessaire")
-                        return False
-            return True
-        
-        try:
-            end_dt = dt_util.parse_datetime(end_time_st.state)
-            # Trajet actif si la date de fin est dans le futur
-            return end_dt and dt_util.as_local(end_dt) > dt_util.now()
-        except (ValueError, TypeError, AttributeError):
-            return False
+        return session.is_active()
 
     #
     # 0. "Scooter - Auto-initialisation de la base d'énergie"
@@ -505,15 +442,7 @@ async def async_setup_automations(
                             baseline, discharged, regenerated)
 
                 hass.loop.create_task(
-                    hass.services.async_call(
-                        "number",
-                        SERVICE_SET_VALUE,
-                        {
-                            "entity_id": NUMBER_ENERGY_BASE,
-                            "value": baseline
-                        },
-                        blocking=True
-                    )
+                    set_number_value(hass, NUMBER_ENERGY_BASE, baseline)
                 )
         except (ValueError, TypeError) as e:
             _LOGGER.debug("Could not initialize baseline: %s", e)
@@ -556,7 +485,7 @@ async def async_setup_automations(
         last_update_state = hass.states.get(SENSOR_SCOOTER_LAST_UPDATE)
         if last_update_state and last_update_state.state not in ["unknown", "unavailable"]:
             try:
-                last_update_dt = dt_util.parse_datetime(last_update_state.state)
+                last_update_dt = parse_state_datetime(last_update_state.state)
                 if last_update_dt and last_update_dt.year > 2000:
                     timestamp_str = dt_util.as_local(last_update_dt).isoformat()
                     _LOGGER.info("Last moving time = last MQTT update: %s", timestamp_str)
@@ -569,20 +498,57 @@ async def async_setup_automations(
             timestamp_str = dt_util.now().isoformat()
             _LOGGER.debug("Last moving time = now() (no last_update available): %s", timestamp_str)
 
-        await hass.services.async_call(
-            "datetime",
-            "set_value",
-            {
-                "entity_id": INPUT_DT_LAST_MOVING,
-                "datetime": timestamp_str
-            },
-            blocking=True
-        )
+        await set_datetime_value(hass, INPUT_DT_LAST_MOVING, timestamp_str)
 
     remove_tracker_dernier_mouvement = async_track_state_change_event(
         hass, [SENSOR_IS_MOVING], handle_tracker_dernier_mouvement
     )
 
+    #
+    # Actions des timers d'arrêt (enregistrées auprès du gestionnaire, qui
+    # les relance après un redémarrage de HA)
+    #
+    async def _confirm_off():
+        """Confirme l'arrêt du trajet après le délai de confirmation."""
+        confirmation_delay = get_config_value(hass, CONF_CONFIRMATION_DELAY, DEFAULT_CONFIRMATION_DELAY)
+        _LOGGER.info(f"⏰ CONFIRM OFF: vérification après {confirmation_delay}s d'attente")
+
+        # Annulation du timer de tolérance s'il est encore actif
+        if timers.async_cancel("tolerance_timer"):
+            _LOGGER.debug("Timer de tolérance annulé (arrêt confirmé)")
+
+        if not is_trip_active():
+            _LOGGER.info("⚠️ Pas de trajet actif, confirmation ignorée")
+            return
+
+        state = hass.states.get(SENSOR_TRIP_STATUS)
+        # On considère unavailable/unknown comme un vrai arrêt aussi
+        if state and state.state in ("off", "unavailable", "unknown"):
+            _LOGGER.info("✅ CONFIRM OFF: état toujours OFF après 2min -> arrêt du trajet")
+
+            # ✅ FIX: Ne PAS comptabiliser le délai de confirmation (2 min) comme une pause
+            # Ce délai est un anti-rebond technique, pas une pause réelle.
+            # Les vraies pauses sont déjà enregistrées par _record_pause_end()
+            # qui est appelé lors de la reprise du trajet (trip_status: off → on)
+            _LOGGER.debug("⏱️ Délai de confirmation (2 min) ignoré - pas une pause réelle")
+
+            await do_log_event(hass, "Auto stop trip (confirmed after 2min)")
+            await do_stop_trip(hass, imei=imei, multi_device=multi_device, reason="auto-confirmed")
+        else:
+            _LOGGER.info("🔄 CONFIRM OFF: état changé -> annulation de l'arrêt")
+
+    async def _on_tolerance_expired():
+        """Appelé quand le timer de tolérance arrive à expiration."""
+        if not is_trip_active():
+            return
+        pause_duration_min = get_config_value(hass, CONF_PAUSE_MAX_DURATION, DEFAULT_PAUSE_MAX_DURATION)
+        _LOGGER.info("⏱️ Timer de tolérance terminé (%d min), arrêt définitif du trajet", pause_duration_min)
+        await do_log_event(hass, f"Trip auto-stopped: tolerance timer expired ({pause_duration_min}min)")
+        await do_stop_trip(hass, imei=imei, multi_device=multi_device, reason="tolerance-timeout")
+
+    timers.async_register("trip_off_delay", _confirm_off)
+    timers.async_register("tolerance_timer", _on_tolerance_expired)
+
     #
     # 2. "Scooter - Démarrer le timer quand le scooter s'arrête" 
     #    => sensor.scooter_trip_status passe à off, PENDANT 2 minutes
@@ -655,15 +621,7 @@ async def async_setup_automations(
                     # Fallback sur l'heure actuelle si last_moving_time indisponible
                     end_time_str = dt_util.now().isoformat()
 
-                await hass.services.async_call(
-                    "datetime",
-                    "set_value",
-                    {
-                        "entity_id": INPUT_DT_END_TIME,
-                        "datetime": end_time_str
-                    },
-                    blocking=True
-                )
+                await session.async_set(end_time=end_time_str)
 
                 await do_log_event(hass, "Immediate stop - scooter off/unavailable")
                 await do_stop_trip(hass, imei=imei, multi_device=multi_device, reason="immediate")
@@ -675,85 +633,25 @@ async def async_setup_automations(
             else:
                 _LOGGER.info("DELAYED STOP triggered (2min + 5min timer)")
 
-                # Définir les fonctions async AVANT de les utiliser
-                def _start_tolerance_timer():
-                    """Démarre le timer de tolérance (durée configurable)."""
-                    # Get configured pause duration (in minutes)
-                    pause_duration_min = get_config_value(hass, CONF_PAUSE_MAX_DURATION, DEFAULT_PAUSE_MAX_DURATION)
-                    # Convert to seconds
-                    duration_seconds = pause_duration_min * 60
-
-                    # Cancel any existing tolerance timer
-                    if "tolerance_timer" in scheduled_tasks:
-                        scheduled_tasks["tolerance_timer"].cancel()
-
-                    # Schedule the callback that will stop the trip when timer expires
-                    async def _on_tolerance_expired():
-                        """Appelé quand le timer de tolérance arrive à expiration."""
-                        scheduled_tasks.pop("tolerance_timer", None)
-                        _LOGGER.info("⏱️ Timer de tolérance terminé (%d min), arrêt définitif du trajet", pause_duration_min)
-                        await do_log_event(hass, f"Trip auto-stopped: tolerance timer expired ({pause_duration_min}min)")
-                        await do_stop_trip(hass, imei=imei, multi_device=multi_device, reason="tolerance-timeout")
-
-                    task = hass.loop.call_later(duration_seconds, lambda: hass.loop.create_task(_on_tolerance_expired()))
-                    scheduled_tasks["tolerance_timer"] = task
-                    _LOGGER.info(f"✓ Tolerance timer started successfully ({pause_duration_min} min = {duration_seconds}s)")
-
-                async def _confirm_off():
-                    """Confirme l'arrêt du trajet après le délai de confirmation."""
-                    confirmation_delay = get_config_value(hass, CONF_CONFIRMATION_DELAY, DEFAULT_CONFIRMATION_DELAY)
-                    _LOGGER.info(f"⏰ CONFIRM OFF: vérification après {confirmation_delay}s d'attente")
-                    scheduled_tasks.pop("trip_off_delay", None)
-
-                    # Annulation du timer de tolérance s'il est encore actif
-                    tolerance_task = scheduled_tasks.pop("tolerance_timer", None)
-                    if tolerance_task:
-                        tolerance_task.cancel()
-                        _LOGGER.debug("Timer de tolérance annulé (arrêt confirmé)")
-
-                    state = hass.states.get(SENSOR_TRIP_STATUS)
-                    # On considère unavailable/unknown comme un vrai arrêt aussi
-                    if state and state.state in ("off", "unavailable", "unknown"):
-                        _LOGGER.info("✅ CONFIRM OFF: état toujours OFF après 2min -> arrêt du trajet")
-
-                        # ✅ FIX: Ne PAS comptabiliser le délai de confirmation (2 min) comme une pause
-                        # Ce délai est un anti-rebond technique, pas une pause réelle.
-                        # Les vraies pauses sont déjà enregistrées par _record_pause_end()
-                        # qui est appelé lors de la reprise du trajet (trip_status: off → on)
-                        _LOGGER.debug("⏱️ Délai de confirmation (2 min) ignoré - pas une pause réelle")
-
-                        await do_log_event(hass, "Auto stop trip (confirmed after 2min)")
-                        await do_stop_trip(hass, imei=imei, multi_device=multi_device, reason="auto-confirmed")
-                    else:
-                        _LOGGER.info("🔄 CONFIRM OFF: état changé -> annulation de l'arrêt")
-
-                # Maintenant qu'on a défini les fonctions, on peut les utiliser
                 # Enregistrer le début de la pause
                 hass.loop.create_task(
-                    hass.services.async_call(
-                        "datetime",
-                        "set_value",
-                        {
-                            "entity_id": entity_id("datetime.scooter_pause_start"),
-                            "datetime": dt_util.now().isoformat()
-                        },
-                        blocking=True
-                    )
+                    set_datetime_value(hass, entity_id("datetime.scooter_pause_start"), dt_util.now().isoformat())
                 )
 
-                # Annuler toute tâche précédente
-                if "trip_off_delay" in scheduled_tasks:
-                    scheduled_tasks["trip_off_delay"].cancel()
-
                 # 1) Planifie l'arrêt après le délai de confirmation configurable
+                # (remplace une tâche précédente)
                 confirmation_delay = get_config_value(hass, CONF_CONFIRMATION_DELAY, DEFAULT_CONFIRMATION_DELAY)
-                task = hass.loop.call_later(confirmation_delay, lambda: hass.loop.create_task(_confirm_off()))
-                scheduled_tasks["trip_off_delay"] = task
+                timers.async_schedule("trip_off_delay", confirmation_delay)
 
-                # 2) Démarre le timer de tolérance (durée configurable)
-                _start_tolerance_timer()
+                # 2) Démarre le timer de tolérance (durée configurable, en minutes)
+                pause_duration_min = get_config_value(hass, CONF_PAUSE_MAX_DURATION, DEFAULT_PAUSE_MAX_DURATION)
+                timers.async_schedule("tolerance_timer", pause_duration_min * 60)
+                _LOGGER.info(f"✓ Tolerance timer started successfully ({pause_duration_min} min = {pause_duration_min * 60}s)")
 
-                _LOGGER.info("📋 Tâches planifiées : %s", list(scheduled_tasks.keys()))
+                _LOGGER.info(
+                    "📋 Tâches planifiées : %s",
+                    [name for name in ("trip_off_delay", "tolerance_timer") if timers.is_pending(name)],
+                )
     #
 
     remove_trip_status_off = async_track_state_change_event(
@@ -777,15 +675,11 @@ async def async_setup_automations(
 
         # Si le scooter repart (trip_status passe de off à on), on annule la tâche
         if old_state.state != "on" and new_state.state == "on":
-            trip_task = scheduled_tasks.pop("trip_off_delay", None)
-            if trip_task:
-                trip_task.cancel()
+            if timers.async_cancel("trip_off_delay"):
                 _LOGGER.info("🔄 Trip status → ON : annulation du délai d'arrêt automatique (2 min).")
 
             # Si le timer de tolérance est actif, on le stoppe aussi
-            tolerance_task = scheduled_tasks.pop("tolerance_timer", None)
-            if tolerance_task:
-                tolerance_task.cancel()
+            if timers.async_cancel("tolerance_timer"):
                 _LOGGER.info("🔄 Timer de tolérance annulé (scooter redémarré)")
 
                 # Enregistrer la fin de la pause
@@ -814,15 +708,7 @@ async def async_setup_automations(
                     else:
                         current_pause = 0
 
-                    await hass.services.async_call(
-                        "number",
-                        "set_value",
-                        {
-                            "entity_id": entity_id("number.scooter_pause_duration"),
-                            "value": current_pause + pause_duration
-                        },
-                        blocking=True
-                    )
+                    await set_number_value(hass, entity_id("number.scooter_pause_duration"), current_pause + pause_duration)
                     
                     _LOGGER.info("Pause terminée : durée %.1f min, total pauses: %.1f min", 
                                 pause_duration, current_pause + pause_duration)
@@ -856,26 +742,13 @@ async def async_setup_automations(
         await do_log_event(hass, "Manual stop button clicked")
 
         # Annuler toutes les tâches programmées si existantes
-        if scheduled_tasks.get("trip_off_delay"):
-            scheduled_tasks["trip_off_delay"].cancel()
-            scheduled_tasks.pop("trip_off_delay", None)
-
-        if scheduled_tasks.get("tolerance_timer"):
-            scheduled_tasks["tolerance_timer"].cancel()
-            scheduled_tasks.pop("tolerance_timer", None)
+        timers.async_cancel("trip_off_delay")
+        timers.async_cancel("tolerance_timer")
 
         # datetime.scooter_end_time = scooter_last_moving_time
         last_moving = hass.states.get(INPUT_DT_LAST_MOVING)
         end_time_value = last_moving.state if last_moving else dt_util.now().isoformat()
-        await hass.services.async_call(
-            "datetime",
-            "set_value",
-            {
-                "entity_id": INPUT_DT_END_TIME,
-                "datetime": end_time_value
-            },
-            blocking=True
-        )
+        await session.async_set(end_time=end_time_value)
 
         # do_stop_trip
         await do_stop_trip(hass, imei=imei, multi_device=multi_device, reason="Manual button")
@@ -946,90 +819,42 @@ async def async_setup_automations(
         # (1) Appelle 'silencescooter.log_event' avec message "Start trip triggered"
         await do_log_event(hass, "Start trip triggered")
         
-        # Réinitialiser la durée totale des pauses
-        await hass.services.async_call(
-            "number",
-            "set_value",
-            {
-                "entity_id": entity_id("number.scooter_pause_duration"),
-                "value": 0
-            },
-            blocking=True
-        )
-
-        # Réinitialiser l'heure de début de pause
-        await hass.services.async_call(
-            "datetime",
-            "set_value",
-            {
-                "entity_id": entity_id("datetime.scooter_pause_start"),
-                "datetime": "1970-01-01 00:00:00"
-            },
-            blocking=True
-        )
-
-        # (2) datetime.scooter_end_time => "1970-01-01 00:00:00"
-        await hass.services.async_call(
-            "datetime",
-            "set_value",
-            {
-                "entity_id": INPUT_DT_END_TIME,
-                "datetime": "1970-01-01 00:00:00"
-            },
-            blocking=True
-        )
-
-        # (3) sensor.scooter_last_trip_max_speed => 0
-        await set_writable_sensor_value(hass, SENSOR_MAX_SPEED, 0)
-
-        # (4) input_number.scooter_odo_debut => sensor.silence_scooter_odo
-        odo_val = get_sensor_float_value(hass, SENSOR_SCOOTER_ODO, 0.0, fallback_entity=entity_id("sensor.scooter_odo_display"))
-        await hass.services.async_call(
-            "number",
-            "set_value",
-            {
-                "entity_id": NUMBER_ODO_DEBUT,
-                "value": odo_val
-            },
-            blocking=True
-        )
-
-        # (5) datetime.scooter_start_time => now
-        now_str = dt_util.now().isoformat()
-        await hass.services.async_call(
-            "datetime",
-            "set_value",
-            {
-                "entity_id": INPUT_DT_START_TIME,
-                "datetime": now_str
-            },
-            blocking=True
-        )
-        _LOGGER.info("✅ START TIME SET: %s", now_str)
-
-        # (6) input_number.scooter_battery_soc_debut => sensor.silence_scooter_battery_soc
-        batt_val = get_sensor_float_value(hass, SENSOR_BATT_SOC, 0.0, fallback_entity=entity_id("sensor.scooter_battery_display"))
-        await hass.services.async_call(
-            "number",
-            "set_value",
-            {
-                "entity_id": NUMBER_BATT_SOC_DEBUT,
-                "value": batt_val
-            },
-            blocking=True
-        )
+        # All start values are applied, then written to their entities in one
+        # pass: downstream sensors recompute once per trip start.
+        async with entity_write_batch():
+            # Réinitialiser la durée totale des pauses
+            await set_number_value(hass, entity_id("number.scooter_pause_duration"), 0)
+
+            # Réinitialiser l'heure de début de pause
+            await set_datetime_value(hass, entity_id("datetime.scooter_pause_start"), "1970-01-01 00:00:00")
+
+            # (2) datetime.scooter_end_time => "1970-01-01 00:00:00"
+            await session.async_set(end_time="1970-01-01 00:00:00")
+
+            # (3) sensor.scooter_last_trip_max_speed => 0
+            session.async_reset_speed_tracking()
+            session.track.clear()
+            await session.async_set(max_speed=0)
+
+            # (4) input_number.scooter_odo_debut => sensor.silence_scooter_odo
+            odo_val = get_sensor_float_value(hass, SENSOR_SCOOTER_ODO, 0.0, fallback_entity=entity_id("sensor.scooter_odo_display"))
+            await session.async_set(odo_start=odo_val)
+
+            # (5) datetime.scooter_start_time => now
+            now_str = dt_util.now().isoformat()
+            await session.async_set(start_time=now_str)
+            _LOGGER.info("✅ START TIME SET: %s", now_str)
+
+            # (6) input_number.scooter_battery_soc_debut => sensor.silence_scooter_battery_soc
+            batt_val = get_sensor_float_value(hass, SENSOR_BATT_SOC, 0.0, fallback_entity=entity_id("sensor.scooter_battery_display"))
+            await session.async_set(battery_start=batt_val)
         
         _LOGGER.info("✅ TRIP STARTED: odo_start=%.1f, battery_start=%.1f%%", odo_val, batt_val)
 
-        # Record the start timestamp for the ODO/battery tracking handlers
-        # to use as a grace-period anchor (see handle_track_odo).
-        import time as _time
-        last_trip_start_monotonic["value"] = _time.monotonic()
-
-        # Reset tracking-fired flags so do_stop_trip can tell whether the
-        # live handlers actually ran during this trip.
-        odo_tracking_fired["value"] = False
-        battery_tracking_fired["value"] = False
+        # Anchor the grace period of the ODO/battery tracking handlers (see
+        # handle_track_odo) and reset the tracking-fired flags, so
+        # do_stop_trip can tell whether the live handlers ran during this trip.
+        session.async_mark_started()
 
     remove_last_start = async_track_state_change_event(
         hass, [SENSOR_IS_MOVING], handle_scooter_last_start
@@ -1052,14 +877,9 @@ async def async_setup_automations(
             current_speed = float(speed_str)
         except (ValueError, TypeError):
             return
-        hass.loop.create_task(_do_update_max_speed(current_speed))
-
-    async def _do_update_max_speed(current_speed):
-        old_max = get_sensor_float_value(hass, SENSOR_MAX_SPEED, 0.0)
-        new_val = max(old_max, current_speed, 0)
-        if new_val > old_max:
-            _LOGGER.debug("New max speed: %.1f km/h (was %.1f)", new_val, old_max)
-        await set_writable_sensor_value(hass, SENSOR_MAX_SPEED, new_val)
+        # Running max and speed statistics in memory; the sensor is only
+        # written when the max increases (rate-capped)
+        session.async_record_speed(current_speed)
 
     remove_update_max_speed = async_track_state_change_event(
         hass, [SENSOR_SCOOTER_SPEED], handle_update_max_speed
@@ -1088,26 +908,18 @@ async def async_setup_automations(
         if new_odo <= 0 or new_odo > 1_000_000:
             return
 
-        if not is_trip_active():
-            return
-
         # Don't track stale (>24h) active trips — these are bugs (trip
         # never got stopped), and updating their counters pollutes stats.
-        start_time_st = hass.states.get(INPUT_DT_START_TIME)
-        if start_time_st and is_date_valid(start_time_st.state):
-            start_dt = get_valid_datetime(start_time_st.state)
-            if start_dt and (dt_util.now() - start_dt).total_seconds() > 86400:
-                return
+        if not session.is_tracking():
+            return
 
         hass.loop.create_task(_do_track_odo(new_odo, old_state))
 
     async def _do_track_odo(new_odo: float, old_state):
         # Skip repair logic during the first 5 seconds after a trip start
         # to avoid racing with _do_last_start() writing odo_debut.
-        import time as _time
         from datetime import timedelta
-        start_mono = last_trip_start_monotonic.get("value")
-        within_grace = start_mono is not None and (_time.monotonic() - start_mono) < 10.0
+        within_grace = session.in_start_grace(10.0)
 
         # Also skip repair within 10s of HA startup: if HA restarted mid-trip,
         # MQTT sensors fire immediately on reconnect and may legitimately
@@ -1115,18 +927,12 @@ async def async_setup_automations(
         within_startup = (dt_util.utcnow() - STARTUP_TIME) < timedelta(seconds=10)
 
         # Mark that tracking fired at least once for this trip.
-        odo_tracking_fired["value"] = True
+        session.odo_tracking_fired = True
 
         # Update odo_fin continuously so that the stop path never reads a
         # stale or unavailable value.
-        current_fin = get_sensor_float_value(hass, NUMBER_ODO_FIN, 0.0)
-        if new_odo > current_fin:
-            await hass.services.async_call(
-                "number",
-                "set_value",
-                {"entity_id": NUMBER_ODO_FIN, "value": new_odo},
-                blocking=True,
-            )
+        if new_odo > session.odo_end:
+            await session.async_set(odo_end=new_odo)
 
         # Repair is gated by the grace period — too early, odo_debut may
         # not even be written yet. Also gated by HA-startup grace to avoid
@@ -1139,7 +945,7 @@ async def async_setup_automations(
         # if it jumped significantly (> 5 km) between two consecutive
         # readings, the old value was cached/stale and the trip's odo_debut
         # is almost certainly wrong.
-        current_debut = get_sensor_float_value(hass, NUMBER_ODO_DEBUT, 0.0)
+        current_debut = session.odo_start
         if current_debut <= 0 or old_state is None:
             return
 
@@ -1161,12 +967,7 @@ async def async_setup_automations(
                 "from %.1f to %.1f",
                 prev_odo, new_odo, jump, current_debut, new_odo,
             )
-            await hass.services.async_call(
-                "number",
-                "set_value",
-                {"entity_id": NUMBER_ODO_DEBUT, "value": new_odo},
-                blocking=True,
-            )
+            await session.async_set(odo_start=new_odo)
 
     remove_track_odo = async_track_state_change_event(
         hass, [SENSOR_SCOOTER_ODO], handle_track_odo
@@ -1195,35 +996,22 @@ async def async_setup_automations(
         if new_soc < 0 or new_soc > 100:
             return
 
-        if not is_trip_active():
-            return
-
         # Don't track stale (>24h) active trips.
-        start_time_st = hass.states.get(INPUT_DT_START_TIME)
-        if start_time_st and is_date_valid(start_time_st.state):
-            start_dt = get_valid_datetime(start_time_st.state)
-            if start_dt and (dt_util.now() - start_dt).total_seconds() > 86400:
-                return
+        if not session.is_tracking():
+            return
 
         hass.loop.create_task(_do_track_battery(new_soc, old_state))
 
     async def _do_track_battery(new_soc: float, old_state):
         # Mark that tracking fired at least once for this trip.
-        battery_tracking_fired["value"] = True
+        session.battery_tracking_fired = True
 
         # Always keep odo_fin's battery counterpart in sync
-        await hass.services.async_call(
-            "number",
-            "set_value",
-            {"entity_id": NUMBER_BATT_SOC_FIN, "value": new_soc},
-            blocking=True,
-        )
+        await session.async_set(battery_end=new_soc)
 
         # Skip repair during grace period after trip start or after HA restart.
-        import time as _time
         from datetime import timedelta
-        start_mono = last_trip_start_monotonic.get("value")
-        within_grace = start_mono is not None and (_time.monotonic() - start_mono) < 10.0
+        within_grace = session.in_start_grace(10.0)
         within_startup = (dt_util.utcnow() - STARTUP_TIME) < timedelta(seconds=10)
         if within_grace or within_startup:
             return
@@ -1232,7 +1020,7 @@ async def async_setup_automations(
         # A sudden jump > 10% in a single update is suspicious: during a
         # trip, SoC decreases gradually. A large positive jump means the
         # previous value was a stale cache from before a disconnection.
-        current_debut = get_sensor_float_value(hass, NUMBER_BATT_SOC_DEBUT, 0.0)
+        current_debut = session.battery_start
         if current_debut <= 0 or old_state is None:
             return
 
@@ -1252,12 +1040,7 @@ async def async_setup_automations(
                 "battery_soc_debut from %.1f to %.1f",
                 prev_soc, new_soc, jump, current_debut, new_soc,
             )
-            await hass.services.async_call(
-                "number",
-                "set_value",
-                {"entity_id": NUMBER_BATT_SOC_DEBUT, "value": new_soc},
-                blocking=True,
-            )
+            await session.async_set(battery_start=new_soc)
 
     remove_track_battery = async_track_state_change_event(
         hass, [SENSOR_BATT_SOC], handle_track_battery
@@ -1269,9 +1052,24 @@ async def async_setup_automations(
     #                   sensor.silence_scooter_silence_longitude,
     #                   sensor.silence_scooter_battery_soc
     #
+    # Last position sent to the tracker and the pending (debounced) update
+    tracker_state = {"gps": None, "battery": None, "sent_at": 0.0, "unsub": None}
+
     @callback
     def handle_update_tracker(event):
-        hass.loop.create_task(_do_update_tracker())
+        if tracker_state["unsub"] is None:
+            tracker_state["unsub"] = async_call_later(hass, TRACKER_DEBOUNCE, _handle_tracker_due)
+
+    @callback
+    def _handle_tracker_due(_now):
+        tracker_state["unsub"] = None
+        hass.async_create_task(_do_update_tracker())
+
+    @callback
+    def cancel_tracker_update():
+        if tracker_state["unsub"] is not None:
+            tracker_state["unsub"]()
+            tracker_state["unsub"] = None
 
     async def _do_update_tracker():
         lat = 0.0
@@ -1299,6 +1097,31 @@ async def async_setup_automations(
             except (ValueError, TypeError):
                 batt = 0
 
+        # Every fix of the trip goes to the track, before the tracker thresholds
+        if lat and lon and session.is_tracking() and get_config_value(
+            hass, CONF_RECORD_GPS_TRACK, DEFAULT_RECORD_GPS_TRACK
+        ):
+            session.track.add(lat, lon)
+            if session.track.needs_reduce:
+                await session.track.async_reduce(hass)
+
+        if tracker_state["gps"] is not None:
+            # Skip GPS jitter: position barely changed and same battery
+            moved = gps_distance(*tracker_state["gps"], lat, lon) or 0.0
+            min_distance = get_config_value(hass, CONF_TRACKER_MIN_DISTANCE, DEFAULT_TRACKER_MIN_DISTANCE)
+            if moved < min_distance and batt == tracker_state["battery"]:
+                return
+
+            # While riding, at most one update per interval; the latest
+            # position is sent when the interval is over
+            min_interval = get_config_value(hass, CONF_TRACKER_MIN_INTERVAL, DEFAULT_TRACKER_MIN_INTERVAL)
+            wait = tracker_state["sent_at"] + min_interval - time.monotonic()
+            if wait > 0 and session.is_tracking():
+                if tracker_state["unsub"] is None:
+                    tracker_state["unsub"] = async_call_later(hass, wait, _handle_tracker_due)
+                return
+
+        tracker_state.update(gps=(lat, lon), battery=batt, sent_at=time.monotonic())
         await hass.services.async_call(
             "device_tracker",
             "see",
@@ -1316,52 +1139,87 @@ async def async_setup_automations(
 
     #
     # 9. "Scooter - Watchdog pour fin de trajet"
-    #    Vérifie toutes les 5 minutes si un trajet devrait être terminé
+    #    Un seul timer, armé à last_update + délai tant qu'un trajet est en
+    #    cours : réarmé à chaque mise à jour du scooter, annulé à l'arrêt.
     #
-    async def watchdog_check_trip_end(now):
+    def _watchdog_deadline():
+        """Return when the trip must be closed, or None if there is nothing to watch."""
+        if not is_trip_active():
+            return None
+        last_update = hass.states.get(SENSOR_SCOOTER_LAST_UPDATE)
+        if not last_update or last_update.state in ["unknown", "unavailable"]:
+            return None
+        last_update_dt = parse_state_datetime(last_update.state)
+        if not last_update_dt:
+            return None
+        watchdog_delay_min = get_config_value(hass, CONF_WATCHDOG_DELAY, DEFAULT_WATCHDOG_DELAY)
+        return dt_util.as_utc(last_update_dt) + timedelta(minutes=watchdog_delay_min)
+
+    @callback
+    def _arm_watchdog(*_):
+        """(Re)arm the deadline timer, or cancel it when no trip is running."""
+        try:
+            deadline = _watchdog_deadline()
+        except Exception as e:
+            _LOGGER.error("Erreur dans watchdog_check_trip_end: %s", e)
+            deadline = None
+        if deadline is None:
+            timers.async_cancel("watchdog")
+        else:
+            # Derived from last_update: recomputed at setup, not persisted
+            timers.async_schedule_at("watchdog", deadline, persistent=False)
+
+    @callback
+    def handle_watchdog_rearm(event):
+        # Deferred: the trip session follows the same entities and must see
+        # the new end time first
+        hass.loop.call_soon(_arm_watchdog)
+
+    async def watchdog_check_trip_end():
         """Vérifie si un trajet en cours devrait être terminé."""
         try:
-            # Vérifier s'il y a un trajet en cours
-            if not is_trip_active():
-                return  # Pas de trajet en cours
-            
-            # Vérifier la dernière mise à jour du scooter
-            last_update = hass.states.get(SENSOR_SCOOTER_LAST_UPDATE)
-            if not last_update or last_update.state in ["unknown", "unavailable"]:
+            # The deadline may be stale if an update raced with the timer
+            deadline = _watchdog_deadline()
+            if deadline is None:
                 return
-            
-            try:
-                last_update_dt = dt_util.parse_datetime(last_update.state)
-                if not last_update_dt:
-                    return
-
-                # Si pas de mise à jour depuis plus de X minutes (configurable)
-                watchdog_delay_min = get_config_value(hass, CONF_WATCHDOG_DELAY, DEFAULT_WATCHDOG_DELAY)
-                watchdog_delay_sec = watchdog_delay_min * 60
-                if (dt_util.utcnow() - dt_util.as_utc(last_update_dt)).total_seconds() > watchdog_delay_sec:
-                    _LOGGER.info(f"🔔 Watchdog: Scooter non mis à jour depuis >{watchdog_delay_min}min, arrêt du trajet")
-                    
-                    # Vérifier qu'on n'a pas déjà une tâche d'arrêt en cours
-                    if "trip_off_delay" not in scheduled_tasks:
-                        detector = get_error_detector(hass)
-                        if detector:
-                            detector.record_error(
-                                ErrorCategory.MQTT_DISCONNECT, ErrorSeverity.WARNING,
-                                f"Watchdog: no scooter update for >{watchdog_delay_min}min",
-                                source="watchdog",
-                            )
-                        await do_log_event(hass, "Watchdog: Auto stop trip (no update)")
-                        await do_stop_trip(hass, imei=imei, multi_device=multi_device, reason="watchdog-no-update")
-            except Exception as e:
-                _LOGGER.error("Erreur dans watchdog_check_trip_end: %s", e)
-                
+            if dt_util.utcnow() < deadline:
+                _arm_watchdog()
+                return
+
+            watchdog_delay_min = get_config_value(hass, CONF_WATCHDOG_DELAY, DEFAULT_WATCHDOG_DELAY)
+            _LOGGER.info(f"🔔 Watchdog: Scooter non mis à jour depuis >{watchdog_delay_min}min, arrêt du trajet")
+
+            # Vérifier qu'on n'a pas déjà une tâche d'arrêt en cours
+            if timers.is_pending("trip_off_delay"):
+                # The confirmation may still be cancelled without any new
+                # update: check again once it had time to run
+                confirmation_delay = get_config_value(hass, CONF_CONFIRMATION_DELAY, DEFAULT_CONFIRMATION_DELAY)
+                timers.async_schedule("watchdog", confirmation_delay, persistent=False)
+                return
+
+            detector = get_error_detector(hass)
+            if detector:
+                detector.record_error(
+                    ErrorCategory.MQTT_DISCONNECT, ErrorSeverity.WARNING,
+                    f"Watchdog: no scooter update for >{watchdog_delay_min}min",
+                    source="watchdog",
+                )
+            await do_log_event(hass, "Watchdog: Auto stop trip (no update)")
+            await do_stop_trip(hass, imei=imei, multi_device=multi_device, reason="watchdog-no-update")
         except Exception as e:
             _LOGGER.error("Erreur dans watchdog_check_trip_end: %s", e)
 
-    # Enregistrer le watchdog
-    watchdog_remove = async_track_time_interval(
-        hass, watchdog_check_trip_end, timedelta(minutes=5)
+    # Enregistrer le watchdog: trip start/stop (end time) and scooter updates
+    timers.async_register("watchdog", watchdog_check_trip_end)
+    watchdog_remove = async_track_state_change_event(
+        hass, [SENSOR_SCOOTER_LAST_UPDATE, INPUT_DT_END_TIME], handle_watchdog_rearm
     )
+    # Trip already running at startup
+    _arm_watchdog()
+
+    # Confirmation/tolerance delays pending when HA stopped resume with the
+    # time they had left
+    timers.async_resume()
 
 
     # Return all cancel listeners for cleanup
@@ -1376,7 +1234,10 @@ async def async_setup_automations(
         remove_track_odo,
         remove_track_battery,
         remove_update_tracker,
+        cancel_tracker_update,
         watchdog_remove,
+        timers.async_unload,
+        lambda: async_close_trip_session(hass, imei, multi_device),
     ]
 
     _LOGGER.info("All custom automations for Silence Scooter (IMEI: %s) have been set up", imei)
@@ -1408,33 +1269,12 @@ async def do_stop_trip(hass: HomeAssistant, imei: str = "", multi_device: bool =
     """
     _LOGGER.info("STOP TRIP TRIGGERED: reason=%s", reason)
 
-    # Retrieve trip-tracking flags from hass.data (populated by
-    # setup_automations). They are dicts with key "value" to keep the
-    # read/write pattern uniform with the closure-based tracking in
-    # setup_automations. Fallback to no-ops if the state isn't there
-    # (e.g. very first run before setup_automations initialised it).
-    _tracking_state = hass.data.get(DOMAIN, {}).get(
-        "trip_tracking_state",
-        {
-            "last_trip_start_monotonic": None,
-            "odo_tracking_fired": False,
-            "battery_tracking_fired": False,
-        },
-    )
-    odo_tracking_fired = {"value": _tracking_state.get("odo_tracking_fired", False)}
-    battery_tracking_fired = {"value": _tracking_state.get("battery_tracking_fired", False)}
-
     def entity_id(base: str) -> str:
         from .helpers import insert_imei_in_entity_id
         return insert_imei_in_entity_id(base, imei, multi_device)
 
     # Entity IDs for this scooter
-    INPUT_DT_END_TIME = entity_id("datetime.scooter_end_time")
     INPUT_DT_START_TIME = entity_id("datetime.scooter_start_time")
-    NUMBER_ODO_DEBUT = entity_id("number.scooter_odo_debut")
-    NUMBER_ODO_FIN = entity_id("number.scooter_odo_fin")
-    NUMBER_BATT_SOC_DEBUT = entity_id("number.scooter_battery_soc_debut")
-    NUMBER_BATT_SOC_FIN = entity_id("number.scooter_battery_soc_fin")
     SENSOR_SCOOTER_ODO = entity_id("sensor.silence_scooter_odo")
     SENSOR_BATT_SOC = entity_id("sensor.silence_scooter_battery_soc")
     SENSOR_TRIP_STATUS = entity_id("sensor.scooter_trip_status")
@@ -1447,141 +1287,120 @@ async def do_stop_trip(hass: HomeAssistant, imei: str = "", multi_device: bool =
     # Two trip_status off events firing in quick succession (e.g. due to MQTT
     # flapping) would otherwise each record the trip and double-increment
     # scooter_trips, tracked_distance, and the history file.
-    _domain_state = hass.data.setdefault(DOMAIN, {})
-    _stop_lock_key = f"stop_trip_in_progress:{imei or 'single'}"
-    if _domain_state.get(_stop_lock_key):
+    # The lock and the tracking flags live in this scooter's trip session.
+    session = get_trip_session(hass, imei, multi_device)
+    if session.stopping:
         _LOGGER.info(
             "do_stop_trip already in progress (reason=%s); skipping duplicate call",
             reason,
         )
         return
-    _domain_state[_stop_lock_key] = True
+    session.stopping = True
 
     try:
         # 1) Determine end timestamp using helper
         end_timestamp = determine_trip_end_timestamp(hass, imei, multi_device)
 
-        # 2) Update datetime.scooter_end_time
-        await hass.services.async_call(
-            "datetime",
-            "set_value",
-            {
-                "entity_id": INPUT_DT_END_TIME,
-                "datetime": end_timestamp
-            },
-            blocking=True
-        )
-
-        # 3) Prefer the NUMBER_ODO_FIN value kept in sync by handle_track_odo.
-        # Fall back to live sensor only if tracking never fired during the
-        # trip (flag odo_tracking_fired). We still take max() with the live
-        # sensor as a safety net in case tracking missed the very last km.
-        tracked_fin = get_sensor_float_value(hass, NUMBER_ODO_FIN, 0.0)
-        live_odo = get_sensor_float_value(hass, SENSOR_SCOOTER_ODO, 0.0, fallback_entity=entity_id("sensor.scooter_odo_display"))
-
-        if odo_tracking_fired.get("value") and tracked_fin > 0:
-            # Tracking fired — trust it but take max with live sensor as
-            # a safety net (live may have advanced since the last tracked
-            # update, e.g. between the last ODO tick and the stop).
-            odo_fin_val = max(tracked_fin, live_odo)
-        else:
-            # Tracking never fired — fall back entirely to live sensor.
-            odo_fin_val = live_odo
-
-        if odo_fin_val != tracked_fin:
-            await hass.services.async_call(
-                "number",
-                SERVICE_SET_VALUE,
-                {
-                    "entity_id": NUMBER_ODO_FIN,
-                    "value": odo_fin_val
-                },
-                blocking=True
-            )
-
-        # 4) Calculate trip distance
-        odo_debut_val = get_sensor_float_value(hass, NUMBER_ODO_DEBUT, 0.0)
-        distance_val = round(max(0, odo_fin_val - odo_debut_val), 1)
-
-        if distance_val > 500:
-            _LOGGER.warning("Distance too long (%.1f km), capped at 500 km", distance_val)
-            distance_val = 500.0
-
-        _LOGGER.info("Setting distance: %.1f km", distance_val)
-        await set_writable_sensor_value(hass, SENSOR_LAST_TRIP_DISTANCE, distance_val)
-
-        # 5) Calculate trip duration using helper
-        start_time_state = hass.states.get(INPUT_DT_START_TIME)
-        if start_time_state and start_time_state.state not in ["unknown", "unavailable"]:
-            trip_duration_val = await calculate_trip_duration(
-                hass,
-                start_time_state.state,
-                end_timestamp,
-                imei=imei,
-                multi_device=multi_device,
-            )
-        else:
-            _LOGGER.debug("Pas de start_time disponible pour calculer la durée")
-            trip_duration_val = 0.0
-
-        await set_writable_sensor_value(hass, SENSOR_LAST_TRIP_DURATION, trip_duration_val)
-
-        # 6) Calculate average speed
-        if trip_duration_val > 0:
-            avg_speed = round(distance_val / (trip_duration_val / 60.0), 1)
-        else:
-            avg_speed = 0.0
-
-        await set_writable_sensor_value(hass, SENSOR_LAST_TRIP_AVG_SPEED, avg_speed)
-
-        # 7) Prefer NUMBER_BATT_SOC_FIN kept in sync by handle_track_battery.
-        # Unlike ODO, battery SoC decreases during a trip, so we keep the
-        # most recently tracked value (latest reading during the trip)
-        # rather than min/max. Fall back to live sensor only if tracking
-        # explicitly never fired (battery_tracking_fired flag), not by
-        # comparing values — the first tracked value may coincidentally
-        # equal the debut (e.g. SoC didn't change in the first few secs).
-        tracked_fin_val = None
-        if battery_tracking_fired.get("value"):
-            tracked_fin = hass.states.get(NUMBER_BATT_SOC_FIN)
-            if tracked_fin and tracked_fin.state not in ["unknown", "unavailable"]:
-                try:
-                    tracked_fin_val = float(tracked_fin.state)
-                except (ValueError, TypeError):
-                    tracked_fin_val = None
+        # Steps 2-9 are applied as one transaction: entity states are written
+        # together at the end, so a trip stop triggers one wave of recomputation.
+        async with entity_write_batch():
+            # 2) Update datetime.scooter_end_time
+            await session.async_set(end_time=end_timestamp)
+
+            # Max speed (pending rate-capped increase) and speed statistics
+            await session.async_flush_max_speed()
+            max_speed_sensor = hass.data.get(DOMAIN, {}).get("sensors", {}).get(session.entity_ids["max_speed"])
+            if max_speed_sensor is not None:
+                max_speed_sensor.async_set_attributes(session.speed_stats.as_attributes())
+
+            # 3) Prefer the NUMBER_ODO_FIN value kept in sync by handle_track_odo.
+            # Fall back to live sensor only if tracking never fired during the
+            # trip (flag odo_tracking_fired). We still take max() with the live
+            # sensor as a safety net in case tracking missed the very last km.
+            tracked_fin = session.odo_end
+            live_odo = get_sensor_float_value(hass, SENSOR_SCOOTER_ODO, 0.0, fallback_entity=entity_id("sensor.scooter_odo_display"))
+
+            if session.odo_tracking_fired and tracked_fin > 0:
+                # Tracking fired — trust it but take max with live sensor as
+                # a safety net (live may have advanced since the last tracked
+                # update, e.g. between the last ODO tick and the stop).
+                odo_fin_val = max(tracked_fin, live_odo)
+            else:
+                # Tracking never fired — fall back entirely to live sensor.
+                odo_fin_val = live_odo
+
+            await session.async_set(odo_end=odo_fin_val)
+
+            # 4) Calculate trip distance
+            odo_debut_val = session.odo_start
+            distance_val = round(max(0, odo_fin_val - odo_debut_val), 1)
+
+            if distance_val > 500:
+                _LOGGER.warning("Distance too long (%.1f km), capped at 500 km", distance_val)
+                distance_val = 500.0
+
+            _LOGGER.info("Setting distance: %.1f km", distance_val)
+            await set_writable_sensor_value(hass, SENSOR_LAST_TRIP_DISTANCE, distance_val)
+
+            # 5) Calculate trip duration using helper
+            start_time_state = hass.states.get(INPUT_DT_START_TIME)
+            if start_time_state and start_time_state.state not in ["unknown", "unavailable"]:
+                trip_duration_val = await calculate_trip_duration(
+                    hass,
+                    start_time_state.state,
+                    end_timestamp,
+                    imei=imei,
+                    multi_device=multi_device,
+                )
+            else:
+                _LOGGER.debug("Pas de start_time disponible pour calculer la durée")
+                trip_duration_val = 0.0
 
-        if tracked_fin_val is None:
-            batt_soc_fin_val = get_sensor_float_value(hass, SENSOR_BATT_SOC, 0.0, fallback_entity=entity_id("sensor.scooter_battery_display"))
-        else:
-            batt_soc_fin_val = tracked_fin_val
+            await set_writable_sensor_value(hass, SENSOR_LAST_TRIP_DURATION, trip_duration_val)
 
-        await hass.services.async_call(
-            "number",
-            SERVICE_SET_VALUE,
-            {
-                "entity_id": NUMBER_BATT_SOC_FIN,
-                "value": batt_soc_fin_val
-            },
-            blocking=True
-        )
-
-        # 8) Calculate battery consumption
-        # Clamp to [0, 100] — a trip cannot consume more than the full pack.
-        # Upstream SoC glitches (e.g. >100% on reconnect) must not leak into
-        # history.json and downstream sensors.
-        battery_debut_val = get_sensor_float_value(hass, NUMBER_BATT_SOC_DEBUT, 0.0)
-        raw_consumption = battery_debut_val - batt_soc_fin_val
-        batt_consumption = round(max(0.0, min(100.0, raw_consumption)), 1)
-        if raw_consumption < 0 or raw_consumption > 100:
-            _LOGGER.warning(
-                "Battery consumption out of range: debut=%.1f%%, fin=%.1f%%, "
-                "raw=%.1f%% -> clamped to %.1f%%",
-                battery_debut_val, batt_soc_fin_val, raw_consumption, batt_consumption,
-            )
-        await set_writable_sensor_value(hass, SENSOR_LAST_TRIP_BATT_CONSUMPTION, batt_consumption)
+            # 6) Calculate average speed
+            if trip_duration_val > 0:
+                avg_speed = round(distance_val / (trip_duration_val / 60.0), 1)
+            else:
+                avg_speed = 0.0
+
+            await set_writable_sensor_value(hass, SENSOR_LAST_TRIP_AVG_SPEED, avg_speed)
+
+            # 7) Prefer NUMBER_BATT_SOC_FIN kept in sync by handle_track_battery.
+            # Unlike ODO, battery SoC decreases during a trip, so we keep the
+            # most recently tracked value (latest reading during the trip)
+            # rather than min/max. Fall back to live sensor only if tracking
+            # explicitly never fired (battery_tracking_fired flag), not by
+            # comparing values — the first tracked value may coincidentally
+            # equal the debut (e.g. SoC didn't change in the first few secs).
+            tracked_fin_val = None
+            if session.battery_tracking_fired:
+                tracked_fin_val = session.battery_end
+
+            if tracked_fin_val is None:
+                batt_soc_fin_val = get_sensor_float_value(hass, SENSOR_BATT_SOC, 0.0, fallback_entity=entity_id("sensor.scooter_battery_display"))
+            else:
+                batt_soc_fin_val = tracked_fin_val
+
+            await session.async_set(battery_end=batt_soc_fin_val)
+
+            # 8) Calculate battery consumption
+            # Clamp to [0, 100] — a trip cannot consume more than the full pack.
+            # Upstream SoC glitches (e.g. >100% on reconnect) must not leak into
+            # history.json and downstream sensors.
+            battery_debut_val = session.battery_start
+            raw_consumption = battery_debut_val - batt_soc_fin_val
+            batt_consumption = round(max(0.0, min(100.0, raw_consumption)), 1)
+            if raw_consumption < 0 or raw_consumption > 100:
+                _LOGGER.warning(
+                    "Battery consumption out of range: debut=%.1f%%, fin=%.1f%%, "
+                    "raw=%.1f%% -> clamped to %.1f%%",
+                    battery_debut_val, batt_soc_fin_val, raw_consumption, batt_consumption,
+                )
+            await set_writable_sensor_value(hass, SENSOR_LAST_TRIP_BATT_CONSUMPTION, batt_consumption)
 
-        # 9) Update trip statistics using helper
-        await update_trip_statistics(hass, distance_val, batt_consumption, imei=imei, multi_device=multi_device)
+            # 9) Update trip statistics using helper
+            await update_trip_statistics(hass, distance_val, batt_consumption, imei=imei, multi_device=multi_device)
 
         # 10) Update entities
         await hass.services.async_call(
@@ -1593,10 +1412,7 @@ async def do_stop_trip(hass: HomeAssistant, imei: str = "", multi_device: bool =
                     SENSOR_LAST_TRIP_DURATION,
                     SENSOR_LAST_TRIP_AVG_SPEED,
                     SENSOR_LAST_TRIP_BATT_CONSUMPTION,
-                    entity_id("sensor.scooter_energy_cost_daily"),
-                    entity_id("sensor.scooter_energy_cost_weekly"),
-                    entity_id("sensor.scooter_energy_cost_monthly"),
-                    entity_id("sensor.scooter_energy_cost_yearly"),
+                    # The energy cost sensors follow their meters (no refresh needed)
                 ]
             },
             blocking=True
@@ -1619,7 +1435,7 @@ async def do_stop_trip(hass: HomeAssistant, imei: str = "", multi_device: bool =
                 f"do_stop_trip failed: {e}", source="do_stop_trip",
             )
     finally:
-        _domain_state[_stop_lock_key] = False
+        session.stopping = False
 
 async def do_update_trips_history(hass: HomeAssistant, imei: str = "", multi_device: bool = False):
     """Update trip history with validation.
@@ -1769,11 +1585,17 @@ async def do_update_trips_history(hass: HomeAssistant, imei: str = "", multi_dev
         
         battery_consumed = abs(round(batt_debut_val - batt_fin_val, 1))
 
-        _LOGGER.info("Calling update_history: distance=%.1f, duration=%.0f, avg_speed=%.1f",
+        _LOGGER.info("Recording trip: distance=%.1f, duration=%.0f, avg_speed=%.1f",
                      distance_val, duration_val, avg_val)
 
-        success = await update_history(
-            hass,
+        track = ""
+        if get_config_value(hass, CONF_RECORD_GPS_TRACK, DEFAULT_RECORD_GPS_TRACK):
+            session = get_trip_session(hass, imei, multi_device)
+            track = await session.track.async_encode(hass)
+            _LOGGER.debug("GPS track: %d fixes, %d chars encoded", len(session.track), len(track))
+            session.track.clear()
+
+        success = await get_history_store(hass, imei, multi_device).async_add_trip(
             avg_speed=avg_val,
             distance=distance_val,
             duration=duration_val,
@@ -1781,7 +1603,9 @@ async def do_update_trips_history(hass: HomeAssistant, imei: str = "", multi_dev
             end_time=end_time_str,
             max_speed=max_val,
             battery=battery_consumed,
-            outdoor_temp=temp_val
+            outdoor_temp=temp_val,
+            imei=imei if multi_device else "",
+            track=track,
         )
 
         if success:
@@ -0,0 +1,259 @@
+"""Native calculators for the built-in derived sensors.
+
+Each calculator reproduces, in plain Python, the Jinja template of the same
+sensor in definitions.py (which remains the reference and the fallback for
+sensors without a calculator). Outputs are identical to the rendered and
+parsed template: same float/default semantics, same HA ``round`` filter,
+``None`` where the template renders ``none``.
+
+A calculator declares its inputs as role -> entity_id (single-device names,
+adapted per scooter by the sensor platform), and receives a CalculatorInputs
+to read them.
+"""
+import math
+import re
+from ast import literal_eval
+from bisect import bisect_right
+from typing import Any, Callable, Optional
+
+# Same placeholder as in the templates, replaced by the configured tariff sensor
+TARIFF_PLACEHOLDER = "sensor.tarif_base_ttc"
+
+# Battery capacity hardcoded in the templates (kWh)
+TEMPLATE_BATTERY_CAPACITY = 5.6
+
+UNAVAILABLE_STATES = ("unknown", "unavailable")
+
+# Same pattern as homeassistant.helpers.template._IS_NUMERIC
+_IS_NUMERIC = re.compile(r"^[+-]?(?!0\d)\d*(?:\.\d*)?$")
+
+# NMC 14S Li-ion lookup table: cell voltage (OCV) -> SOC%
+# Based on typical NMC discharge curve at C/5, 25C
+SOC_LUT = (
+    (2.80, 0), (3.00, 1), (3.10, 3), (3.20, 5),
+    (3.30, 10), (3.40, 15), (3.50, 25), (3.55, 30),
+    (3.60, 38), (3.65, 45), (3.70, 55), (3.75, 65),
+    (3.80, 72), (3.85, 78), (3.90, 84), (3.95, 89),
+    (4.00, 93), (4.05, 96), (4.10, 98), (4.15, 99),
+    (4.20, 100),
+)
+SOC_LUT_VOLTS = tuple(volt for volt, _ in SOC_LUT)
+
+CELL_COUNT = 14
+
+_NO_DEFAULT = object()
+
+
+class CalculatorError(ValueError):
+    """Raised where the template would raise a rendering error."""
+
+
+class CalculatorInputs:
+    """Read access to the input entities of a calculator, by role."""
+
+    def __init__(self, hass, entity_ids: dict) -> None:
+        self._hass = hass
+        self._entity_ids = entity_ids
+
+    def state(self, role: str) -> str:
+        """Same as the ``states()`` template function."""
+        state = self._hass.states.get(self._entity_ids[role])
+        return state.state if state is not None else "unknown"
+
+    def attr(self, role: str, name: str) -> Any:
+        """Same as the ``state_attr()`` template function."""
+        state = self._hass.states.get(self._entity_ids[role])
+        return state.attributes.get(name) if state is not None else None
+
+
+def to_float(value, default=_NO_DEFAULT) -> Optional[float]:
+    """Same as the ``float`` template filter."""
+    try:
+        return float(value)
+    except (ValueError, TypeError) as err:
+        if default is _NO_DEFAULT:
+            raise CalculatorError(f"float got invalid input '{value}'") from err
+        return default
+
+
+def template_round(value, precision: int = 0):
+    """Same as the ``round`` template filter (common rounding)."""
+    value = round(float(value), precision)
+    return int(value) if precision == 0 else value
+
+
+def parse_result(text: str) -> Any:
+    """Same as the parsing of a rendered template (numbers, None, or the text)."""
+    text = text.strip()
+    try:
+        result = literal_eval(text)
+    except (ValueError, TypeError, SyntaxError, MemoryError):
+        return text
+    if isinstance(result, (str, complex)):
+        return text
+    if isinstance(result, (int, float)) and not isinstance(result, bool) and _IS_NUMERIC.match(text) is None:
+        return text
+    return result
+
+
+class Calculator:
+    """A native replacement for a template: its inputs and its function."""
+
+    def __init__(self, inputs: dict, compute: Callable[[CalculatorInputs], Any]) -> None:
+        self.inputs = inputs
+        self.compute = compute
+
+
+CALCULATORS: dict = {}
+
+
+def calculator(name: str, **inputs: str):
+    """Register a calculator under ``name`` with its role -> entity_id inputs."""
+    def register(compute):
+        CALCULATORS[name] = Calculator(inputs, compute)
+        return compute
+    return register
+
+
+CELL_INPUTS = {
+    f"cell{n}": f"sensor.silence_scooter_cell{n}_voltage" for n in range(1, CELL_COUNT + 1)
+}
+
+
+@calculator("battery_cell_imbalance", **CELL_INPUTS)
+def battery_cell_imbalance(inputs: CalculatorInputs):
+    valid = []
+    for role in CELL_INPUTS:
+        raw = inputs.state(role)
+        if raw in ("unknown", "unavailable", "None", ""):
+            continue
+        value = to_float(raw, None)
+        if value is not None and value > 0:
+            valid.append(value)
+    if len(valid) >= 2:
+        return template_round((max(valid) - min(valid)) * 1000, 0)
+    return None
+
+
+def soc_from_cell_voltage(cell_v: float):
+    """Interpolate the SOC (%) of a cell voltage in SOC_LUT."""
+    if cell_v <= SOC_LUT_VOLTS[0]:
+        return 0
+    if cell_v >= SOC_LUT_VOLTS[-1]:
+        return 100
+    if math.isnan(cell_v):
+        # No interval matches in the template loop
+        return template_round(0, 1)
+    i = bisect_right(SOC_LUT_VOLTS, cell_v) - 1
+    (v_low, soc_low), (v_high, soc_high) = SOC_LUT[i], SOC_LUT[i + 1]
+    ratio = (cell_v - v_low) / (v_high - v_low)
+    return template_round(soc_low + ratio * (soc_high - soc_low), 1)
+
+
+@calculator("battery_soc_calculated", volt="sensor.silence_scooter_battery_volt")
+def battery_soc_calculated(inputs: CalculatorInputs):
+    volt = to_float(inputs.state("volt"), 0)
+    if volt <= 0:
+        return None
+    return soc_from_cell_voltage(volt / CELL_COUNT)
+
+
+@calculator(
+    "battery_soc_deviation",
+    displayed="sensor.scooter_battery_display",
+    calculated="sensor.scooter_battery_soc_calculated",
+)
+def battery_soc_deviation(inputs: CalculatorInputs):
+    displayed_st = inputs.state("displayed")
+    calculated_st = inputs.state("calculated")
+    if displayed_st in UNAVAILABLE_STATES or calculated_st in UNAVAILABLE_STATES:
+        return None
+    soc_displayed = to_float(displayed_st, 0)
+    soc_calculated = to_float(calculated_st, 0)
+    if soc_displayed > 0 or soc_calculated > 0:
+        return template_round(soc_displayed - soc_calculated, 1)
+    return None
+
+
+@calculator(
+    "battery_charge_cycles",
+    charged="sensor.silence_scooter_charged_energy",
+    current="sensor.scooter_battery_charge_cycles",
+)
+def battery_charge_cycles(inputs: CalculatorInputs):
+    charged_state = inputs.state("charged")
+    if charged_state not in UNAVAILABLE_STATES:
+        charged = to_float(charged_state, 0)
+        if charged > 0:
+            return template_round(charged / TEMPLATE_BATTERY_CAPACITY, 1)
+    current = inputs.state("current")
+    return parse_result(current) if current not in UNAVAILABLE_STATES else 0
+
+
+@calculator(
+    "distance_per_charge",
+    odo="sensor.silence_scooter_odo",
+    charged="sensor.silence_scooter_charged_energy",
+)
+def distance_per_charge(inputs: CalculatorInputs):
+    odo = to_float(inputs.state("odo"), 0)
+    charged = to_float(inputs.state("charged"), 0)
+    if charged > 0 and odo > 0:
+        return template_round(odo / (charged / TEMPLATE_BATTERY_CAPACITY), 1)
+    return 0
+
+
+@calculator(
+    "distance_per_charge_tracked",
+    distance="number.scooter_tracked_distance",
+    battery="number.scooter_tracked_battery_used",
+)
+def distance_per_charge_tracked(inputs: CalculatorInputs):
+    tracked_dist = to_float(inputs.state("distance"), 0)
+    tracked_batt = to_float(inputs.state("battery"), 0)
+    if tracked_batt > 0 and tracked_dist > 0:
+        return template_round(tracked_dist / (tracked_batt / 100), 1)
+    return 0
+
+
+@calculator(
+    "cost_per_km",
+    odo="sensor.silence_scooter_odo",
+    consumed="sensor.silence_scooter_discharged_energy",
+    regenerated="sensor.silence_scooter_regenerated_energy",
+    price=TARIFF_PLACEHOLDER,
+)
+def cost_per_km(inputs: CalculatorInputs):
+    odo = to_float(inputs.state("odo"), 0)
+    consumed = to_float(inputs.state("consumed"), 0)
+    regenerated = to_float(inputs.state("regenerated"), 0)
+    price_per_kwh = to_float(inputs.state("price"), 0.215)
+    if odo > 0:
+        return template_round(((consumed - regenerated) * price_per_kwh) / odo, 3)
+    return 0
+
+
+@calculator(
+    "cost_per_km_tracked",
+    distance="number.scooter_tracked_distance",
+    battery="number.scooter_tracked_battery_used",
+    price=TARIFF_PLACEHOLDER,
+)
+def cost_per_km_tracked(inputs: CalculatorInputs):
+    tracked_dist = to_float(inputs.state("distance"), 0)
+    tracked_batt = to_float(inputs.state("battery"), 0)
+    price_per_kwh = to_float(inputs.state("price"), 0.215)
+    if tracked_dist > 0:
+        return template_round(
+            (tracked_batt / 100 * TEMPLATE_BATTERY_CAPACITY * price_per_kwh) / tracked_dist, 3
+        )
+    return 0
+
+
+@calculator("average_trip_distance", trips="sensor.scooter_trips")
+def average_trip_distance(inputs: CalculatorInputs):
+    trips = inputs.attr("trips", "history")
+    if trips is not None and len(trips) > 0:
+        total = sum(to_float(trip.get("distance")) for trip in trips)
+        return template_round(total / len(trips), 1)
+    return 0
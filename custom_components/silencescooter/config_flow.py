@@ -17,24 +17,65 @@ from .const import (
     CONF_CONFIRMATION_DELAY,
     CONF_PAUSE_MAX_DURATION,
     CONF_WATCHDOG_DELAY,
+    CONF_TRACKER_MIN_DISTANCE,
+    CONF_TRACKER_MIN_INTERVAL,
+    CONF_RECORD_GPS_TRACK,
+    CONF_METER_SOURCES,
+    CONF_METER_ENTITIES,
+    CONF_METER_CYCLES,
+    CONF_METER_OFFSET,
+    CONF_PEAK_PRICE,
+    CONF_OFFPEAK_PRICE,
+    CONF_OFFPEAK_HOURS,
     CONF_USE_TRACKED_DISTANCE,
     CONF_OUTDOOR_TEMP_SOURCE,
     CONF_OUTDOOR_TEMP_ENTITY,
     CONF_MULTI_DEVICE,
+    CONF_HISTORY_BACKEND,
     DEFAULT_TARIFF_SENSOR,
     DEFAULT_CONFIRMATION_DELAY,
     DEFAULT_PAUSE_MAX_DURATION,
     DEFAULT_WATCHDOG_DELAY,
+    DEFAULT_TRACKER_MIN_DISTANCE,
+    DEFAULT_TRACKER_MIN_INTERVAL,
+    DEFAULT_RECORD_GPS_TRACK,
+    DEFAULT_METER_SOURCES,
+    DEFAULT_METER_ENTITIES,
+    DEFAULT_METER_CYCLES,
+    DEFAULT_METER_OFFSET,
+    DEFAULT_PEAK_PRICE,
+    DEFAULT_OFFPEAK_PRICE,
+    DEFAULT_OFFPEAK_HOURS,
     DEFAULT_USE_TRACKED_DISTANCE,
     DEFAULT_OUTDOOR_TEMP_SOURCE,
     DEFAULT_OUTDOOR_TEMP_ENTITY,
     DEFAULT_MULTI_DEVICE,
+    DEFAULT_HISTORY_BACKEND,
     OUTDOOR_TEMP_SOURCE_SCOOTER,
     OUTDOOR_TEMP_SOURCE_EXTERNAL,
+    HISTORY_BACKEND_JSON,
+    HISTORY_BACKEND_SQLITE,
 )
+from .tariff import parse_time_ranges
 
 _LOGGER = logging.getLogger(__name__)
 
+METER_SOURCE_OPTIONS = [
+    selector.SelectOptionDict(value="energy_consumption", label="Energy consumption (kWh)"),
+    selector.SelectOptionDict(value="distance", label="Distance from the odometer (km)"),
+    selector.SelectOptionDict(value="regenerated_energy", label="Regenerated energy (kWh)"),
+    selector.SelectOptionDict(value="charged_energy", label="Charged energy (kWh)"),
+    selector.SelectOptionDict(value="trips", label="Number of trips"),
+]
+
+METER_CYCLE_OPTIONS = [
+    selector.SelectOptionDict(value="hourly", label="Hourly"),
+    selector.SelectOptionDict(value="daily", label="Daily"),
+    selector.SelectOptionDict(value="weekly", label="Weekly"),
+    selector.SelectOptionDict(value="monthly", label="Monthly"),
+    selector.SelectOptionDict(value="yearly", label="Yearly"),
+]
+
 
 def get_energy_sensors(hass: HomeAssistant) -> list[str]:
     """Get list of available energy/tariff sensors."""
@@ -137,6 +178,17 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         if not hass.states.get(tariff_sensor):
             errors[CONF_TARIFF_SENSOR] = "sensor_not_found"
 
+    # Off-peak hours need both prices
+    try:
+        offpeak_ranges = parse_time_ranges(data.get(CONF_OFFPEAK_HOURS, DEFAULT_OFFPEAK_HOURS))
+    except ValueError:
+        errors[CONF_OFFPEAK_HOURS] = "invalid_offpeak_hours"
+    else:
+        if offpeak_ranges and (
+            not data.get(CONF_PEAK_PRICE, DEFAULT_PEAK_PRICE) or not data.get(CONF_OFFPEAK_PRICE, DEFAULT_OFFPEAK_PRICE)
+        ):
+            errors[CONF_OFFPEAK_HOURS] = "offpeak_prices_required"
+
     # Validate outdoor temperature configuration
     temp_source = data.get(CONF_OUTDOOR_TEMP_SOURCE, DEFAULT_OUTDOOR_TEMP_SOURCE)
     if temp_source == OUTDOOR_TEMP_SOURCE_EXTERNAL:
@@ -241,6 +293,24 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_MULTI_DEVICE,
                 default=DEFAULT_MULTI_DEVICE,
             ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_HISTORY_BACKEND,
+                default=DEFAULT_HISTORY_BACKEND,
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=[
+                        selector.SelectOptionDict(
+                            value=HISTORY_BACKEND_JSON,
+                            label="JSON file (history.json)"
+                        ),
+                        selector.SelectOptionDict(
+                            value=HISTORY_BACKEND_SQLITE,
+                            label="SQLite database (history.db, exported to history.json)"
+                        ),
+                    ],
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            ),
             vol.Optional(
                 CONF_CONFIRMATION_DELAY,
                 default=DEFAULT_CONFIRMATION_DELAY,
@@ -253,6 +323,69 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_WATCHDOG_DELAY,
                 default=DEFAULT_WATCHDOG_DELAY,
             ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+            vol.Optional(
+                CONF_TRACKER_MIN_DISTANCE,
+                default=DEFAULT_TRACKER_MIN_DISTANCE,
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=500)),
+            vol.Optional(
+                CONF_TRACKER_MIN_INTERVAL,
+                default=DEFAULT_TRACKER_MIN_INTERVAL,
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=300)),
+            vol.Optional(
+                CONF_RECORD_GPS_TRACK,
+                default=DEFAULT_RECORD_GPS_TRACK,
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_METER_SOURCES,
+                default=DEFAULT_METER_SOURCES,
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=METER_SOURCE_OPTIONS,
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.LIST,
+                )
+            ),
+            vol.Optional(
+                CONF_METER_ENTITIES,
+                default=DEFAULT_METER_ENTITIES,
+            ): selector.EntitySelector(
+                selector.EntitySelectorConfig(
+                    domain="sensor",
+                    multiple=True,
+                )
+            ),
+            vol.Optional(
+                CONF_METER_CYCLES,
+                default=DEFAULT_METER_CYCLES,
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=METER_CYCLE_OPTIONS,
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.LIST,
+                )
+            ),
+            vol.Optional(
+                CONF_METER_OFFSET,
+                default=DEFAULT_METER_OFFSET,
+            ): selector.DurationSelector(
+                selector.DurationSelectorConfig(enable_day=True)
+            ),
+            vol.Optional(
+                CONF_OFFPEAK_HOURS,
+                default=DEFAULT_OFFPEAK_HOURS,
+            ): selector.TextSelector(
+                selector.TextSelectorConfig(
+                    type=selector.TextSelectorType.TEXT,
+                )
+            ),
+            vol.Optional(
+                CONF_PEAK_PRICE,
+                default=DEFAULT_PEAK_PRICE,
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+            vol.Optional(
+                CONF_OFFPEAK_PRICE,
+                default=DEFAULT_OFFPEAK_PRICE,
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
         })
 
         return self.async_show_form(
@@ -408,6 +541,24 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 CONF_MULTI_DEVICE,
                 default=current_data.get(CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE),
             ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_HISTORY_BACKEND,
+                default=current_data.get(CONF_HISTORY_BACKEND, DEFAULT_HISTORY_BACKEND),
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=[
+                        selector.SelectOptionDict(
+                            value=HISTORY_BACKEND_JSON,
+                            label="JSON file (history.json)"
+                        ),
+                        selector.SelectOptionDict(
+                            value=HISTORY_BACKEND_SQLITE,
+                            label="SQLite database (history.db, exported to history.json)"
+                        ),
+                    ],
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            ),
             vol.Optional(
                 CONF_CONFIRMATION_DELAY,
                 default=current_data.get(CONF_CONFIRMATION_DELAY, DEFAULT_CONFIRMATION_DELAY),
@@ -420,6 +571,69 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 CONF_WATCHDOG_DELAY,
                 default=current_data.get(CONF_WATCHDOG_DELAY, DEFAULT_WATCHDOG_DELAY),
             ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+            vol.Optional(
+                CONF_TRACKER_MIN_DISTANCE,
+                default=current_data.get(CONF_TRACKER_MIN_DISTANCE, DEFAULT_TRACKER_MIN_DISTANCE),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=500)),
+            vol.Optional(
+                CONF_TRACKER_MIN_INTERVAL,
+                default=current_data.get(CONF_TRACKER_MIN_INTERVAL, DEFAULT_TRACKER_MIN_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=300)),
+            vol.Optional(
+                CONF_RECORD_GPS_TRACK,
+                default=current_data.get(CONF_RECORD_GPS_TRACK, DEFAULT_RECORD_GPS_TRACK),
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_METER_SOURCES,
+                default=current_data.get(CONF_METER_SOURCES, DEFAULT_METER_SOURCES),
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=METER_SOURCE_OPTIONS,
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.LIST,
+                )
+            ),
+            vol.Optional(
+                CONF_METER_ENTITIES,
+                default=current_data.get(CONF_METER_ENTITIES, DEFAULT_METER_ENTITIES),
+            ): selector.EntitySelector(
+                selector.EntitySelectorConfig(
+                    domain="sensor",
+                    multiple=True,
+                )
+            ),
+            vol.Optional(
+                CONF_METER_CYCLES,
+                default=current_data.get(CONF_METER_CYCLES, DEFAULT_METER_CYCLES),
+            ): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=METER_CYCLE_OPTIONS,
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.LIST,
+                )
+            ),
+            vol.Optional(
+                CONF_METER_OFFSET,
+                default=current_data.get(CONF_METER_OFFSET, DEFAULT_METER_OFFSET),
+            ): selector.DurationSelector(
+                selector.DurationSelectorConfig(enable_day=True)
+            ),
+            vol.Optional(
+                CONF_OFFPEAK_HOURS,
+                default=current_data.get(CONF_OFFPEAK_HOURS, DEFAULT_OFFPEAK_HOURS),
+            ): selector.TextSelector(
+                selector.TextSelectorConfig(
+                    type=selector.TextSelectorType.TEXT,
+                )
+            ),
+            vol.Optional(
+                CONF_PEAK_PRICE,
+                default=current_data.get(CONF_PEAK_PRICE, DEFAULT_PEAK_PRICE),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+            vol.Optional(
+                CONF_OFFPEAK_PRICE,
+                default=current_data.get(CONF_OFFPEAK_PRICE, DEFAULT_OFFPEAK_PRICE),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
         })
 
         return self.async_show_form(
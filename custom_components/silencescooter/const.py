@@ -14,9 +14,12 @@ SCRIPTS_PATH = COMPONENT_PATH / "scripts"
 PERSISTENT_DATA_PATH = Path("/config/silencescooter")
 
 HISTORY_FILE = PERSISTENT_DATA_PATH / "history.json"
-HISTORY_SCRIPT = SCRIPTS_PATH / "history.sh"
 LOG_FILE = PERSISTENT_DATA_PATH / "silence_logs.log"
 
+# Dispatcher signal sent by the history store after the trip list changed,
+# formatted with the IMEI (or "single" in single-device mode)
+SIGNAL_HISTORY_UPDATED = f"{DOMAIN}_history_updated_{{}}"
+
 # Legacy paths (pre-1.3.3) — kept only for one-time migration on startup
 LEGACY_DATA_PATH = COMPONENT_PATH / "data"
 LEGACY_HISTORY_FILE = LEGACY_DATA_PATH / "history.json"
@@ -39,6 +42,17 @@ CONF_WATCHDOG_DELAY = "watchdog_delay"
 CONF_USE_TRACKED_DISTANCE = "use_tracked_distance"
 CONF_OUTDOOR_TEMP_SOURCE = "outdoor_temp_source"
 CONF_OUTDOOR_TEMP_ENTITY = "outdoor_temp_entity"
+CONF_HISTORY_BACKEND = "history_backend"
+CONF_TRACKER_MIN_DISTANCE = "tracker_min_distance"
+CONF_TRACKER_MIN_INTERVAL = "tracker_min_interval"
+CONF_RECORD_GPS_TRACK = "record_gps_track"
+CONF_METER_SOURCES = "meter_sources"
+CONF_METER_ENTITIES = "meter_entities"
+CONF_METER_CYCLES = "meter_cycles"
+CONF_METER_OFFSET = "meter_offset"
+CONF_PEAK_PRICE = "peak_price"
+CONF_OFFPEAK_PRICE = "offpeak_price"
+CONF_OFFPEAK_HOURS = "offpeak_hours"
 
 DEFAULT_ELECTRICITY_PRICE = 0.215
 DEFAULT_BATTERY_CAPACITY = 5.6  # kWh - S01. S02/S03 = 2.0 kWh (configurable via config_flow)
@@ -51,6 +65,23 @@ DEFAULT_USE_TRACKED_DISTANCE = False
 DEFAULT_OUTDOOR_TEMP_SOURCE = "scooter"
 DEFAULT_OUTDOOR_TEMP_ENTITY = ""
 DEFAULT_MULTI_DEVICE = False
+DEFAULT_HISTORY_BACKEND = "json"
+DEFAULT_TRACKER_MIN_DISTANCE = 10  # meters
+DEFAULT_TRACKER_MIN_INTERVAL = 10  # seconds, while riding
+DEFAULT_RECORD_GPS_TRACK = False
+# Same meters as before they were configurable
+DEFAULT_METER_SOURCES = ["energy_consumption"]
+DEFAULT_METER_ENTITIES: list = []
+DEFAULT_METER_CYCLES = ["daily", "weekly", "monthly", "yearly"]
+DEFAULT_METER_OFFSET = {"days": 0, "hours": 0, "minutes": 0, "seconds": 0}
+# No off-peak hours: the price is the tariff sensor's
+DEFAULT_PEAK_PRICE = 0.0
+DEFAULT_OFFPEAK_PRICE = 0.0
+DEFAULT_OFFPEAK_HOURS = ""
+
+# Trip history storage backends
+HISTORY_BACKEND_JSON = "json"
+HISTORY_BACKEND_SQLITE = "sqlite"
 
 # Outdoor temperature sources
 OUTDOOR_TEMP_SOURCE_SCOOTER = "scooter"
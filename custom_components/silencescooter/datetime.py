@@ -16,7 +16,7 @@ from homeassistant.const import EntityCategory
 
 from .const import DOMAIN, CONF_IMEI, CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE
 from .definitions import INPUT_DATETIMES
-from .helpers import get_device_info, insert_imei_in_entity_id
+from .helpers import async_write_state, get_device_info, insert_imei_in_entity_id
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -82,6 +82,8 @@ class ScooterDateTimeEntity(DateTimeEntity, RestoreEntity):
     async def async_added_to_hass(self):
         """Handle entity which will be added."""
         await super().async_added_to_hass()
+        # Direct write path for the automations (see helpers.set_datetime_value)
+        self.hass.data.setdefault(DOMAIN, {}).setdefault("datetimes", {})[self.entity_id] = self
 
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Attempting to restore state for %s", self.entity_id)
@@ -125,6 +127,12 @@ class ScooterDateTimeEntity(DateTimeEntity, RestoreEntity):
                 self.async_write_ha_state()
 
 
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister from the direct write path."""
+        registry = self.hass.data.get(DOMAIN, {}).get("datetimes", {})
+        if registry.get(self.entity_id) is self:
+            registry.pop(self.entity_id)
+
     @property
     def native_value(self) -> Optional[datetime]:
         """Return the value reported by the datetime."""
@@ -140,6 +148,6 @@ class ScooterDateTimeEntity(DateTimeEntity, RestoreEntity):
 
         self._value = value
         self._attr_native_value = value
-        self.async_write_ha_state()
+        async_write_state(self)
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Successfully updated %s to %s", self.entity_id, value)
\ No newline at end of file
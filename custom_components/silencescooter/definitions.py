@@ -22,7 +22,9 @@ WRITABLE_SENSORS = {
         "name": "Vitesse maximale du dernier trajet",
         "unit_of_measurement": "km/h",
         "icon": "mdi:speedometer",
-        "state_class": "measurement"
+        "state_class": "measurement",
+        # Speed statistics of the trip, set when it stops
+        "attributes": ["mean_moving_speed", "p95_speed", "speed_samples"]
     },
     "scooter_last_trip_battery_consumption": {
         "name": "Batterie consommée du dernier trajet",
@@ -161,8 +163,7 @@ TRIGGER_SENSORS = {
     "scooter_start_time_iso": {
         "name": "Heure de départ ISO",
         "triggers": [
-            {"platform": "state", "entity_id": "datetime.scooter_start_time"},
-            {"platform": "time_pattern", "minutes": "/1"}
+            {"platform": "state", "entity_id": "datetime.scooter_start_time"}
         ],
         "value_template": """
             {% if states('datetime.scooter_start_time') not in ['unknown', 'unavailable'] %}
@@ -182,7 +183,7 @@ TRIGGER_SENSORS = {
             },
             {
                 "platform": "state",
-                "entity_id": "datetime.scooter_end_time"
+                "entity_id": ["datetime.scooter_end_time", "sensor.scooter_trip_status"]
             }
         ],
         "value_template": """
@@ -221,6 +222,11 @@ TRIGGER_SENSORS = {
             {
                 "platform": "state",
                 "entity_id": "sensor.silence_scooter_last_update"
+            },
+            {
+                # Ticks only while the trip is on: catches the 5-minute timeout
+                "platform": "time_pattern",
+                "minutes": "/1"
             }
         ],
         "value_template": """
@@ -248,6 +254,14 @@ TRIGGER_SENSORS = {
             {
                 "platform": "time_pattern",
                 "minutes": "/1"
+            },
+            {
+                "platform": "state",
+                "entity_id": [
+                    "sensor.scooter_trip_status",
+                    "datetime.scooter_start_time",
+                    "datetime.scooter_end_time"
+                ]
             }
         ],
         "value_template": """
@@ -465,55 +479,13 @@ TEMPLATE_SENSORS = {
     }
 }
 
-ENERGY_COST_SENSORS = {
-    "scooter_energy_cost_daily": {
-        "name": "Coût quotidien de la recharge",
-        "unit_of_measurement": "€",
-        "state_class": "measurement",
-        "value_template": """
-            {% set consumption = states('sensor.scooter_energy_consumption_daily') | float(0) %}
-            {% set price_per_kwh = states('sensor.tarif_base_ttc') | float(0.215) %}
-            {{ (consumption * price_per_kwh) | round(2) }}
-        """
-    },
-    "scooter_energy_cost_weekly": {
-        "name": "Coût hebdo de la recharge",
-        "unit_of_measurement": "€",
-        "state_class": "measurement",
-        "value_template": """
-            {% set consumption = states('sensor.scooter_energy_consumption_weekly') | float(0) %}
-            {% set price_per_kwh = states('sensor.tarif_base_ttc') | float(0.215) %}
-            {{ (consumption * price_per_kwh) | round(2) }}
-        """
-    },
-    "scooter_energy_cost_monthly": {
-        "name": "Coût mensuel de la recharge",
-        "unit_of_measurement": "€",
-        "state_class": "measurement",
-        "value_template": """
-            {% set consumption = states('sensor.scooter_energy_consumption_monthly') | float(0) %}
-            {% set price_per_kwh = states('sensor.tarif_base_ttc') | float(0.215) %}
-            {{ (consumption * price_per_kwh) | round(2) }}
-        """
-    },
-    "scooter_energy_cost_yearly": {
-        "name": "Coût annuel de la recharge",
-        "unit_of_measurement": "€",
-        "state_class": "measurement",
-        "value_template": """
-            {% set consumption = states('sensor.scooter_energy_consumption_yearly') | float(0) %}
-            {% set price_per_kwh = states('sensor.tarif_base_ttc') | float(0.215) %}
-            {{ (consumption * price_per_kwh) | round(2) }}
-        """
-    }
-}
-
 BATTERY_HEALTH_SENSORS = {
     "scooter_battery_cell_imbalance": {
         "name": "Batterie - Déséquilibre cellules",
         "unit_of_measurement": "mV",
         "state_class": "measurement",
         "icon": "mdi:battery-alert-variant-outline",
+        "calculator": "battery_cell_imbalance",
         "value_template": """
             {% set raw = [
                 states('sensor.silence_scooter_cell1_voltage'),
@@ -549,6 +521,7 @@ BATTERY_HEALTH_SENSORS = {
         "state_class": "measurement",
         "device_class": "battery",
         "icon": "mdi:battery-charging-outline",
+        "calculator": "battery_soc_calculated",
         "value_template": """
             {% set volt = states('sensor.silence_scooter_battery_volt') | float(0) %}
             {# NMC 14S Li-ion lookup table: cell voltage (OCV) -> SOC%
@@ -587,6 +560,7 @@ BATTERY_HEALTH_SENSORS = {
         "unit_of_measurement": "%",
         "state_class": "measurement",
         "icon": "mdi:delta",
+        "calculator": "battery_soc_deviation",
         "value_template": """
             {% set displayed_st = states('sensor.scooter_battery_display') %}
             {% set calculated_st = states('sensor.scooter_battery_soc_calculated') %}
@@ -608,6 +582,7 @@ BATTERY_HEALTH_SENSORS = {
         "unit_of_measurement": "cycles",
         "state_class": "total_increasing",
         "icon": "mdi:battery-sync",
+        "calculator": "battery_charge_cycles",
         "value_template": """
             {% set charged_state = states('sensor.silence_scooter_charged_energy') %}
             {% set battery_capacity = 5.6 %}
@@ -632,6 +607,7 @@ USAGE_STATISTICS_SENSORS = {
         "unit_of_measurement": "km",
         "state_class": "measurement",
         "icon": "mdi:map-marker-distance",
+        "calculator": "distance_per_charge",
         "value_template": """
             {% set odo = states('sensor.silence_scooter_odo') | float(0) %}
             {% set charged = states('sensor.silence_scooter_charged_energy') | float(0) %}
@@ -648,6 +624,7 @@ USAGE_STATISTICS_SENSORS = {
         "unit_of_measurement": "€/km",
         "state_class": "measurement",
         "icon": "mdi:currency-eur",
+        "calculator": "cost_per_km",
         "value_template": """
             {% set odo = states('sensor.silence_scooter_odo') | float(0) %}
             {% set consumed = states('sensor.silence_scooter_discharged_energy') | float(0) %}
@@ -665,6 +642,7 @@ USAGE_STATISTICS_SENSORS = {
         "unit_of_measurement": "km",
         "state_class": "measurement",
         "icon": "mdi:map-marker-path",
+        "calculator": "average_trip_distance",
         "value_template": """
             {% set trips = state_attr('sensor.scooter_trips', 'history') %}
             {% if trips is not none and trips | length > 0 %}
@@ -677,25 +655,69 @@ USAGE_STATISTICS_SENSORS = {
     }
 }
 
-UTILITY_METERS = {
-    "scooter_energy_consumption_daily": {
-        "source": "sensor.scooter_energy_consumption",
-        "cycle": "daily",
-        "name": "Scooter Energy Consumption Daily"
+# Per-period trip totals, read from the history rollups (no template)
+TRIP_ROLLUP_SENSORS = {
+    "scooter_trips_distance_daily": {
+        "name": "Trajets - Distance du jour",
+        "period": "day",
+        "icon": "mdi:calendar-today",
+    },
+    "scooter_trips_distance_weekly": {
+        "name": "Trajets - Distance de la semaine",
+        "period": "week",
+        "icon": "mdi:calendar-week",
+    },
+    "scooter_trips_distance_monthly": {
+        "name": "Trajets - Distance du mois",
+        "period": "month",
+        "icon": "mdi:calendar-month",
+    },
+    "scooter_trips_distance_yearly": {
+        "name": "Trajets - Distance de l'année",
+        "period": "year",
+        "icon": "mdi:calendar",
     },
-    "scooter_energy_consumption_weekly": {
+}
+
+# Sources that can be metered per cycle (options flow). The meter of a
+# source over a cycle is "<meter_id>_<cycle>", e.g.
+# sensor.scooter_energy_consumption_daily
+METER_SOURCES = {
+    "energy_consumption": {
+        "meter_id": "scooter_energy_consumption",
         "source": "sensor.scooter_energy_consumption",
-        "cycle": "weekly",
-        "name": "Scooter Energy Consumption Weekly"
+        "unit_of_measurement": "kWh",
+        "device_class": "energy",
+        "icon": "mdi:counter",
+        # Priced source: its meters accumulate a cost, exposed by the
+        # "<cost_id>_<cycle>" sensors (e.g. sensor.scooter_energy_cost_daily)
+        "cost_id": "scooter_energy_cost",
     },
-    "scooter_energy_consumption_monthly": {
-        "source": "sensor.scooter_energy_consumption",
-        "cycle": "monthly",
-        "name": "Scooter Energy Consumption Monthly"
+    "distance": {
+        "meter_id": "scooter_odo_distance",
+        "source": "sensor.silence_scooter_odo",
+        "unit_of_measurement": "km",
+        "device_class": "distance",
+        "icon": "mdi:map-marker-distance",
     },
-    "scooter_energy_consumption_yearly": {
-        "source": "sensor.scooter_energy_consumption",
-        "cycle": "yearly",
-        "name": "Scooter Energy Consumption Yearly"
-    }
-}
\ No newline at end of file
+    "regenerated_energy": {
+        "meter_id": "scooter_regenerated_energy",
+        "source": "sensor.silence_scooter_regenerated_energy",
+        "unit_of_measurement": "kWh",
+        "device_class": "energy",
+        "icon": "mdi:battery-charging-high",
+    },
+    "charged_energy": {
+        "meter_id": "scooter_charged_energy",
+        "source": "sensor.silence_scooter_charged_energy",
+        "unit_of_measurement": "kWh",
+        "device_class": "energy",
+        "icon": "mdi:ev-station",
+        "cost_id": "scooter_charged_energy_cost",
+    },
+    "trips": {
+        "meter_id": "scooter_trips_count",
+        "source": "sensor.scooter_trips",
+        "icon": "mdi:scooter",
+    },
+}
@@ -0,0 +1,31 @@
+"""Diagnostics support for Silence Scooter."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_IMEI, CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE, DOMAIN
+from .history_store import history_key
+
+TO_REDACT = {CONF_IMEI}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry: configuration and pending trip timers."""
+    imei = entry.data.get(CONF_IMEI, "")
+    multi_device = entry.data.get(CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE)
+    key = history_key(imei, multi_device)
+    domain_data = hass.data.get(DOMAIN, {})
+
+    timers = domain_data.get("timers", {}).get(key)
+    session = domain_data.get("trip_sessions", {}).get(key)
+
+    return {
+        "config": async_redact_data(dict(entry.data), TO_REDACT),
+        "timers": timers.as_diagnostics() if timers is not None else None,
+        "trip": {
+            "active": session.is_active(),
+            "stopping": session.stopping,
+            "odo_tracking_fired": session.odo_tracking_fired,
+            "battery_tracking_fired": session.battery_tracking_fired,
+        } if session is not None else None,
+    }
@@ -0,0 +1,186 @@
+"""GPS track of a trip for the Silence Scooter integration.
+
+Fixes are buffered in a flat ``array('d')`` (lat, lon, lat, lon, ...), 16
+bytes per fix, instead of going through the HA recorder. At the end of the
+trip the track is simplified with Douglas-Peucker and stored in the trip
+record as an encoded polyline (the Google polyline format, 1e-5 degree
+precision), a few bytes per kept point.
+"""
+import math
+from array import array
+from typing import List, Tuple
+
+from homeassistant.core import HomeAssistant
+
+EARTH_RADIUS_M = 6371008.8
+
+# Points closer than this to the simplified line are dropped (meters)
+TRACK_TOLERANCE = 5.0
+
+# Past this many buffered fixes the buffer is simplified (see GpsTrack)
+MAX_TRACK_POINTS = 20000
+
+POLYLINE_PRECISION = 5
+
+
+def simplify(coords: array, tolerance: float = TRACK_TOLERANCE) -> List[int]:
+    """Return the indices of the points kept by Douglas-Peucker.
+
+    ``coords`` is a flat lat/lon array. Distances are computed on a local
+    equirectangular projection, accurate enough at trip scale.
+    """
+    count = len(coords) // 2
+    if count <= 2:
+        return list(range(count))
+
+    scale_y = math.radians(1) * EARTH_RADIUS_M
+    scale_x = scale_y * math.cos(math.radians(coords[0]))
+
+    def xy(index: int) -> Tuple[float, float]:
+        return coords[2 * index + 1] * scale_x, coords[2 * index] * scale_y
+
+    keep = bytearray(count)
+    keep[0] = keep[-1] = 1
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = xy(first), xy(last)
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        farthest, max_dist = 0, -1.0
+        for index in range(first + 1, last):
+            x, y = xy(index)
+            if length:
+                dist = abs(dy * x - dx * y + x2 * y1 - y2 * x1) / length
+            else:
+                dist = math.hypot(x - x1, y - y1)
+            if dist > max_dist:
+                farthest, max_dist = index, dist
+        if max_dist > tolerance:
+            keep[farthest] = 1
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [index for index in range(count) if keep[index]]
+
+
+def encode_polyline(points, precision: int = POLYLINE_PRECISION) -> str:
+    """Encode (lat, lon) points in the polyline format."""
+    factor = 10 ** precision
+    result = []
+    prev_lat = prev_lon = 0
+    for lat, lon in points:
+        lat_i, lon_i = round(lat * factor), round(lon * factor)
+        for delta in (lat_i - prev_lat, lon_i - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        prev_lat, prev_lon = lat_i, lon_i
+    return "".join(result)
+
+
+def decode_polyline(text: str, precision: int = POLYLINE_PRECISION) -> List[Tuple[float, float]]:
+    """Decode a polyline back to (lat, lon) points."""
+    factor = 10 ** precision
+    points = []
+    index = lat = lon = 0
+    while index < len(text):
+        deltas = []
+        for _ in range(2):
+            shift = value = 0
+            while True:
+                byte = ord(text[index]) - 63
+                index += 1
+                value |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / factor, lon / factor))
+    return points
+
+
+def take(coords: array, indices) -> array:
+    """Return the fixes of ``coords`` at ``indices``, as a new flat array."""
+    kept = array("d")
+    for index in indices:
+        kept.append(coords[2 * index])
+        kept.append(coords[2 * index + 1])
+    return kept
+
+
+def reduce_track(coords: array, max_points: int = MAX_TRACK_POINTS // 2) -> array:
+    """Simplify ``coords`` down to ``max_points`` fixes at most.
+
+    The tolerance is doubled until the track fits (a dense track may need a
+    coarser one). Slow on long tracks: run it in the executor.
+    """
+    tolerance = TRACK_TOLERANCE
+    kept = take(coords, simplify(coords, tolerance))
+    while len(kept) // 2 > max_points:
+        tolerance *= 2
+        kept = take(kept, simplify(kept, tolerance))
+    return kept
+
+
+def encode_track(coords: array, tolerance: float = TRACK_TOLERANCE) -> str:
+    """Return the simplified track as a polyline ("" with fewer than 2 fixes)."""
+    if len(coords) < 4:
+        return ""
+    kept = take(coords, simplify(coords, tolerance))
+    return encode_polyline(zip(kept[0::2], kept[1::2]))
+
+
+class GpsTrack:
+    """Fixes of the current trip, in a flat lat/lon array.
+
+    Simplification is pure Python (about 350 ms at the cap), so it runs in
+    the executor on a copy of the buffer while fixes keep coming in.
+    """
+
+    def __init__(self) -> None:
+        self._coords = array("d")
+        self._reducing = False
+
+    def __len__(self) -> int:
+        return len(self._coords) // 2
+
+    def clear(self) -> None:
+        self._coords = array("d")
+
+    def add(self, lat: float, lon: float) -> None:
+        """Append a fix (repeated positions are ignored)."""
+        if len(self._coords) and self._coords[-2] == lat and self._coords[-1] == lon:
+            return
+        self._coords.append(lat)
+        self._coords.append(lon)
+
+    @property
+    def needs_reduce(self) -> bool:
+        """True past MAX_TRACK_POINTS fixes, unless a reduction is running."""
+        return len(self) > MAX_TRACK_POINTS and not self._reducing
+
+    async def async_reduce(self, hass: HomeAssistant) -> None:
+        """Simplify the buffer down to half the cap, in the executor.
+
+        The next reduction is then at least MAX_TRACK_POINTS / 2 fixes away.
+        Fixes added meanwhile are kept; a track cleared meanwhile is left alone.
+        """
+        coords = self._coords
+        snapshot = array("d", coords)
+        self._reducing = True
+        try:
+            kept = await hass.async_add_executor_job(reduce_track, snapshot)
+        finally:
+            self._reducing = False
+        if self._coords is not coords:
+            return
+        kept.extend(coords[len(snapshot):])
+        self._coords = kept
+
+    async def async_encode(self, hass: HomeAssistant, tolerance: float = TRACK_TOLERANCE) -> str:
+        """Encode a copy of the track in the executor (see encode_track)."""
+        return await hass.async_add_executor_job(encode_track, array("d", self._coords), tolerance)
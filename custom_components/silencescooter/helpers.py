@@ -1,14 +1,16 @@
 """Helper functions for the Silence Scooter integration."""
 import logging
-import os
-import subprocess
-from pathlib import Path
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.util import dt as dt_util
 from homeassistant.helpers.entity import DeviceInfo
 
-from .const import DOMAIN, HISTORY_FILE, HISTORY_SCRIPT, LOG_FILE, MANUFACTURER
+from .const import DOMAIN, LOG_FILE, MANUFACTURER
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -110,6 +112,30 @@ def is_date_valid(date_str: str) -> bool:
     return not (date_str.startswith("1969") or date_str.startswith("1970"))
 
 
+@lru_cache(maxsize=64)
+def _parse_datetime_cached(dt_str: str) -> Optional[datetime]:
+    try:
+        return dt_util.parse_datetime(dt_str)
+    except ValueError:
+        return None
+
+
+def parse_state_datetime(dt_str: str) -> Optional[datetime]:
+    """Parse a datetime state string (naive values are local time).
+
+    The same few strings (trip start/end, last update) are read on many
+    events: each distinct string is parsed once and then served from a
+    small cache. Time zone normalization is applied after the cache, so a
+    change of the configured time zone is honoured.
+    """
+    if not dt_str or dt_str in ("unknown", "unavailable"):
+        return None
+    dt = _parse_datetime_cached(dt_str)
+    if dt is None:
+        return None
+    return dt_util.as_local(dt) if dt.tzinfo is None else dt
+
+
 def get_valid_datetime(dt_str: str, default=None):
     """Parse une date et retourne None si elle est invalide (1969/1970).
 
@@ -122,15 +148,102 @@ def get_valid_datetime(dt_str: str, default=None):
     """
     if not is_date_valid(dt_str):
         return default
-    try:
-        dt = dt_util.parse_datetime(dt_str)
-        if dt and dt.year > 2000:
-            return dt_util.as_local(dt) if dt.tzinfo is None else dt
-    except Exception:
-        pass
+    dt = parse_state_datetime(dt_str)
+    if dt and dt.year > 2000:
+        return dt
     return default
 
 
+class _WriteBatch:
+    """Entities whose state write waits for the end of an entity_write_batch."""
+
+    def __init__(self) -> None:
+        self.entities: dict = {}
+        self.closed = False
+
+
+_WRITE_BATCH: ContextVar[Optional[_WriteBatch]] = ContextVar("silencescooter_write_batch", default=None)
+
+
+@asynccontextmanager
+async def entity_write_batch():
+    """Apply entity values at once, but write their states together on exit.
+
+    Inside the block, the setters of the integration's own entities (numbers,
+    datetimes, writable sensors) update their value immediately and defer
+    ``async_write_ha_state``; each changed entity is written once when the
+    block exits, even on error. A nested block joins the outer one.
+    """
+    if _WRITE_BATCH.get() is not None:
+        yield
+        return
+    batch = _WriteBatch()
+    token = _WRITE_BATCH.set(batch)
+    try:
+        yield
+    finally:
+        _WRITE_BATCH.reset(token)
+        batch.closed = True
+        for entity in batch.entities.values():
+            entity.async_write_ha_state()
+
+
+@callback
+def async_write_state(entity) -> None:
+    """Write the state of an entity, or defer it to the current write batch."""
+    batch = _WRITE_BATCH.get()
+    if batch is None or batch.closed:
+        # Tasks created inside a batch inherit it, and may outlive it
+        entity.async_write_ha_state()
+    else:
+        batch.entities[entity.entity_id] = entity
+
+
+async def set_number_value(hass: HomeAssistant, entity_id: str, value: float) -> None:
+    """Set a number entity of this integration.
+
+    Registered entities (hass.data[DOMAIN]["numbers"]) are written directly,
+    with the same range check as the number.set_value service; others go
+    through the service.
+    """
+    number = hass.data.get(DOMAIN, {}).get("numbers", {}).get(entity_id)
+    if number is None:
+        await hass.services.async_call(
+            "number", "set_value", {"entity_id": entity_id, "value": value}, blocking=True
+        )
+        return
+    value = float(value)
+    if value < number.min_value or value > number.max_value:
+        raise ValueError(
+            f"Value {value} for {entity_id} is outside valid range "
+            f"{number.min_value} - {number.max_value}"
+        )
+    await number.async_set_native_value(value)
+
+
+async def set_datetime_value(hass: HomeAssistant, entity_id: str, value) -> None:
+    """Set a datetime entity of this integration from a datetime or a string.
+
+    Registered entities (hass.data[DOMAIN]["datetimes"]) are written directly;
+    others go through the datetime.set_value service.
+    """
+    entity = hass.data.get(DOMAIN, {}).get("datetimes", {}).get(entity_id)
+    if entity is None:
+        await hass.services.async_call(
+            "datetime",
+            "set_value",
+            {"entity_id": entity_id, "datetime": value.isoformat() if isinstance(value, datetime) else value},
+            blocking=True,
+        )
+        return
+    if not isinstance(value, datetime):
+        parsed = dt_util.parse_datetime(str(value))
+        if parsed is None:
+            raise ValueError(f"Invalid datetime for {entity_id}: {value}")
+        value = parsed
+    await entity.async_set_value(value)
+
+
 async def log_event(hass: HomeAssistant, message: str):
     """Log a message to silence_logs.log."""
     try:
@@ -157,66 +270,3 @@ async def log_event(hass: HomeAssistant, message: str):
 
     except Exception as e:
         _LOGGER.error("Error in log_event helper: %s", e)
-
-
-async def update_history(hass: HomeAssistant, **kwargs):
-    """Update trip history."""
-    try:
-        avg_speed = kwargs.get("avg_speed", 0)
-        distance = kwargs.get("distance", 0)
-        duration = kwargs.get("duration", 0)
-        start_time = kwargs.get("start_time", "")
-        end_time = kwargs.get("end_time", "")
-        max_speed = kwargs.get("max_speed", 0)
-        battery = kwargs.get("battery", 0)
-        outdoor_temp = kwargs.get("outdoor_temp", 0)
-
-        _LOGGER.info("update_history called with: avg_speed=%s, distance=%s, duration=%s",
-                     avg_speed, distance, duration)
-
-        if not HISTORY_SCRIPT.exists():
-            _LOGGER.error("History script not found at %s", HISTORY_SCRIPT)
-            return False
-
-        def _sanitize_timestamp(value: str) -> str:
-            """Only allow safe characters for timestamp parameters."""
-            if not value:
-                return ""
-            return ''.join(c for c in str(value) if c.isalnum() or c in '-:T+. ')
-
-        cmd = [
-            "bash",
-            str(HISTORY_SCRIPT),
-            str(float(avg_speed)),
-            str(float(distance)),
-            str(float(duration)),
-            _sanitize_timestamp(start_time),
-            _sanitize_timestamp(end_time),
-            str(float(max_speed)),
-            str(float(battery)),
-            str(float(outdoor_temp))
-        ]
-
-        _LOGGER.debug("Executing command: %s", cmd)
-
-        # Pass HISTORY_FILE path to the bash script via environment variable
-        # so the script writes to the persistent location (outside the integration
-        # folder) regardless of where it's installed.
-        script_env = os.environ.copy()
-        script_env["JSON_FILE"] = str(HISTORY_FILE)
-
-        def run_script():
-            return subprocess.run(cmd, capture_output=True, text=True, timeout=30, env=script_env)
-
-        process = await hass.async_add_executor_job(run_script)
-
-        if process.returncode != 0:
-            _LOGGER.error("Error updating history: %s", process.stderr)
-            return False
-
-        _LOGGER.info("History updated successfully")
-        return True
-
-    except Exception as e:
-        _LOGGER.error("Failed to update history: %s", e)
-        return False
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""Per-period trip statistics for the Silence Scooter integration.
+
+Totals per day, ISO week, month and year are updated incrementally each time
+a trip is recorded and persisted next to the history file (``rollups.json`` /
+``rollups_<imei>.json``) with the history compaction, so reading a period
+statistic never scans the history. The file is rebuilt from the history only
+when it is missing or no longer matches it (trip count differs, history
+edited).
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from homeassistant.util import dt as dt_util
+
+from .json_io import write_json_atomic
+
+_LOGGER = logging.getLogger(__name__)
+
+ROLLUPS_VERSION = 1
+
+PERIOD_DAY = "day"
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+PERIOD_YEAR = "year"
+PERIODS = (PERIOD_DAY, PERIOD_WEEK, PERIOD_MONTH, PERIOD_YEAR)
+
+
+def rollups_path_for(history_path: Path) -> Path:
+    """Return the rollups file that goes with a history file."""
+    return history_path.with_name(history_path.name.replace("history", "rollups", 1))
+
+
+def period_keys(moment: datetime) -> dict:
+    """Return the bucket key of every period containing ``moment`` (local time)."""
+    moment = dt_util.as_local(moment)
+    iso = moment.isocalendar()
+    return {
+        PERIOD_DAY: moment.strftime("%Y-%m-%d"),
+        PERIOD_WEEK: f"{iso[0]}-W{iso[1]:02d}",
+        PERIOD_MONTH: moment.strftime("%Y-%m"),
+        PERIOD_YEAR: moment.strftime("%Y"),
+    }
+
+
+def period_start(period: str, moment: datetime) -> datetime:
+    """Return the local start of the period containing ``moment``."""
+    day = dt_util.as_local(moment).date()
+    if period == PERIOD_WEEK:
+        day -= timedelta(days=day.weekday())
+    elif period == PERIOD_MONTH:
+        day = day.replace(day=1)
+    elif period == PERIOD_YEAR:
+        day = day.replace(month=1, day=1)
+    return dt_util.start_of_local_day(day)
+
+
+def empty_bucket() -> dict:
+    return {
+        "count": 0,
+        "distance": 0.0,
+        "duration": 0.0,
+        "battery": 0.0,
+        "max_speed": 0.0,
+        "efficiency_sum": 0.0,
+        "efficiency_count": 0,
+    }
+
+
+def _number(record: dict, field: str) -> float:
+    try:
+        return float(record.get(field, 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TripRollups:
+    """Running totals per period, keyed like ``{"day": {"2025-06-01": bucket}}``."""
+
+    def __init__(self, trips: int = 0, periods: Optional[dict] = None) -> None:
+        self.trips = trips
+        self.periods = periods or {period: {} for period in PERIODS}
+
+    @classmethod
+    def from_trips(cls, trips) -> "TripRollups":
+        rollups = cls()
+        for trip in trips:
+            rollups.add(trip)
+        return rollups
+
+    def add(self, record: dict) -> None:
+        """Account a trip in the buckets of the periods it started in."""
+        self.trips += 1
+        start = dt_util.parse_datetime(record.get("start_time") or "")
+        if start is None:
+            # Counted in ``trips`` so the rollups stay in step with the history
+            return
+        distance = _number(record, "distance")
+        for period, key in period_keys(start).items():
+            bucket = self.periods[period].setdefault(key, empty_bucket())
+            bucket["count"] += 1
+            bucket["distance"] += distance
+            bucket["duration"] += _number(record, "duration")
+            bucket["battery"] += _number(record, "battery")
+            bucket["max_speed"] = max(bucket["max_speed"], _number(record, "max_speed"))
+            if distance > 0:
+                bucket["efficiency_sum"] += _number(record, "efficiency_wh_km")
+                bucket["efficiency_count"] += 1
+
+    def get(self, period: str, key: str) -> dict:
+        """Return the statistics of one bucket (zeros if there was no trip)."""
+        bucket = self.periods[period].get(key) or empty_bucket()
+        efficiency = (
+            bucket["efficiency_sum"] / bucket["efficiency_count"]
+            if bucket["efficiency_count"] else None
+        )
+        return {
+            "trips": bucket["count"],
+            "distance": round(bucket["distance"], 2),
+            "duration": round(bucket["duration"], 2),
+            "battery": round(bucket["battery"], 2),
+            "max_speed": round(bucket["max_speed"], 2),
+            "mean_efficiency": round(efficiency, 1) if efficiency is not None else None,
+        }
+
+    def as_dict(self) -> dict:
+        return {"version": ROLLUPS_VERSION, "trips": self.trips, "periods": self.periods}
+
+
+def load_rollups(path: Path) -> Optional[TripRollups]:
+    """Read a rollups file, or None if it is missing, corrupt or outdated."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            content = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        _LOGGER.warning("Ignoring unreadable rollups file %s: %s", path, e)
+        return None
+    if not isinstance(content, dict) or content.get("version") != ROLLUPS_VERSION:
+        return None
+    periods = content.get("periods")
+    if not isinstance(periods, dict) or set(periods) != set(PERIODS):
+        return None
+    return TripRollups(int(content.get("trips", 0)), periods)
+
+
+def save_rollups(path: Path, rollups: TripRollups) -> None:
+    write_json_atomic(path, rollups.as_dict())
@@ -0,0 +1,310 @@
+"""SQLite trip history backend for the Silence Scooter integration.
+
+Trips are stored as typed rows (REAL columns for the numeric fields, an index
+on the start timestamp), so counting, paging and aggregating years of trips
+is done by SQLite without parsing the whole history in Python.
+
+The JSON history stays the interchange format: history.json is re-exported
+from the database on compaction, and imported back whenever it changed since
+that export (first use of the backend, switch back from the JSON backend,
+manual edit). Both directions are lossless: any value whose
+text would not be reproduced by the numeric column (e.g. "12" vs "12.0"),
+missing fields and unknown keys are kept verbatim in the ``extra`` column.
+"""
+import json
+import logging
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+
+from .history_store import (
+    AGGREGATE_FIELDS,
+    TRIP_FIELDS,
+    TripHistoryStore,
+    to_timestamp,
+)
+from .json_io import write_json_atomic
+
+_LOGGER = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+TEXT_FIELDS = ("start_time", "end_time")
+NUMERIC_FIELDS = tuple(field for field in TRIP_FIELDS if field not in TEXT_FIELDS)
+COLUMNS = TEXT_FIELDS + NUMERIC_FIELDS + ("imei", "extra")
+
+# Key of the ``extra`` object listing the fields absent from the original record
+MISSING_KEY = "_missing"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS trips (
+    id INTEGER PRIMARY KEY,
+    start_time TEXT NOT NULL DEFAULT '',
+    end_time TEXT NOT NULL DEFAULT '',
+    start_ts REAL,
+    {", ".join(f"{field} REAL" for field in NUMERIC_FIELDS)},
+    imei TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS trips_start_ts ON trips (start_ts);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+
+def format_number(field: str, value: float) -> str:
+    """Format a numeric column the way build_trip_record does."""
+    if field == "efficiency_wh_km":
+        return f"{value:.1f}"
+    return str(value)
+
+
+def encode_record(record: dict) -> tuple:
+    """Return the row values (in COLUMNS order, plus start_ts) of a trip record."""
+    extra = {}
+    missing = []
+    row = {}
+
+    for field in TEXT_FIELDS:
+        raw = record.get(field)
+        if field not in record:
+            missing.append(field)
+        elif not isinstance(raw, str):
+            extra[field] = raw
+        row[field] = raw if isinstance(raw, str) else ""
+
+    for field in NUMERIC_FIELDS:
+        if field not in record:
+            missing.append(field)
+            row[field] = None
+            continue
+        raw = record[field]
+        try:
+            number = float(raw)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or format_number(field, number) != raw:
+            extra[field] = raw
+        row[field] = number
+
+    imei = record.get("imei")
+    if "imei" in record and not isinstance(imei, str):
+        extra["imei"] = imei
+        imei = None
+    row["imei"] = imei
+
+    for key, value in record.items():
+        if key not in TRIP_FIELDS and key != "imei":
+            extra[key] = value
+    if missing:
+        extra[MISSING_KEY] = missing
+    row["extra"] = json.dumps(extra, ensure_ascii=False) if extra else None
+
+    start_ts = to_timestamp(row["start_time"])
+    return tuple(row[column] for column in COLUMNS) + (None if start_ts == float("-inf") else start_ts,)
+
+
+def decode_row(row: tuple) -> dict:
+    """Rebuild the original trip record from a row in COLUMNS order."""
+    values = dict(zip(COLUMNS, row))
+    extra = json.loads(values["extra"]) if values["extra"] else {}
+    missing = set(extra.pop(MISSING_KEY, ()))
+
+    record = {}
+    for field in TRIP_FIELDS:
+        if field in missing:
+            continue
+        if field in extra:
+            record[field] = extra.pop(field)
+        elif field in TEXT_FIELDS:
+            record[field] = values[field]
+        elif values[field] is not None:
+            record[field] = format_number(field, values[field])
+    if values["imei"] is not None:
+        record["imei"] = values["imei"]
+    record.update(extra)
+    return record
+
+
+class SqliteTripHistoryStore(TripHistoryStore):
+    """Trip history kept in a SQLite database, exported to JSON on compaction."""
+
+    def __init__(self, hass: HomeAssistant, path: Path, signal: str) -> None:
+        super().__init__(hass, path, signal)
+        self._db_path = path.with_suffix(".db")
+        self._ready = False
+
+    @property
+    def path(self) -> Path:
+        """Return the database path."""
+        return self._db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._db_path)
+        if not self._ready:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.executescript(SCHEMA)
+            self._import_json(conn)
+            self._ready = True
+        return conn
+
+    def _json_signature(self):
+        try:
+            stat = self._path.stat()
+            return f"{stat.st_mtime_ns}:{stat.st_size}"
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _get_meta(conn: sqlite3.Connection, key: str):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _import_json(self, conn: sqlite3.Connection) -> None:
+        """Replace the database content with history.json if it changed since the last export."""
+        json_store = TripHistoryStore(self._hass, self._path)
+        # Fold the journal first so history.json alone is the full history
+        json_store._compact_sync()
+        signature = self._json_signature()
+        if signature is None or signature == self._get_meta(conn, "json_signature"):
+            return
+        trips = json_store._ensure_loaded()
+        with conn:
+            conn.execute("DELETE FROM trips")
+            self._insert(conn, trips)
+            self._set_meta(conn, "json_signature", signature)
+            self._set_meta(conn, "dirty", "0")
+        # Our own write: not an external change for _invalidate_if_changed
+        self._signature = self._disk_signature()
+        self._rollups_stale = True
+        _LOGGER.info("Imported %d trips from %s into %s", len(trips), self._path, self._db_path)
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, trips) -> None:
+        placeholders = ", ".join("?" * (len(COLUMNS) + 1))
+        conn.executemany(
+            f"INSERT INTO trips ({', '.join(COLUMNS)}, start_ts) VALUES ({placeholders})",
+            (encode_record(trip) for trip in trips),
+        )
+
+    def _select(self, conn: sqlite3.Connection, clause: str = "", params=()) -> list:
+        cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM trips {clause}", params)
+        return [decode_row(row) for row in cursor]
+
+    def _disk_signature(self) -> tuple:
+        try:
+            stat = self._db_path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+
+    def _invalidate_if_changed(self) -> bool:
+        """Report (once) a database modified outside the store."""
+        signature = self._disk_signature()
+        changed = self._signature is not None and signature != self._signature
+        self._signature = signature
+        if changed:
+            _LOGGER.info("History database %s changed on disk", self._db_path)
+            self._rollups_stale = True
+        return changed
+
+    def _ensure_loaded(self) -> list:
+        with closing(self._connect()) as conn:
+            return self._select(conn, "ORDER BY id")
+
+    def _count_sync(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM trips").fetchone()[0]
+
+    def _exists_sync(self) -> bool:
+        return self._db_path.exists() or super()._exists_sync()
+
+    def _add_trip_sync(self, record: dict) -> None:
+        with closing(self._connect()) as conn, conn:
+            self._insert(conn, (record,))
+            self._set_meta(conn, "dirty", "1")
+        self._signature = self._disk_signature()
+
+    def _replace_all_sync(self, trips: list) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM trips")
+            self._insert(conn, trips)
+            self._set_meta(conn, "dirty", "1")
+        self._signature = self._disk_signature()
+
+    def _compact_sync(self) -> bool:
+        """Export the database to history.json if it changed since the last export."""
+        with closing(self._connect()) as conn:
+            if self._get_meta(conn, "dirty") != "1" and self._path.exists():
+                return False
+            write_json_atomic(self._path, self._select(conn, "ORDER BY id DESC"))
+            # A crash before this commit only causes a redundant re-import
+            with conn:
+                self._set_meta(conn, "json_signature", self._json_signature())
+                self._set_meta(conn, "dirty", "0")
+        self._signature = self._disk_signature()
+        return True
+
+    def _summary_sync(self, head_size: int) -> tuple:
+        self._invalidate_if_changed()
+        with closing(self._connect()) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM trips").fetchone()[0]
+            head = self._select(conn, "ORDER BY id DESC LIMIT ?", (head_size,))
+        return count, head
+
+    def _query_sync(self, start, end, limit: int, offset: int, aggregates) -> dict:
+        self._invalidate_if_changed()
+        where, params = [], []
+        if start is not None:
+            where.append("start_ts >= ?")
+            params.append(to_timestamp(start))
+        if end is not None:
+            where.append("start_ts < ?")
+            params.append(to_timestamp(end))
+
+        def clause(*conditions):
+            conditions = where + list(conditions)
+            return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with closing(self._connect()) as conn:
+            result = {
+                "count": conn.execute(f"SELECT COUNT(*) FROM trips {clause()}", params).fetchone()[0],
+                # Same order as the JSON index: newest start first, undated trips last
+                "trips": self._select(
+                    conn, f"{clause()} ORDER BY start_ts DESC, id DESC LIMIT ? OFFSET ?",
+                    (*params, limit, offset),
+                ),
+            }
+            if aggregates:
+                stats = {}
+                for name in aggregates:
+                    column = AGGREGATE_FIELDS[name]
+                    conditions = [f"{column} IS NOT NULL"]
+                    if name == "efficiency":
+                        # Placeholder "0" of trips without distance
+                        conditions.append("distance > 0")
+                    count, total, low, high = conn.execute(
+                        f"SELECT COUNT({column}), TOTAL({column}), MIN({column}), MAX({column}) "
+                        f"FROM trips {clause(*conditions)}",
+                        params,
+                    ).fetchone()
+                    if count:
+                        stats[name] = {
+                            "sum": round(total, 2),
+                            "avg": round(total / count, 2),
+                            "min": low,
+                            "max": high,
+                            "count": count,
+                        }
+                    else:
+                        stats[name] = {"sum": 0, "avg": None, "min": None, "max": None, "count": 0}
+                result["stats"] = stats
+        return result
@@ -0,0 +1,687 @@
+"""Trip history store for the Silence Scooter integration.
+
+Replaces the former ``scripts/history.sh`` (bash + jq + bc) pipeline with an
+in-process store. The efficiency is computed in Python, trips are appended to
+a journal in constant time and history.json is rewritten atomically in the
+background, so a trip end no longer forks three processes nor depends on the
+current working directory.
+
+history.json keeps its format: a JSON array, newest trip first, every field
+stored as a string (see docs/HISTORY.md). In multi-device mode each scooter
+gets its own ``history_<imei>.json`` so trips are never interleaved.
+"""
+import asyncio
+import bisect
+import json
+import logging
+import math
+import os
+import shutil
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .json_io import append_json_line, read_json_lines, write_json_atomic
+from .history_rollups import (
+    TripRollups,
+    load_rollups,
+    period_keys,
+    rollups_path_for,
+    save_rollups,
+)
+from .const import (
+    DOMAIN,
+    CONF_IMEI,
+    CONF_MULTI_DEVICE,
+    CONF_HISTORY_BACKEND,
+    DEFAULT_HISTORY_BACKEND,
+    HISTORY_BACKEND_SQLITE,
+    PERSISTENT_DATA_PATH,
+    HISTORY_FILE,
+    DEFAULT_BATTERY_CAPACITY,
+    SIGNAL_HISTORY_UPDATED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Field order of a trip record, as written by the legacy history.sh script
+TRIP_FIELDS = (
+    "start_time",
+    "end_time",
+    "duration",
+    "distance",
+    "avg_speed",
+    "max_speed",
+    "battery",
+    "outdoor_temp",
+    "efficiency_wh_km",
+)
+
+# Seconds of quiet after the last recorded trip before the journal is
+# folded back into history.json
+COMPACTION_DELAY = 300
+
+# Number of most recent trips exposed in the sensor "history" attribute
+HISTORY_HEAD_SIZE = 10
+
+# Optional encoded GPS track of a trip; kept out of the sensor attribute
+TRACK_FIELD = "track"
+
+# Numeric fields that query_trips can aggregate (service name -> record field)
+AGGREGATE_FIELDS = {
+    "distance": "distance",
+    "duration": "duration",
+    "battery": "battery",
+    "efficiency": "efficiency_wh_km",
+}
+
+
+def sanitize_timestamp(value) -> str:
+    """Only allow safe characters for timestamp values."""
+    if not value:
+        return ""
+    return "".join(c for c in str(value) if c.isalnum() or c in "-:T+. ")
+
+
+def compute_efficiency(battery: float, distance: float, capacity_kwh: float = DEFAULT_BATTERY_CAPACITY) -> str:
+    """Return the trip efficiency in Wh/km, formatted like history.sh did.
+
+    Efficiency = (Battery% / 100 * capacity Wh) / Distance. The bash script
+    truncated (bc ``scale=1``) rather than rounded, which is kept here so new
+    records stay comparable with the existing history.
+    """
+    if distance <= 0:
+        return "0"
+    value = (battery / 100 * capacity_kwh * 1000) / distance
+    return f"{math.trunc(value * 10) / 10:.1f}"
+
+
+def build_trip_record(
+    avg_speed: float = 0,
+    distance: float = 0,
+    duration: float = 0,
+    start_time: str = "",
+    end_time: str = "",
+    max_speed: float = 0,
+    battery: float = 0,
+    outdoor_temp: float = 0,
+    imei: str = "",
+    track: str = "",
+) -> dict:
+    """Build a trip record with the legacy history.json schema.
+
+    In multi-device mode the scooter IMEI is added as an extra field, and
+    the encoded GPS track when one was recorded.
+    """
+    distance = float(distance)
+    battery = float(battery)
+    record = {
+        "start_time": sanitize_timestamp(start_time),
+        "end_time": sanitize_timestamp(end_time),
+        "duration": str(float(duration)),
+        "distance": str(distance),
+        "avg_speed": str(float(avg_speed)),
+        "max_speed": str(float(max_speed)),
+        "battery": str(battery),
+        "outdoor_temp": str(float(outdoor_temp)),
+        "efficiency_wh_km": compute_efficiency(battery, distance),
+    }
+    if imei:
+        record["imei"] = str(imei)
+    if track:
+        record[TRACK_FIELD] = track
+    return record
+
+
+def journal_path_for(path: Path) -> Path:
+    """Return the append-only journal file that sits next to a history file."""
+    return path.with_suffix(".jsonl")
+
+
+def history_key(imei: str = "", multi_device: bool = False) -> str:
+    """Return the key identifying a scooter's history ("single" in legacy mode)."""
+    return imei if multi_device and imei else "single"
+
+
+def history_path_for(imei: str = "", multi_device: bool = False) -> Path:
+    """Return the history file of a scooter.
+
+    Single-device setups keep the historical ``history.json``; in multi-device
+    mode every IMEI has its own file.
+    """
+    if multi_device and imei:
+        return PERSISTENT_DATA_PATH / f"history_{imei}.json"
+    return HISTORY_FILE
+
+
+def history_signal(imei: str = "", multi_device: bool = False) -> str:
+    """Return the dispatcher signal sent when a scooter's history changed."""
+    return SIGNAL_HISTORY_UPDATED.format(history_key(imei, multi_device))
+
+
+def trip_key(record: dict) -> tuple:
+    """Return the identity of a trip, used to de-duplicate journal replays."""
+    return (record.get("start_time"), record.get("end_time"))
+
+
+def to_timestamp(value) -> float:
+    """Return a POSIX timestamp for a datetime or ISO string.
+
+    Naive values are taken in the Home Assistant time zone. Unparseable
+    values sort before everything else.
+    """
+    if isinstance(value, str):
+        value = dt_util.parse_datetime(value) if value else None
+    if value is None:
+        return float("-inf")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return value.timestamp()
+
+
+def aggregate_trips(trips: list, fields) -> dict:
+    """Return sum/avg/min/max of the requested AGGREGATE_FIELDS over trips.
+
+    Trips without a distance are left out of the efficiency statistics since
+    their efficiency is a placeholder "0".
+    """
+    stats = {}
+    for name in fields:
+        field = AGGREGATE_FIELDS[name]
+        values = []
+        for trip in trips:
+            try:
+                value = float(trip.get(field, ""))
+                if name == "efficiency" and float(trip.get("distance", 0)) <= 0:
+                    continue
+            except (TypeError, ValueError):
+                continue
+            values.append(value)
+        if values:
+            total = math.fsum(values)
+            stats[name] = {
+                "sum": round(total, 2),
+                "avg": round(total / len(values), 2),
+                "min": min(values),
+                "max": max(values),
+                "count": len(values),
+            }
+        else:
+            stats[name] = {"sum": 0, "avg": None, "min": None, "max": None, "count": 0}
+    return stats
+
+
+class TripHistoryStore:
+    """In-process trip history: compacted history.json plus an append-only journal.
+
+    New trips are appended as one JSON line to ``history.jsonl`` and fsynced,
+    which costs the same whatever the size of the history. A debounced
+    background compaction folds the journal into ``history.json`` (newest
+    first, as legacy consumers expect) and then truncates the journal. If the
+    process dies between those two steps, the journal entries already present
+    in history.json are skipped on the next load.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: Path = HISTORY_FILE,
+        signal: str = SIGNAL_HISTORY_UPDATED.format("single"),
+    ) -> None:
+        self._hass = hass
+        self._path = path
+        self._signal = signal
+        self._journal_path = journal_path_for(path)
+        # Oldest first, so a new trip is an O(1) append
+        self._trips: Optional[list] = None
+        # (mtime, size) of history.json and the journal when _trips was last
+        # known to match the disk; any other value means an external edit
+        self._signature: Optional[tuple] = None
+        self._lock = asyncio.Lock()
+        self._cancel_compaction = None
+        # Time index over _trips: start timestamps kept sorted, with the
+        # matching positions in _trips. Rebuilt when _trips is replaced,
+        # extended in place when trips are appended.
+        self._index_source: Optional[list] = None
+        self._index_keys: list = []
+        self._index_pos: list = []
+        # Per-period totals, loaded from the rollups file on first use
+        self._rollups_path = rollups_path_for(path)
+        self._rollups: Optional[TripRollups] = None
+        self._rollups_stale = False
+        # Trips added to the totals since they were last written: the file
+        # holds every bucket, so it is saved with the compaction, not per trip
+        self._rollups_dirty = False
+
+    @property
+    def path(self) -> Path:
+        """Return the history file path."""
+        return self._path
+
+    @property
+    def journal_path(self) -> Path:
+        """Return the journal file path."""
+        return self._journal_path
+
+    @property
+    def signal(self) -> str:
+        """Return the dispatcher signal sent when this history changed."""
+        return self._signal
+
+    def _read_file(self) -> list:
+        """Read and parse the history file, tolerating a missing/corrupt file."""
+        try:
+            if self._path.exists():
+                with open(self._path, "r", encoding="utf-8") as file:
+                    content = json.load(file)
+                if isinstance(content, list):
+                    return content
+                _LOGGER.warning("History file %s is not a JSON array, starting a new one", self._path)
+        except (OSError, ValueError) as e:
+            _LOGGER.error("Error reading history file %s: %s", self._path, e)
+        return []
+
+    def _read_journal(self) -> list:
+        """Read journal records in append order, skipping a torn last line."""
+        return read_json_lines(self._journal_path)
+
+    def _disk_signature(self) -> tuple:
+        signature = []
+        for path in (self._path, self._journal_path):
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _invalidate_if_changed(self) -> bool:
+        """Drop the cache if the files were modified behind our back."""
+        if self._trips is None or self._disk_signature() == self._signature:
+            return False
+        _LOGGER.info("History files changed on disk, reloading %s", self._path)
+        self._trips = None
+        self._rollups_stale = True
+        return True
+
+    def _ensure_loaded(self) -> list:
+        if self._trips is None:
+            self._signature = self._disk_signature()
+            trips = list(reversed(self._read_file()))
+            journal = self._read_journal()
+            if journal:
+                # Only the tail of the compacted file can overlap the journal
+                # (interrupted compaction), so that is all we compare against.
+                already_compacted = {trip_key(t) for t in trips[-len(journal):]}
+                trips.extend(r for r in journal if trip_key(r) not in already_compacted)
+            self._trips = trips
+        return self._trips
+
+    def _append_journal(self, record: dict) -> None:
+        append_json_line(self._journal_path, record)
+
+    def _add_trip_sync(self, record: dict) -> None:
+        in_sync = self._trips is not None and self._disk_signature() == self._signature
+        self._append_journal(record)
+        if in_sync:
+            self._trips.append(record)
+            self._signature = self._disk_signature()
+        else:
+            self._trips = None
+
+    def _compact_sync(self) -> bool:
+        """Fold the journal into history.json. Returns True if anything was written."""
+        if not self._journal_path.exists() or self._journal_path.stat().st_size == 0:
+            return False
+        self._invalidate_if_changed()
+        trips = self._ensure_loaded()
+        write_json_atomic(self._path, list(reversed(trips)))
+        with open(self._journal_path, "w", encoding="utf-8") as file:
+            file.flush()
+            os.fsync(file.fileno())
+        self._signature = self._disk_signature()
+        return True
+
+    def _ensure_index(self) -> list:
+        trips = self._ensure_loaded()
+        if self._index_source is not trips:
+            self._index_source = trips
+            self._index_keys = []
+            self._index_pos = []
+        for pos in range(len(self._index_pos), len(trips)):
+            key = to_timestamp(trips[pos].get("start_time"))
+            # Trips usually arrive in order, making this an append
+            i = bisect.bisect_right(self._index_keys, key)
+            self._index_keys.insert(i, key)
+            self._index_pos.insert(i, pos)
+        return trips
+
+    def _query_sync(self, start, end, limit: int, offset: int, aggregates) -> dict:
+        self._invalidate_if_changed()
+        trips = self._ensure_index()
+        lo = 0 if start is None else bisect.bisect_left(self._index_keys, to_timestamp(start))
+        hi = len(self._index_keys) if end is None else bisect.bisect_left(self._index_keys, to_timestamp(end))
+        # Newest first, like history.json
+        positions = self._index_pos[lo:hi][::-1]
+        result = {
+            "count": len(positions),
+            "trips": [dict(trips[pos]) for pos in positions[offset:offset + limit]],
+        }
+        if aggregates:
+            result["stats"] = aggregate_trips([trips[pos] for pos in positions], aggregates)
+        return result
+
+    def _count_sync(self) -> int:
+        return len(self._ensure_loaded())
+
+    def _ensure_rollups(self) -> TripRollups:
+        """Return the per-period totals, rebuilding them if they don't match the history."""
+        self._invalidate_if_changed()
+        if self._rollups is not None and not self._rollups_stale:
+            return self._rollups
+        # Counting may itself flag the totals as stale (SQLite re-import)
+        count = self._count_sync()
+        rollups = None if self._rollups_stale else load_rollups(self._rollups_path)
+        if rollups is None or rollups.trips != count:
+            rollups = TripRollups.from_trips(self._ensure_loaded())
+            _LOGGER.info("Rebuilt trip statistics %s from %d trips", self._rollups_path, rollups.trips)
+            self._save_rollups(rollups)
+            self._rollups_dirty = False
+        self._rollups = rollups
+        self._rollups_stale = False
+        return rollups
+
+    def _save_rollups(self, rollups: TripRollups) -> None:
+        try:
+            save_rollups(self._rollups_path, rollups)
+        except OSError as e:
+            # The trip count check rebuilds them on the next load
+            _LOGGER.error("Error writing trip statistics %s: %s", self._rollups_path, e)
+
+    def _drop_rollups_sync(self) -> None:
+        self._rollups = None
+        self._rollups_dirty = False
+        self._rollups_path.unlink(missing_ok=True)
+
+    def _flush_rollups_sync(self) -> None:
+        """Write the totals if trips were added since the last write.
+
+        If HA stops before this, the file lags behind the history and the
+        trip count check rebuilds it on the next load.
+        """
+        if self._rollups_dirty and self._rollups is not None and not self._rollups_stale:
+            self._save_rollups(self._rollups)
+        self._rollups_dirty = False
+
+    def _record_trip_sync(self, record: dict) -> None:
+        # Bring the totals up to date first, so a rebuild can't count this trip twice
+        rollups = self._ensure_rollups()
+        self._add_trip_sync(record)
+        rollups.add(record)
+        self._rollups_dirty = True
+
+    def _rollup_sync(self, period: str, moment) -> tuple:
+        key = period_keys(moment)[period]
+        return key, self._ensure_rollups().get(period, key)
+
+    def _replace_all_sync(self, trips: list) -> None:
+        """Overwrite the whole history with ``trips`` (oldest first)."""
+        write_json_atomic(self._path, list(reversed(trips)))
+        if self._journal_path.exists():
+            with open(self._journal_path, "w", encoding="utf-8") as file:
+                file.flush()
+                os.fsync(file.fileno())
+        self._trips = list(trips)
+        self._signature = self._disk_signature()
+
+    def _summary_sync(self, head_size: int) -> tuple:
+        self._invalidate_if_changed()
+        trips = self._ensure_loaded()
+        return len(trips), [dict(trip) for trip in reversed(trips[-head_size:])]
+
+    def _exists_sync(self) -> bool:
+        return self._path.exists() or self._journal_path.exists()
+
+    def _split_sync(self, targets: dict, fallback: Optional["TripHistoryStore"]) -> tuple:
+        """Move trips out of this history into per-scooter stores.
+
+        ``targets`` maps an IMEI to its store. A trip goes to the store named by
+        its ``imei`` field, or to ``fallback`` when it has none. Trips that
+        cannot be attributed stay here. Returns the number of trips moved per
+        history file and the number of trips left behind.
+        """
+        self._invalidate_if_changed()
+        trips = self._ensure_loaded()
+        moved = {}
+        kept = []
+        for trip in trips:
+            store = targets.get(trip.get("imei")) or fallback
+            if store is None:
+                kept.append(trip)
+                continue
+            moved.setdefault(store, []).append(trip)
+        # An empty file records that there was nothing to move, so the next
+        # setup does not parse this history again
+        for store in set(targets.values()) - set(moved):
+            store._replace_all_sync([])
+        if not moved:
+            return {}, len(kept)
+
+        backup = self._path.with_name(f"{self._path.name}.bak")
+        if self._path.exists() and not backup.exists():
+            shutil.copy2(self._path, backup)
+        for store, store_trips in moved.items():
+            store._replace_all_sync(store_trips)
+            store._drop_rollups_sync()
+        self._replace_all_sync(kept)
+        self._drop_rollups_sync()
+        return {store.path.name: len(store_trips) for store, store_trips in moved.items()}, len(kept)
+
+    async def async_load(self) -> list:
+        """Load (once) and return all trips, newest first."""
+        async with self._lock:
+            trips = await self._hass.async_add_executor_job(self._ensure_loaded)
+            return list(reversed(trips))
+
+    async def async_get_summary(self, head_size: int = HISTORY_HEAD_SIZE) -> tuple:
+        """Return (trip count, newest ``head_size`` trips) from the cache.
+
+        Only the file stats are checked; the history is parsed again solely
+        when it was modified outside the store.
+        """
+        async with self._lock:
+            return await self._hass.async_add_executor_job(self._summary_sync, head_size)
+
+    async def async_query(
+        self,
+        start=None,
+        end=None,
+        limit: int = HISTORY_HEAD_SIZE,
+        offset: int = 0,
+        aggregates=(),
+    ) -> dict:
+        """Return trips started in [start, end), newest first, and their stats.
+
+        ``limit``/``offset`` only paginate the returned trips; ``count`` and
+        the aggregates cover the whole range.
+        """
+        async with self._lock:
+            return await self._hass.async_add_executor_job(
+                self._query_sync, start, end, limit, offset, tuple(aggregates)
+            )
+
+    async def async_get_rollup(self, period: str, moment=None) -> tuple:
+        """Return (bucket key, statistics) of the period containing ``moment`` (now by default)."""
+        async with self._lock:
+            return await self._hass.async_add_executor_job(
+                self._rollup_sync, period, moment or dt_util.now()
+            )
+
+    async def async_check_external_changes(self) -> None:
+        """Notify listeners if history.json or the journal was edited externally."""
+        async with self._lock:
+            changed = await self._hass.async_add_executor_job(self._invalidate_if_changed)
+        if changed:
+            async_dispatcher_send(self._hass, self._signal)
+
+    async def async_add_trip(self, **kwargs) -> bool:
+        """Record a trip. Accepts the same keyword arguments as build_trip_record."""
+        try:
+            record = build_trip_record(**kwargs)
+        except (ValueError, TypeError) as e:
+            _LOGGER.error("Invalid trip data %s: %s", kwargs, e)
+            return False
+
+        async with self._lock:
+            try:
+                await self._hass.async_add_executor_job(self._record_trip_sync, record)
+            except OSError as e:
+                _LOGGER.error("Error writing history journal %s: %s", self._journal_path, e)
+                # Force a reload next time so the cache matches the disk
+                self._trips = None
+                return False
+
+        _LOGGER.debug("Trip recorded in %s: %s", self._journal_path, record)
+        async_dispatcher_send(self._hass, self._signal)
+        self.async_schedule_compaction()
+        return True
+
+    @callback
+    def async_schedule_compaction(self, delay: float = COMPACTION_DELAY) -> None:
+        """(Re)start the debounced compaction timer."""
+        if self._cancel_compaction is not None:
+            self._cancel_compaction()
+
+        @callback
+        def _run(_now):
+            self._cancel_compaction = None
+            self._hass.async_create_task(self.async_compact())
+
+        self._cancel_compaction = async_call_later(self._hass, delay, _run)
+
+    async def async_compact(self) -> None:
+        """Materialize history.json from the journal, off the event loop."""
+        async with self._lock:
+            try:
+                if await self._hass.async_add_executor_job(self._compact_sync):
+                    _LOGGER.info("History journal compacted into %s", self._path)
+                await self._hass.async_add_executor_job(self._flush_rollups_sync)
+            except OSError as e:
+                _LOGGER.error("Error compacting history journal %s: %s", self._journal_path, e)
+
+    async def async_shutdown(self) -> None:
+        """Cancel the pending compaction and run it now."""
+        if self._cancel_compaction is not None:
+            self._cancel_compaction()
+            self._cancel_compaction = None
+        await self.async_compact()
+
+
+def get_history_store(
+    hass: HomeAssistant,
+    imei: str = "",
+    multi_device: bool = False,
+    backend: Optional[str] = None,
+) -> TripHistoryStore:
+    """Return the history store of a scooter, creating it on first use.
+
+    ``backend`` only matters on creation, which happens when the config entry
+    is set up; later callers get the store already registered.
+    """
+    stores = hass.data.setdefault(DOMAIN, {}).setdefault("history_stores", {})
+    key = history_key(imei, multi_device)
+    store = stores.get(key)
+    if store is None:
+        path = history_path_for(imei, multi_device)
+        signal = history_signal(imei, multi_device)
+        if (backend or DEFAULT_HISTORY_BACKEND) == HISTORY_BACKEND_SQLITE:
+            from .history_sqlite import SqliteTripHistoryStore
+            store = SqliteTripHistoryStore(hass, path, signal)
+        else:
+            store = TripHistoryStore(hass, path, signal)
+        stores[key] = store
+    return store
+
+
+async def async_close_history_store(hass: HomeAssistant, imei: str = "", multi_device: bool = False) -> None:
+    """Flush and forget a scooter's store, so a reload can switch backend."""
+    stores = hass.data.get(DOMAIN, {}).get("history_stores", {})
+    store = stores.pop(history_key(imei, multi_device), None)
+    if store is not None:
+        await store.async_shutdown()
+
+
+async def async_migrate_shared_history(hass: HomeAssistant) -> None:
+    """Split the shared history.json into per-scooter files (multi-device mode).
+
+    Before per-IMEI files existed, every scooter appended to history.json.
+    Trips carrying an ``imei`` field are moved to that scooter's file. Legacy
+    trips have no such field: they are only moved when the shared file can
+    have a single owner, i.e. exactly one multi-device scooter and no
+    single-device entry. Otherwise they are left in history.json (a copy is
+    kept as history.json.bak before anything is rewritten).
+
+    Entries are set up concurrently and each one calls this: a domain-level
+    lock makes the first call do the split and the others find it done.
+    """
+    lock = hass.data.setdefault(DOMAIN, {}).setdefault("history_migration_lock", asyncio.Lock())
+    async with lock:
+        await _async_migrate_shared_history(hass)
+
+
+async def _async_migrate_shared_history(hass: HomeAssistant) -> None:
+    entries = hass.config_entries.async_entries(DOMAIN)
+    backends = {
+        entry.data.get(CONF_IMEI): entry.data.get(CONF_HISTORY_BACKEND)
+        for entry in entries
+        if entry.data.get(CONF_MULTI_DEVICE) and entry.data.get(CONF_IMEI)
+    }
+    imeis = sorted(backends)
+    if not imeis:
+        return
+    single_backends = [
+        entry.data.get(CONF_HISTORY_BACKEND) for entry in entries if not entry.data.get(CONF_MULTI_DEVICE)
+    ]
+    single_device = bool(single_backends)
+
+    # Only fill per-scooter files that do not exist yet, so this runs once
+    targets = {}
+    for imei in imeis:
+        store = get_history_store(hass, imei, True, backends[imei])
+        if not await hass.async_add_executor_job(store._exists_sync):
+            targets[imei] = store
+    if not targets:
+        return
+    fallback = targets.get(imeis[0]) if len(imeis) == 1 and not single_device else None
+
+    # history.json is where multi-device trips used to go. It belongs to the
+    # single-device store when there is one; otherwise nothing else uses it.
+    if single_device:
+        shared = get_history_store(hass, backend=single_backends[0])
+    else:
+        shared = TripHistoryStore(hass, HISTORY_FILE, history_signal())
+    async with AsyncExitStack() as stack:
+        for store in [shared, *targets.values()]:
+            await stack.enter_async_context(store._lock)
+        try:
+            moved, remaining = await hass.async_add_executor_job(shared._split_sync, targets, fallback)
+        except OSError as e:
+            _LOGGER.error("Error splitting %s per scooter: %s", shared.path, e)
+            return
+
+    for name, count in moved.items():
+        _LOGGER.info("Migrated %d trips from %s to %s", count, shared.path.name, name)
+    if remaining and not single_device:
+        _LOGGER.warning(
+            "%d trips in %s cannot be attributed to a scooter and were left there",
+            remaining, shared.path,
+        )
+    if moved:
+        async_dispatcher_send(hass, shared.signal)
+        for store in targets.values():
+            async_dispatcher_send(hass, store.signal)
@@ -0,0 +1,65 @@
+"""JSON file helpers shared by the history, rollups and meter ledger files.
+
+Plain functions, run in the executor: atomic rewrite of a JSON file, and
+read/append of a JSON-lines file that tolerates a line torn by a crash.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def write_json_atomic(path: Path, data) -> None:
+    """Write JSON to ``path`` through a temp file in the same directory.
+
+    The temp file is fsynced before being renamed over the target, so a crash
+    leaves either the old or the new file, never a truncated one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, ensure_ascii=False)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_json_lines(path: Path) -> list:
+    """Read the JSON objects of a JSON-lines file, skipping corrupt (torn) lines."""
+    records = []
+    try:
+        if not path.exists():
+            return records
+        with open(path, "r", encoding="utf-8") as file:
+            for line_no, line in enumerate(file, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    _LOGGER.warning("Skipping corrupt line %d in %s", line_no, path)
+                    continue
+                if isinstance(record, dict):
+                    records.append(record)
+    except OSError as e:
+        _LOGGER.error("Error reading %s: %s", path, e)
+    return records
+
+
+def append_json_line(path: Path, record: dict) -> None:
+    """Append a JSON object to a JSON-lines file and fsync it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    # Never glue a record onto a torn line left by a crash mid-append
+    if path.exists() and path.stat().st_size > 0:
+        with open(path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b"\n":
+                line = "\n" + line
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(line)
+        file.flush()
+        os.fsync(file.fileno())
@@ -0,0 +1,298 @@
+"""Shared engine of the utility meters.
+
+The meters of a scooter (energy, distance, trips... over several cycles)
+often follow the same source. Each of them used to subscribe to it, poll it
+every 5 minutes or every hour to detect the cycle rollover, and parse and
+validate every value on its own. A MeterEngine does this once per source:
+
+- each source update is parsed and validated once, then handed to every
+  meter of the source, with the price per kWh at that moment for the
+  priced sources (the meters accumulate their cost from it, see tariff.py);
+- each (cycle, offset) pair has one timer, at its next start (the hour,
+  midnight, Monday, the 1st, January 1st, shifted by the offset), instead
+  of polling. The meters of the cycle are updated with the boundary
+  instant, so they close the period at the boundary.
+
+Daily and longer cycle starts are local wall-clock times computed from
+local dates, so they stay correct across DST changes (including time zones
+whose DST change happens at midnight). Hourly cycles are exact hours.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time, async_track_state_change_event
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .errors import ErrorCategory, ErrorSeverity, get_error_detector
+
+_LOGGER = logging.getLogger(__name__)
+
+CYCLE_HOURLY = "hourly"
+CYCLE_DAILY = "daily"
+CYCLE_WEEKLY = "weekly"
+CYCLE_MONTHLY = "monthly"
+CYCLE_YEARLY = "yearly"
+
+CYCLES = [CYCLE_HOURLY, CYCLE_DAILY, CYCLE_WEEKLY, CYCLE_MONTHLY, CYCLE_YEARLY]
+
+# Longest offset of each cycle (same limits as the core utility_meter)
+_MAX_OFFSET = {
+    CYCLE_HOURLY: timedelta(minutes=59),
+    CYCLE_DAILY: timedelta(hours=23, minutes=59),
+    CYCLE_WEEKLY: timedelta(days=6, hours=23, minutes=59),
+    CYCLE_MONTHLY: timedelta(days=27),
+    CYCLE_YEARLY: timedelta(days=27),
+}
+
+NO_OFFSET = timedelta(0)
+
+# A source drop larger than this (source unit) is an upstream counter reset, not a reading
+MAX_SOURCE_DROP = 100
+
+
+def local_midnight(day: date) -> datetime:
+    """Return the first instant of local ``day``.
+
+    Going through UTC resolves a midnight skipped by a DST change to the
+    first existing instant of the day.
+    """
+    return _local_wall_time(datetime.combine(day, time()))
+
+
+def _local_wall_time(naive: datetime) -> datetime:
+    """Return the local instant of a naive wall-clock time (see local_midnight)."""
+    return dt_util.as_local(dt_util.as_utc(naive.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)))
+
+
+def clamp_offset(cycle: str, offset: Optional[timedelta]) -> timedelta:
+    """Return ``offset`` limited to what fits in one ``cycle``."""
+    if not offset or offset < NO_OFFSET:
+        return NO_OFFSET
+    return min(offset, _MAX_OFFSET.get(cycle, NO_OFFSET))
+
+
+def offset_from_config(value) -> timedelta:
+    """Return the offset of a duration option ({"days", "hours", ...})."""
+    if isinstance(value, dict):
+        try:
+            return timedelta(**{
+                unit: float(amount)
+                for unit, amount in value.items()
+                if unit in ("days", "hours", "minutes", "seconds")
+            })
+        except (TypeError, ValueError):
+            _LOGGER.warning("Invalid meter offset %r, ignoring", value)
+    return NO_OFFSET
+
+
+def _cycle_first_day(cycle: str, day: date) -> date:
+    if cycle == CYCLE_WEEKLY:
+        # Start of week (Monday)
+        return day - timedelta(days=day.weekday())
+    if cycle == CYCLE_MONTHLY:
+        return day.replace(day=1)
+    if cycle == CYCLE_YEARLY:
+        return day.replace(month=1, day=1)
+    return day
+
+
+def _hour_start(now: datetime, offset: timedelta) -> datetime:
+    """Return the start (UTC) of the hourly cycle containing ``now``."""
+    local = dt_util.as_local(now)
+    start = dt_util.as_utc(local.replace(minute=0, second=0, microsecond=0)) + offset
+    if start > dt_util.as_utc(now):
+        start -= timedelta(hours=1)
+    return start
+
+
+def _shifted_first_day(cycle: str, now: datetime, offset: timedelta) -> date:
+    """Return the first day of the cycle containing ``now``, before the offset."""
+    shifted = dt_util.as_local(now).replace(tzinfo=None) - offset
+    return _cycle_first_day(cycle, shifted.date())
+
+
+def cycle_start(cycle: str, now: datetime, offset: Optional[timedelta] = None) -> datetime:
+    """Return the start of the cycle containing ``now``."""
+    offset = clamp_offset(cycle, offset)
+    if cycle == CYCLE_HOURLY:
+        return dt_util.as_local(_hour_start(now, offset))
+    first = _shifted_first_day(cycle, now, offset)
+    return _local_wall_time(datetime.combine(first, time()) + offset)
+
+
+def next_cycle_start(cycle: str, now: datetime, offset: Optional[timedelta] = None) -> Optional[datetime]:
+    """Return the start of the cycle following the one containing ``now``."""
+    offset = clamp_offset(cycle, offset)
+    if cycle == CYCLE_HOURLY:
+        return dt_util.as_local(_hour_start(now, offset) + timedelta(hours=1))
+    first = _shifted_first_day(cycle, now, offset)
+    if cycle == CYCLE_DAILY:
+        following = first + timedelta(days=1)
+    elif cycle == CYCLE_WEEKLY:
+        following = first + timedelta(days=7)
+    elif cycle == CYCLE_MONTHLY:
+        following = (first + timedelta(days=32)).replace(day=1)
+    elif cycle == CYCLE_YEARLY:
+        following = first.replace(year=first.year + 1)
+    else:
+        return None
+    return _local_wall_time(datetime.combine(following, time()) + offset)
+
+
+def cycle_changed(
+    cycle: str, last_reset: Optional[datetime], now: datetime, offset: Optional[timedelta] = None
+) -> bool:
+    """Return True if ``now`` is in a later cycle than ``last_reset``."""
+    if last_reset is None:
+        return False
+    # In UTC: aware datetimes of the same time zone compare by wall clock,
+    # which mixes up the two occurrences of a repeated hour
+    return dt_util.as_utc(cycle_start(cycle, now, offset)) > dt_util.as_utc(cycle_start(cycle, last_reset, offset))
+
+
+class MeterEngine:
+    """Validate the updates of one source and fan them out to its meters.
+
+    A meter has ``cycle`` and ``offset`` attributes and an
+    ``async_update_source(value, now, price)`` callback; ``price`` is None
+    when the source has no pricer.
+    """
+
+    def __init__(self, hass: HomeAssistant, source: str) -> None:
+        self._hass = hass
+        self.source = source
+        # EnergyPricer of a priced source (energy), else None
+        self.pricer = None
+        # Last validated source value
+        self.value: Optional[float] = None
+        self._meters: List = []
+        self._unsub_state: Optional[CALLBACK_TYPE] = None
+        # One timer per (cycle, offset)
+        self._unsub_cycles: Dict[Tuple[str, timedelta], CALLBACK_TYPE] = {}
+
+    @callback
+    def async_add_meter(self, meter) -> CALLBACK_TYPE:
+        """Feed ``meter`` from now on. Returns the remove function."""
+        self._meters.append(meter)
+        if self._unsub_state is None:
+            self._unsub_state = async_track_state_change_event(
+                self._hass, [self.source], self._async_source_changed
+            )
+            self._validate(self._hass.states.get(self.source))
+        if _cycle_key(meter) not in self._unsub_cycles:
+            self._async_schedule_cycle(_cycle_key(meter))
+        if self.value is not None:
+            now = dt_util.now()
+            meter.async_update_source(self.value, now, self._price_at(now))
+
+        @callback
+        def remove_meter() -> None:
+            self._meters.remove(meter)
+            key = _cycle_key(meter)
+            if not any(_cycle_key(other) == key for other in self._meters):
+                unsub = self._unsub_cycles.pop(key, None)
+                if unsub is not None:
+                    unsub()
+            if not self._meters and self._unsub_state is not None:
+                self._unsub_state()
+                self._unsub_state = None
+
+        return remove_meter
+
+    def _validate(self, state) -> Optional[float]:
+        """Parse and check a source state; return the value, or None to ignore it."""
+        if state is None or state.state in ["unknown", "unavailable"]:
+            return None
+        try:
+            value = float(state.state)
+        except (ValueError, TypeError) as e:
+            _LOGGER.error("Error updating meters of %s: %s", self.source, e)
+            detector = get_error_detector(self._hass)
+            if detector:
+                detector.record_error(
+                    ErrorCategory.SENSOR_INVALID, ErrorSeverity.ERROR,
+                    f"Utility meter update failed for {self.source}: {e}",
+                    source="MeterEngine", entity_id=self.source,
+                )
+            return None
+
+        # Reject obviously-bad source values that would poison cycle_start_value
+        # and corrupt the meters for the whole cycle:
+        #  - Negative values (seen on 2026-04-18 shortly before a scooter shutdown
+        #    when the upstream MQTT energy counter glitched to -866.918).
+        #  - A huge regression vs the last seen value, which means the counter
+        #    was transiently reset by the scooter/server.
+        if value < 0:
+            _LOGGER.warning(
+                "%s: Rejecting negative source_value=%.3f (keeping previous state)",
+                self.source, value,
+            )
+            return None
+        if self.value is not None and self.value > 0 and value < self.value - MAX_SOURCE_DROP:
+            _LOGGER.warning(
+                "%s: Rejecting large source drop (source=%.3f, last=%.3f, delta=%.3f). "
+                "Likely an upstream reset; keeping previous state.",
+                self.source, value, self.value, value - self.value,
+            )
+            return None
+        self.value = value
+        return value
+
+    def _price_at(self, now: datetime) -> Optional[float]:
+        return self.pricer.price_at(now) if self.pricer is not None else None
+
+    @callback
+    def _async_source_changed(self, event) -> None:
+        value = self._validate(event.data.get("new_state"))
+        if value is None:
+            return
+        now = dt_util.now()
+        # One price lookup per update, whatever the number of meters
+        price = self._price_at(now)
+        for meter in list(self._meters):
+            meter.async_update_source(value, now, price)
+
+    @callback
+    def _async_schedule_cycle(self, key: Tuple[str, timedelta]) -> None:
+        cycle, offset = key
+        next_start = next_cycle_start(cycle, dt_util.now(), offset)
+        if next_start is None:
+            return
+
+        @callback
+        def _cycle_started(_now) -> None:
+            self._unsub_cycles.pop(key, None)
+            _LOGGER.debug("New %s cycle for the meters of %s at %s", cycle, self.source, next_start)
+            meters = [meter for meter in self._meters if _cycle_key(meter) == key]
+            if self.value is not None:
+                # The boundary instant, not the (possibly late) firing time:
+                # the closing value is the last one read before the boundary
+                price = self._price_at(next_start)
+                for meter in meters:
+                    meter.async_update_source(self.value, next_start, price)
+            if meters:
+                self._async_schedule_cycle(key)
+
+        self._unsub_cycles[key] = async_track_point_in_utc_time(
+            self._hass, _cycle_started, dt_util.as_utc(next_start)
+        )
+
+
+def _cycle_key(meter) -> Tuple[str, timedelta]:
+    return meter.cycle, clamp_offset(meter.cycle, meter.offset)
+
+
+def get_meter_engine(hass: HomeAssistant, source: str, pricer=None) -> MeterEngine:
+    """Return the engine of a source, creating it on first use.
+
+    ``pricer`` (an EnergyPricer) replaces the engine's one when given.
+    """
+    engines = hass.data.setdefault(DOMAIN, {}).setdefault("meter_engines", {})
+    if source not in engines:
+        engines[source] = MeterEngine(hass, source)
+    if pricer is not None:
+        engines[source].pricer = pricer
+    return engines[source]
@@ -0,0 +1,132 @@
+"""Ledger of the closed utility meter cycles.
+
+When a meter cycle closes, its total used to be lost: only the live value of
+the current cycle remained, and long-range reports had to go through the
+recorder (and its retention). Each closed cycle is now appended to a small
+JSON-lines file next to the trip history (``meters.jsonl`` /
+``meters_<imei>.jsonl``), one line per meter and period::
+
+    {"meter": "scooter_energy_consumption_monthly", "cycle": "monthly",
+     "start": "2025-06-01T00:00:00+02:00", "end": "2025-07-01T00:00:00+02:00",
+     "value": 12.345, "cost": 2.49, "unit": "kWh", "price": 0.2017}
+
+``cost`` is the cost accumulated over the period (priced meters only) and
+``price`` its mean price per kWh.
+
+The file is read once and kept in memory; ``query_meter_periods`` filters
+that list.
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .history_store import history_key, history_path_for
+from .json_io import append_json_line, read_json_lines
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def ledger_path_for(imei: str = "", multi_device: bool = False) -> Path:
+    """Return the ledger file that goes with a scooter's history file."""
+    history_path = history_path_for(imei, multi_device)
+    return history_path.with_name(history_path.name.replace("history", "meters", 1)).with_suffix(".jsonl")
+
+
+def _period_key(record: dict) -> tuple:
+    return record.get("meter"), record.get("start")
+
+
+class MeterLedger:
+    """Append-only archive of the closed meter cycles of a scooter."""
+
+    def __init__(self, hass: HomeAssistant, path: Path) -> None:
+        self._hass = hass
+        self._path = path
+        self._lock = asyncio.Lock()
+        self._records: Optional[List[dict]] = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    async def _async_ensure_loaded(self) -> List[dict]:
+        if self._records is None:
+            self._records = await self._hass.async_add_executor_job(read_json_lines, self._path)
+        return self._records
+
+    async def async_append(self, record: dict) -> bool:
+        """Archive a closed period. A period already archived is ignored."""
+        async with self._lock:
+            try:
+                records = await self._async_ensure_loaded()
+                key = _period_key(record)
+                if any(_period_key(existing) == key for existing in reversed(records)):
+                    _LOGGER.debug("Period %s already in %s", key, self._path)
+                    return False
+                await self._hass.async_add_executor_job(append_json_line, self._path, record)
+                records.append(record)
+                return True
+            except OSError as e:
+                _LOGGER.error("Error writing meter ledger %s: %s", self._path, e)
+                return False
+
+    async def async_query(
+        self,
+        meter: Optional[str] = None,
+        cycle: Optional[str] = None,
+        start=None,
+        end=None,
+        limit: int = 100,
+    ) -> dict:
+        """Return the closed periods starting in [start, end), newest first, with per-meter totals."""
+        start = dt_util.as_utc(start) if start is not None else None
+        end = dt_util.as_utc(end) if end is not None else None
+        async with self._lock:
+            records = await self._async_ensure_loaded()
+
+        periods = []
+        for record in records:
+            if meter and record.get("meter") != meter:
+                continue
+            if cycle and record.get("cycle") != cycle:
+                continue
+            if start is not None or end is not None:
+                period_start = dt_util.parse_datetime(str(record.get("start", "")))
+                if period_start is None:
+                    continue
+                period_start = dt_util.as_utc(period_start)
+                if (start is not None and period_start < start) or (end is not None and period_start >= end):
+                    continue
+            periods.append(record)
+        periods.reverse()
+
+        # Totals per meter: the cycles overlap, a grand total would count twice
+        totals = {}
+        for period in periods:
+            total = totals.setdefault(period.get("meter"), {"count": 0, "value": 0.0, "cost": 0.0})
+            total["count"] += 1
+            total["value"] += float(period.get("value") or 0)
+            total["cost"] += float(period.get("cost") or 0)
+        for total in totals.values():
+            total["value"] = round(total["value"], 3)
+            total["cost"] = round(total["cost"], 2)
+
+        return {
+            "count": len(periods),
+            "totals": totals,
+            "periods": periods[:limit],
+        }
+
+
+def get_meter_ledger(hass: HomeAssistant, imei: str = "", multi_device: bool = False) -> MeterLedger:
+    """Return the ledger of a scooter, creating it on first use."""
+    ledgers = hass.data.setdefault(DOMAIN, {}).setdefault("meter_ledgers", {})
+    key = history_key(imei, multi_device)
+    if key not in ledgers:
+        ledgers[key] = MeterLedger(hass, ledger_path_for(imei, multi_device))
+    return ledgers[key]
@@ -10,7 +10,7 @@ from homeassistant.helpers.restore_state import RestoreEntity
 
 from .const import DOMAIN, CONF_IMEI, CONF_MULTI_DEVICE, DEFAULT_MULTI_DEVICE
 from .definitions import INPUT_NUMBERS
-from .helpers import get_device_info
+from .helpers import async_write_state, get_device_info
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -69,6 +69,8 @@ class ScooterNumberEntity(NumberEntity, RestoreEntity):
     async def async_added_to_hass(self):
         """Handle entity which will be added."""
         await super().async_added_to_hass()
+        # Direct write path for the automations (see helpers.set_number_value)
+        self.hass.data.setdefault(DOMAIN, {}).setdefault("numbers", {})[self.entity_id] = self
 
         # Restore from last known state
         if last_state := await self.async_get_last_state():
@@ -84,6 +86,12 @@ class ScooterNumberEntity(NumberEntity, RestoreEntity):
         else:
             _LOGGER.debug("No previous state for %s - starting at default", self.entity_id)
 
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister from the direct write path."""
+        registry = self.hass.data.get(DOMAIN, {}).get("numbers", {})
+        if registry.get(self.entity_id) is self:
+            registry.pop(self.entity_id)
+
     @property
     def native_value(self) -> float:
         """Return the current value."""
@@ -93,7 +101,7 @@ class ScooterNumberEntity(NumberEntity, RestoreEntity):
         """Set new value."""
         self._value = value
         self._attr_native_value = value
-        self.async_write_ha_state()
+        async_write_state(self)
 
     async def async_update(self) -> None:
         """Prevent periodic update from resetting the value."""
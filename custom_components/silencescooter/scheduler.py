@@ -0,0 +1,125 @@
+"""Shared minute scheduler for the time-based trigger sensors.
+
+The ``time_pattern`` trigger sensors of a scooter (active trip duration,
+"x min ago" display, trip status timeout) only change with time while a trip
+is running or shortly after it ended. Instead of one timer per sensor firing
+every minute forever, one scheduler per scooter ticks all of them together,
+and only when their value can change:
+
+- every minute while the trip status is on;
+- every minute during the first hour after the last trip ended, then at each
+  hour boundary (the display switches to "N hours ago");
+- not at all otherwise.
+"""
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time, async_track_state_change_event
+from homeassistant.util import dt as dt_util
+
+from .helpers import parse_state_datetime
+
+_LOGGER = logging.getLogger(__name__)
+
+# Same bounds as the scooter_history_start template
+RELATIVE_MINUTES_UNTIL = timedelta(hours=1)
+RELATIVE_HOURS_UNTIL = timedelta(hours=8760)
+
+
+class MinuteScheduler:
+    """Tick the registered sensors only while their time-based value can change."""
+
+    def __init__(self, hass: HomeAssistant, trip_status_entity: str, end_time_entity: str) -> None:
+        self._hass = hass
+        self._trip_status_entity = trip_status_entity
+        self._end_time_entity = end_time_entity
+        self._listeners: list = []
+        self._unsub_state: Optional[CALLBACK_TYPE] = None
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+
+    @callback
+    def async_add_listener(self, update_callback: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call ``update_callback`` on every tick. Returns the remove function."""
+        self._listeners.append(update_callback)
+        if len(self._listeners) == 1:
+            self._unsub_state = async_track_state_change_event(
+                self._hass,
+                [self._trip_status_entity, self._end_time_entity],
+                self._async_state_changed,
+            )
+            self._async_reschedule()
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+            if not self._listeners:
+                self._async_stop()
+
+        return remove_listener
+
+    @callback
+    def _async_stop(self) -> None:
+        if self._unsub_state is not None:
+            self._unsub_state()
+            self._unsub_state = None
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _async_state_changed(self, event) -> None:
+        """Trip started/stopped: the sensors update on their own triggers, only the pace changes."""
+        self._async_reschedule()
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        self._unsub_timer = None
+        for update_callback in list(self._listeners):
+            update_callback()
+        self._async_reschedule()
+
+    @callback
+    def _async_reschedule(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        next_tick = self._next_tick(dt_util.now())
+        if next_tick is None:
+            _LOGGER.debug("Minute scheduler idle (%s)", self._trip_status_entity)
+            return
+        self._unsub_timer = async_track_point_in_utc_time(self._hass, self._async_tick, next_tick)
+
+    def _end_time(self) -> Optional[datetime]:
+        """Last trip end, read like the scooter_history_start template does."""
+        state = self._hass.states.get(self._end_time_entity)
+        if state is None:
+            return None
+        end_time = parse_state_datetime(state.state)
+        if end_time is None or end_time.year <= 1971:
+            return None
+        # The template swaps the time zone rather than converting
+        return end_time.replace(tzinfo=dt_util.now().tzinfo)
+
+    def _next_tick(self, now: datetime) -> Optional[datetime]:
+        next_minute = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        trip_status = self._hass.states.get(self._trip_status_entity)
+        if trip_status is not None and trip_status.state == "on":
+            return next_minute
+
+        end_time = self._end_time()
+        if end_time is None:
+            return None
+        elapsed = now - end_time
+        if elapsed < timedelta(0):
+            # Shown as "--" until the end time is reached
+            return end_time + timedelta(seconds=1)
+        if elapsed < RELATIVE_MINUTES_UNTIL:
+            return next_minute
+        if elapsed <= RELATIVE_HOURS_UNTIL:
+            # "N hours ago" uses ceil(hours): it changes right after each full hour
+            hours = math.floor(elapsed / timedelta(hours=1)) + 1
+            return end_time + timedelta(hours=hours, seconds=1)
+        return None
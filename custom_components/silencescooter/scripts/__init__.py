@@ -1,6 +1,5 @@
 """Utility scripts for the Silence Scooter integration.
 
 This directory contains:
-- history.sh: Shell script for managing trip history
 - set_state.py: Python script for setting entity states
-"""
\ No newline at end of file
+"""
@@ -1,6 +1,5 @@
 """Sensor platform for Silence Scooter integration."""
 import logging
-import json
 from datetime import timedelta
 from typing import Any, Dict, Optional
 
@@ -10,9 +9,16 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.const import CONF_NAME, CONF_ICON, CONF_UNIT_OF_MEASUREMENT, Platform, EntityCategory
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_state_change_event, async_track_time_interval
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import (
+    TrackTemplate,
+    async_track_state_change_event,
+    async_track_template_result,
+    async_track_time_change,
+    async_track_time_interval,
+)
 from homeassistant.util import dt as dt_util
 from homeassistant.helpers.template import Template
 from homeassistant.helpers.restore_state import RestoreEntity
@@ -21,25 +27,47 @@ from homeassistant.exceptions import TemplateError
 
 from .const import (
     DOMAIN,
-    HISTORY_FILE,
     CONF_IMEI,
     CONF_TARIFF_SENSOR,
     CONF_USE_TRACKED_DISTANCE,
     CONF_MULTI_DEVICE,
+    CONF_METER_SOURCES,
+    CONF_METER_ENTITIES,
+    CONF_METER_CYCLES,
+    CONF_METER_OFFSET,
     DEFAULT_TARIFF_SENSOR,
     DEFAULT_USE_TRACKED_DISTANCE,
     DEFAULT_MULTI_DEVICE,
+    DEFAULT_ELECTRICITY_PRICE,
+    DEFAULT_METER_SOURCES,
+    DEFAULT_METER_ENTITIES,
+    DEFAULT_METER_CYCLES,
+    DEFAULT_METER_OFFSET,
 )
-from .helpers import get_device_info, insert_imei_in_entity_id, generate_entity_id_suffix
+from .helpers import async_write_state, get_device_info, insert_imei_in_entity_id, generate_entity_id_suffix
 from .errors import ErrorCategory, ErrorSeverity, get_error_detector
+from .history_store import TRACK_FIELD, get_history_store
+from .history_rollups import period_start
+from .scheduler import MinuteScheduler
+from .meter_engine import (
+    CYCLES,
+    cycle_changed,
+    cycle_start,
+    get_meter_engine,
+    next_cycle_start,
+    offset_from_config,
+)
+from .meter_ledger import get_meter_ledger
+from .tariff import EnergyPricer
+from .calculators import CALCULATORS, TARIFF_PLACEHOLDER, CalculatorError, CalculatorInputs
 from .definitions import (
     WRITABLE_SENSORS,
     TEMPLATE_SENSORS,
     TRIGGER_SENSORS,
-    ENERGY_COST_SENSORS,
     BATTERY_HEALTH_SENSORS,
     USAGE_STATISTICS_SENSORS,
-    UTILITY_METERS
+    TRIP_ROLLUP_SENSORS,
+    METER_SOURCES,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -75,6 +103,14 @@ async def async_setup_entry(
             template_str,
         )
 
+    def attach_calculator(config: dict, name: str) -> None:
+        """Use the native calculator ``name``, with inputs resolved like the template's."""
+        config["calculator"] = name
+        config["calculator_inputs"] = {
+            role: adapt_template_for_multi_device(entity_id.replace(TARIFF_PLACEHOLDER, configured_tariff_sensor))
+            for role, entity_id in CALCULATORS[name].inputs.items()
+        }
+
     entities = []
 
     for sensor_id, config in WRITABLE_SENSORS.items():
@@ -112,25 +148,36 @@ async def async_setup_entry(
             config_copy["icon_template"] = adapt_template_for_multi_device(config_copy["icon_template"])
         entities.append(ScooterTemplateSensor(hass, sensor_id, config_copy, imei, multi_device))
 
+    # One shared minute tick for all the time_pattern trigger sensors of this scooter
+    minute_scheduler = MinuteScheduler(
+        hass,
+        adapt_template_for_multi_device("sensor.scooter_trip_status"),
+        adapt_template_for_multi_device("datetime.scooter_end_time"),
+    )
+
     for sensor_id, config in TRIGGER_SENSORS.items():
         config_copy = config.copy()
         if "value_template" in config_copy:
             config_copy["value_template"] = adapt_template_for_multi_device(config_copy["value_template"])
-        entities.append(ScooterTriggerSensor(hass, sensor_id, config_copy, imei, multi_device))
-
-    for sensor_id, config in ENERGY_COST_SENSORS.items():
-        config_copy = config.copy()
-        if "value_template" in config_copy:
-            config_copy["value_template"] = config_copy["value_template"].replace(
-                "sensor.tarif_base_ttc", configured_tariff_sensor
-            )
-            config_copy["value_template"] = adapt_template_for_multi_device(config_copy["value_template"])
-        entities.append(ScooterTemplateSensor(hass, sensor_id, config_copy, imei, multi_device))
+        config_copy["triggers"] = [
+            {
+                **trigger,
+                "entity_id": (
+                    [adapt_template_for_multi_device(entity_id) for entity_id in trigger["entity_id"]]
+                    if isinstance(trigger["entity_id"], list)
+                    else adapt_template_for_multi_device(trigger["entity_id"])
+                ),
+            } if "entity_id" in trigger else trigger
+            for trigger in config_copy.get("triggers", [])
+        ]
+        entities.append(ScooterTriggerSensor(hass, sensor_id, config_copy, imei, multi_device, minute_scheduler))
 
     for sensor_id, config in BATTERY_HEALTH_SENSORS.items():
         config_copy = config.copy()
         if "value_template" in config_copy:
             config_copy["value_template"] = adapt_template_for_multi_device(config_copy["value_template"])
+        if "calculator" in config_copy:
+            attach_calculator(config_copy, config_copy["calculator"])
         entities.append(ScooterTemplateSensor(hass, sensor_id, config_copy, imei, multi_device))
 
     for sensor_id, config in USAGE_STATISTICS_SENSORS.items():
@@ -139,9 +186,9 @@ async def async_setup_entry(
             config_copy["value_template"] = config_copy["value_template"].replace(
                 "sensor.tarif_base_ttc", configured_tariff_sensor
             )
-            config_copy["value_template"] = adapt_template_for_multi_device(config_copy["value_template"])
             if use_tracked_distance:
                 if sensor_id == "scooter_distance_per_charge":
+                    config_copy["calculator"] = "distance_per_charge_tracked"
                     # Tracked mode: distance / (battery% / 100) = km per full charge
                     config_copy["value_template"] = """
                         {% set tracked_dist = states('number.scooter_tracked_distance') | float(0) %}
@@ -153,6 +200,7 @@ async def async_setup_entry(
                         {% endif %}
                     """
                 elif sensor_id == "scooter_cost_per_km":
+                    config_copy["calculator"] = "cost_per_km_tracked"
                     # Tracked mode: (battery% / 100 * capacity * price) / distance
                     config_copy["value_template"] = f"""
                         {{% set tracked_dist = states('number.scooter_tracked_distance') | float(0) %}}
@@ -165,23 +213,56 @@ async def async_setup_entry(
                             0
                         {{% endif %}}
                     """
-            # Re-apply multi-device adaptation after tracked mode override
+            # Multi-device adaptation once, after the tracked mode override
             config_copy["value_template"] = adapt_template_for_multi_device(config_copy["value_template"])
+        if "calculator" in config_copy:
+            attach_calculator(config_copy, config_copy["calculator"])
         entities.append(ScooterTemplateSensor(hass, sensor_id, config_copy, imei, multi_device))
 
     entities.append(ScooterTripsSensor(hass, imei, multi_device))
 
-    for meter_id, config in UTILITY_METERS.items():
-        config_copy = config.copy()
-        if multi_device and imei:
-            config_copy["source"] = insert_imei_in_entity_id(config_copy["source"], imei, multi_device)
-        entities.append(ScooterUtilityMeterSensor(hass, meter_id, config_copy, imei, multi_device))
+    for sensor_id, config in TRIP_ROLLUP_SENSORS.items():
+        entities.append(ScooterTripRollupSensor(hass, sensor_id, config, imei, multi_device))
+
+    # Meters: every selected source over every selected cycle, all fed by
+    # one engine per source
+    meter_cycles = [
+        cycle for cycle in config_entry.data.get(CONF_METER_CYCLES, DEFAULT_METER_CYCLES) if cycle in CYCLES
+    ]
+    meter_offset = offset_from_config(config_entry.data.get(CONF_METER_OFFSET, DEFAULT_METER_OFFSET))
+    meter_configs = {}
+    for key in config_entry.data.get(CONF_METER_SOURCES, DEFAULT_METER_SOURCES):
+        definition = METER_SOURCES.get(key)
+        if definition is None:
+            _LOGGER.warning("Unknown meter source %s, skipping", key)
+            continue
+        source = insert_imei_in_entity_id(definition["source"], imei, multi_device)
+        meter_configs[definition["meter_id"]] = dict(definition, source=source)
+    for source in config_entry.data.get(CONF_METER_ENTITIES, DEFAULT_METER_ENTITIES):
+        # Any numeric sensor picked by the user; the unit is the source's
+        meter_configs[f"scooter_meter_{source.split('.', 1)[-1]}"] = {"source": source}
+
+    # Priced meters accumulate their cost at the price of the moment
+    pricer = EnergyPricer.from_config(hass, config_entry.data, configured_tariff_sensor)
+    meter_count = 0
+    cost_count = 0
+    for base_id, definition in meter_configs.items():
+        for cycle in meter_cycles:
+            config_copy = dict(definition, cycle=cycle, offset=meter_offset)
+            if "cost_id" in definition:
+                config_copy["pricer"] = pricer
+            meter = ScooterUtilityMeterSensor(hass, f"{base_id}_{cycle}", config_copy, imei, multi_device)
+            entities.append(meter)
+            meter_count += 1
+            if "cost_id" in definition:
+                entities.append(ScooterMeterCostSensor(hass, f"{definition['cost_id']}_{cycle}", meter, imei, multi_device))
+                cost_count += 1
 
     entities.append(ScooterErrorDetectionSensor(hass, config_entry.entry_id, imei, multi_device))
     async_add_entities(entities)
     _LOGGER.info("Initialized %d sensors (%d writable, %d template, %d trigger, %d energy cost, %d utility meters)",
                  len(entities), len(WRITABLE_SENSORS), len(TEMPLATE_SENSORS), len(TRIGGER_SENSORS),
-                 len(ENERGY_COST_SENSORS), len(UTILITY_METERS))
+                 cost_count, meter_count)
 
 
 class ScooterDefaultTariffSensor(SensorEntity):
@@ -216,7 +297,15 @@ class ScooterDefaultTariffSensor(SensorEntity):
 
 
 class ScooterTemplateSensor(SensorEntity, RestoreEntity):
-    """Representation of a Scooter Template sensor."""
+    """Representation of a Scooter Template sensor.
+
+    Not polled: the templates are re-rendered when one of the entities they
+    read changes (and every minute if they use now()). Sensors with a
+    ``calculator`` in their config are computed natively instead, on changes
+    of the calculator inputs, and only use the template as a definition.
+    """
+
+    _attr_should_poll = False
 
     def __init__(self, hass: HomeAssistant, sensor_id: str, config: dict, imei: str = "", multi_device: bool = False) -> None:
         """Initialize the sensor."""
@@ -242,6 +331,10 @@ class ScooterTemplateSensor(SensorEntity, RestoreEntity):
         self._attr_state_class = config.get("state_class")
         self._template = Template(config["value_template"], hass)
         self._icon_template = Template(config["icon_template"], hass) if "icon_template" in config else None
+        self._calculator = CALCULATORS.get(config.get("calculator"))
+        self._calculator_inputs = (
+            CalculatorInputs(hass, config["calculator_inputs"]) if self._calculator is not None else None
+        )
 
         self._attr_device_info = get_device_info(imei, multi_device)
         internal_sensors = ["scooter_is_moving", "scooter_trip_status"]
@@ -251,10 +344,78 @@ class ScooterTemplateSensor(SensorEntity, RestoreEntity):
     async def async_added_to_hass(self) -> None:
         """Handle entity added to Home Assistant."""
         await super().async_added_to_hass()
-        await self.async_update()
+        self._async_setup_tracking()
+
+    @callback
+    def _async_setup_tracking(self) -> None:
+        """Track the entities referenced by the templates."""
+        if self._calculator is not None:
+            self.async_on_remove(
+                async_track_state_change_event(
+                    self.hass,
+                    sorted(set(self._config["calculator_inputs"].values())),
+                    self._handle_input_change,
+                )
+            )
+            self._async_calculate()
+            self.async_write_ha_state()
+            return
+
+        track_templates = [TrackTemplate(self._template, None)]
+        if self._icon_template is not None:
+            track_templates.append(TrackTemplate(self._icon_template, None))
+        info = async_track_template_result(self.hass, track_templates, self._handle_template_result)
+        self.async_on_remove(info.async_remove)
+        # Initial render (also computes the first set of dependencies)
+        info.async_refresh()
+
+    @callback
+    def _handle_template_result(self, event, updates) -> None:
+        """Apply re-rendered templates and write the new state."""
+        for update in updates:
+            result = update.result
+            if update.template is self._template:
+                if isinstance(result, TemplateError):
+                    self._record_template_error(result)
+                    self._attr_native_value = None
+                else:
+                    self._attr_native_value = result
+            elif not isinstance(result, TemplateError):
+                self._attr_icon = result
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_input_change(self, event) -> None:
+        """Recompute after a calculator input changed."""
+        self._async_calculate()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_calculate(self) -> None:
+        try:
+            self._attr_native_value = self._calculator.compute(self._calculator_inputs)
+        except (CalculatorError, ArithmeticError, TypeError, ValueError) as err:
+            # Where the template would have failed to render
+            self._attr_native_value = None
+            self._record_template_error(err)
+
+    def _record_template_error(self, err) -> None:
+        _LOGGER.error("Error rendering template for %s: %s", self._attr_name, err)
+        detector = get_error_detector(self.hass)
+        if detector:
+            detector.record_error(
+                ErrorCategory.TEMPLATE_ERROR,
+                ErrorSeverity.WARNING,
+                f"Template render failed for {self._attr_name}: {err}",
+                source="ScooterTemplateSensor",
+                entity_id=getattr(self, "entity_id", self._attr_unique_id),
+            )
 
     async def async_update(self) -> None:
         """Update the state."""
+        if self._calculator is not None:
+            self._async_calculate()
+            return
         try:
             result = self._template.async_render()
             if isinstance(result, TemplateError):
@@ -266,17 +427,8 @@ class ScooterTemplateSensor(SensorEntity, RestoreEntity):
             if self._icon_template is not None:
                 self._attr_icon = self._icon_template.async_render()
         except TemplateError as err:
-            _LOGGER.error("Error rendering template for %s: %s", self._attr_name, err)
             self._attr_native_value = None
-            detector = get_error_detector(self.hass)
-            if detector:
-                detector.record_error(
-                    ErrorCategory.TEMPLATE_ERROR,
-                    ErrorSeverity.WARNING,
-                    f"Template render failed for {self._attr_name}: {err}",
-                    source="ScooterTemplateSensor",
-                    entity_id=getattr(self, "entity_id", self._attr_unique_id),
-                )
+            self._record_template_error(err)
 
 
 
@@ -311,6 +463,7 @@ class ScooterWritableSensor(SensorEntity, RestoreEntity):
         self._attr_icon = config.get("icon", "mdi:information")
         self._attr_native_value = 0
         self._attr_device_info = get_device_info(imei, multi_device)
+        self._attribute_names = config.get("attributes", [])
 
     async def async_added_to_hass(self) -> None:
         """Restore last state when added to hass."""
@@ -321,6 +474,10 @@ class ScooterWritableSensor(SensorEntity, RestoreEntity):
             _LOGGER.info("Writable sensor registered: %s", self.entity_id)
 
         if last_state := await self.async_get_last_state():
+            if self._attribute_names:
+                self._attr_extra_state_attributes = {
+                    name: last_state.attributes.get(name) for name in self._attribute_names
+                }
             try:
                 restored = float(last_state.state)
                 # Reject obviously-corrupt restored values (NaN, negative, absurd
@@ -348,12 +505,26 @@ class ScooterWritableSensor(SensorEntity, RestoreEntity):
             _LOGGER.debug("New sensor %s initialized to 0", self.entity_id)
         self.async_write_ha_state()
 
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister from the writable sensors."""
+        registry = self.hass.data.get(DOMAIN, {}).get("sensors", {})
+        if registry.get(self.entity_id) is self:
+            registry.pop(self.entity_id)
+
+    @callback
+    def async_set_attributes(self, attributes: dict) -> None:
+        """Set the declared extra attributes (others are ignored)."""
+        self._attr_extra_state_attributes = {
+            name: attributes.get(name) for name in self._attribute_names
+        }
+        async_write_state(self)
+
     async def async_set_native_value(self, value: float) -> None:
         """Set the sensor value."""
         try:
             old_value = self._attr_native_value
             self._attr_native_value = float(value)
-            self.async_write_ha_state()
+            async_write_state(self)
             _LOGGER.debug("Updated %s: %.2f → %.2f", self.entity_id, old_value, self._attr_native_value)
         except (ValueError, TypeError) as e:
             _LOGGER.error("Failed to set value for %s: %s", self.entity_id, e)
@@ -369,46 +540,63 @@ class ScooterWritableSensor(SensorEntity, RestoreEntity):
 class ScooterTriggerSensor(ScooterTemplateSensor):
     """Representation of a Scooter sensor with triggers (state or time_pattern)."""
 
-    def __init__(self, hass: HomeAssistant, sensor_id: str, config: dict, imei: str = "", multi_device: bool = False) -> None:
+    # Rendered on their triggers only. Templates depending on now() declare a
+    # "/1" time_pattern, served by the shared MinuteScheduler which ticks only
+    # while their value can change (e.g. trip status timeout during a trip).
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        sensor_id: str,
+        config: dict,
+        imei: str = "",
+        multi_device: bool = False,
+        minute_scheduler: Optional[MinuteScheduler] = None,
+    ) -> None:
         """Initialize the trigger-based sensor."""
         super().__init__(hass, sensor_id, config, imei, multi_device)
         self._triggers = config.get("triggers", [])
-        self._time_listeners = []
+        self._minute_scheduler = minute_scheduler
 
     async def async_added_to_hass(self) -> None:
         """Handle entity added to Home Assistant."""
         await super().async_added_to_hass()
-
         await self.async_update()
+
+    @callback
+    def _async_setup_tracking(self) -> None:
+        """Listen to the configured triggers instead of the template inputs."""
         for trigger in self._triggers:
             platform = trigger.get("platform")
             if platform == "state":
                 entity_ids = trigger.get("entity_id")
                 if not isinstance(entity_ids, list):
                     entity_ids = [entity_ids]
-                for entity_id in entity_ids:
+                self.async_on_remove(
                     async_track_state_change_event(
-                        self.hass, [entity_id], self._handle_event_trigger
+                        self.hass, entity_ids, self._handle_event_trigger
                     )
+                )
 
             elif platform == "time_pattern":
                 minutes = trigger.get("minutes", "/5")
+                if minutes == "/1" and self._minute_scheduler is not None:
+                    self.async_on_remove(
+                        self._minute_scheduler.async_add_listener(self._handle_time_trigger)
+                    )
+                    continue
                 interval = timedelta(minutes=1) if minutes == "/1" else timedelta(minutes=5)
-                self._time_listeners.append(
+                self.async_on_remove(
                     async_track_time_interval(
                         self.hass, self._handle_time_trigger, interval
                     )
                 )
 
-    async def async_will_remove_from_hass(self) -> None:
-        """Cleanup when the entity is removed."""
-        for listener in self._time_listeners:
-            listener()
-        self._time_listeners = []
-
     async def _handle_event_trigger(self, event) -> None:
         """Handle a state change that should trigger an update."""
         await self.async_update()
+        self.async_write_ha_state()
 
     @callback
     def _handle_time_trigger(self, *_):
@@ -417,7 +605,13 @@ class ScooterTriggerSensor(ScooterTemplateSensor):
 
 
 class ScooterTripsSensor(SensorEntity, RestoreEntity):
-    """Representation of a Scooter Trips sensor."""
+    """Representation of a Scooter Trips sensor.
+
+    Push-updated by the history store when a trip is recorded; between trips
+    it only stats the history files (every 5 minutes) to pick up manual edits.
+    """
+
+    _attr_should_poll = False
 
     def __init__(self, hass: HomeAssistant, imei: str = "", multi_device: bool = False) -> None:
         """Initialize the sensor."""
@@ -438,6 +632,8 @@ class ScooterTripsSensor(SensorEntity, RestoreEntity):
         self._attr_native_value = 0
         self._attr_extra_state_attributes = {"history": []}
         self._attr_device_info = get_device_info(imei, multi_device)
+        # Each scooter only reads its own history file
+        self._store = get_history_store(hass, imei, multi_device)
 
     async def async_added_to_hass(self) -> None:
         """Handle entity which will be added."""
@@ -446,34 +642,103 @@ class ScooterTripsSensor(SensorEntity, RestoreEntity):
             self._attr_native_value = last_state.state
             if "history" in last_state.attributes:
                 self._attr_extra_state_attributes["history"] = last_state.attributes["history"]
-        
+
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self._store.signal, self._async_history_updated)
+        )
+
+        @callback
+        def _check_files(_now):
+            self.hass.async_create_task(self._store.async_check_external_changes())
+
+        self.async_on_remove(
+            async_track_time_interval(self.hass, _check_files, timedelta(minutes=5))
+        )
+
         self.async_schedule_update_ha_state(True)
 
+    async def _async_history_updated(self) -> None:
+        """Refresh from the store after a trip was recorded."""
+        await self.async_update()
+        self.async_write_ha_state()
+
     async def async_update(self) -> None:
         """Update the sensor."""
         try:
-            content = await self.hass.async_add_executor_job(self._read_history_file)
+            count, head = await self._store.async_get_summary()
 
-            if content:
-                self._attr_native_value = len(content)
-                self._attr_extra_state_attributes = {"history": content[:10]}
+            if count:
+                self._attr_native_value = count
+                # GPS tracks are too large for a state attribute (recorder)
+                head = [{k: v for k, v in trip.items() if k != TRACK_FIELD} for trip in head]
+                self._attr_extra_state_attributes = {"history": head}
 
         except Exception as e:
             _LOGGER.error("Error updating sensor: %s", e)
 
-    def _read_history_file(self) -> Optional[list]:
-        """Read and parse the history file."""
+
+class ScooterTripRollupSensor(SensorEntity):
+    """Distance ridden in the current day/week/month/year, from the history rollups.
+
+    The other totals of the period (trips, duration, battery, max speed, mean
+    efficiency) are exposed as attributes.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(self, hass: HomeAssistant, sensor_id: str, config: dict, imei: str = "", multi_device: bool = False) -> None:
+        """Initialize the sensor."""
+        self.hass = hass
+        self._sensor_id = sensor_id
+        self._period = config["period"]
+        self._imei = imei
+        self._multi_device = multi_device
+
+        if multi_device and imei:
+            self._attr_has_entity_name = True
+            self._attr_unique_id = f"{imei}_{sensor_id}"
+            self._attr_name = sensor_id.replace("scooter_", "").replace("_", " ").title()
+        else:
+            self._attr_unique_id = f"{DOMAIN}_{sensor_id}"
+            self._attr_name = config["name"]
+            self.entity_id = f"sensor.{sensor_id}"
+
+        self._attr_icon = config.get("icon")
+        self._attr_native_unit_of_measurement = "km"
+        self._attr_device_class = SensorDeviceClass.DISTANCE
+        self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_native_value = 0
+        self._attr_device_info = get_device_info(imei, multi_device)
+        self._store = get_history_store(hass, imei, multi_device)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to new trips and to the period rollover."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self._store.signal, self._async_refresh)
+        )
+        # Every period starts at local midnight
+        self.async_on_remove(
+            async_track_time_change(self.hass, self._async_refresh, hour=0, minute=0, second=0)
+        )
+        await self._async_refresh()
+
+    async def _async_refresh(self, *_args) -> None:
+        """Read the current period totals from the rollups."""
+        now = dt_util.now()
         try:
-            if HISTORY_FILE.exists():
-                with open(HISTORY_FILE, 'r') as file:
-                    return json.load(file)
+            key, stats = await self._store.async_get_rollup(self._period, now)
         except Exception as e:
-            _LOGGER.error("Error reading history file: %s", e)
-        return []
+            _LOGGER.error("Error reading trip statistics for %s: %s", self._sensor_id, e)
+            return
+        self._attr_native_value = stats.pop("distance")
+        self._attr_last_reset = period_start(self._period, now)
+        self._attr_extra_state_attributes = {"period": key, **stats}
+        self.async_write_ha_state()
 
 
 class ScooterUtilityMeterSensor(SensorEntity, RestoreEntity):
-    """Simplified utility meter sensor that tracks consumption per cycle."""
+    """Simplified utility meter sensor that tracks the growth of a source per cycle."""
 
     def __init__(self, hass: HomeAssistant, meter_id: str, config: dict, imei: str = "", multi_device: bool = False) -> None:
         """Initialize the utility meter sensor."""
@@ -494,17 +759,25 @@ class ScooterUtilityMeterSensor(SensorEntity, RestoreEntity):
             self._attr_name = meter_id.replace("_", " ").title().replace("Scooter ", "Scooter - ")
             self.entity_id = f"sensor.{meter_id}"
 
-        self._attr_native_unit_of_measurement = "kWh"
-        self._attr_device_class = SensorDeviceClass.ENERGY
+        # Without a unit (user-picked source), the source's unit is used
+        self._attr_native_unit_of_measurement = config.get(CONF_UNIT_OF_MEASUREMENT)
+        self._attr_device_class = SensorDeviceClass(config["device_class"]) if config.get("device_class") else None
         self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-        self._attr_icon = "mdi:counter"
+        self._attr_icon = config.get(CONF_ICON, "mdi:counter")
         self._attr_device_info = get_device_info(imei, multi_device)
 
         self._source = config["source"]
         self._cycle = config["cycle"]
+        self._offset = config.get("offset") or timedelta(0)
+        # EnergyPricer of a priced source: the cost of the cycle is
+        # accumulated at each update (None until known)
+        self._pricer = config.get("pricer")
+        self._cost = None
         self._last_reset = None
-        self._last_source_value = None
         self._cycle_start_value = None
+        # Closed cycle: {"start", "end", "value"} (+ "cost" when priced)
+        self._last_period = None
+        self._listeners: list = []
 
         _LOGGER.debug(f"Initialized utility meter {meter_id}: source={self._source}, cycle={self._cycle}")
 
@@ -534,6 +807,16 @@ class ScooterUtilityMeterSensor(SensorEntity, RestoreEntity):
                     self._attr_native_value = restored_native
                 if "last_reset" in last_state.attributes:
                     self._last_reset = dt_util.parse_datetime(last_state.attributes["last_reset"])
+                if isinstance(last_state.attributes.get("last_period"), dict):
+                    self._last_period = dict(last_state.attributes["last_period"])
+                if self._pricer is not None:
+                    try:
+                        restored_cost = float(last_state.attributes["cost"])
+                        if restored_cost == restored_cost and restored_cost >= 0:
+                            self._cost = restored_cost
+                    except (KeyError, ValueError, TypeError):
+                        # No cost yet (older version): priced at the first update
+                        pass
                 if "cycle_start_value" in last_state.attributes:
                     try:
                         restored_start_value = float(last_state.attributes["cycle_start_value"])
@@ -575,175 +858,237 @@ class ScooterUtilityMeterSensor(SensorEntity, RestoreEntity):
         else:
             self._attr_native_value = 0
 
+        if self._attr_native_unit_of_measurement is None:
+            source_state = self.hass.states.get(self._source)
+            if source_state is not None:
+                self._attr_native_unit_of_measurement = source_state.attributes.get(CONF_UNIT_OF_MEASUREMENT)
+            elif last_state is not None:
+                self._attr_native_unit_of_measurement = last_state.attributes.get(CONF_UNIT_OF_MEASUREMENT)
+
         if self._last_reset is None:
-            self._last_reset = self._get_cycle_start(dt_util.now())
+            self._last_reset = cycle_start(self._cycle, dt_util.now(), self._offset)
 
-        @callback
-        def source_changed(event):
-            """Handle source sensor state change."""
-            self.hass.async_create_task(self._handle_source_update(event))
+        # The engine of the source validates each update once for all the
+        # cycles, and calls back at each cycle start (no polling)
+        self.async_on_remove(get_meter_engine(self.hass, self._source, self._pricer).async_add_meter(self))
 
-        async_track_state_change_event(
-            self.hass, [self._source], source_changed
-        )
+    @property
+    def cycle(self) -> str:
+        return self._cycle
 
-        # Add periodic check for cycle reset (every 5 minutes for all cycles)
-        # This ensures we detect cycle changes even if source sensor doesn't update
-        @callback
-        def periodic_check(_):
-            """Periodic check for cycle reset."""
-            self.hass.async_create_task(self._handle_source_update(None))
-
-        # Daily: check every 5 minutes (detects midnight rollover quickly)
-        # Weekly/Monthly/Yearly: check every hour (sufficient for these longer cycles)
-        interval = timedelta(minutes=5) if self._cycle == "daily" else timedelta(hours=1)
-
-        async_track_time_interval(
-            self.hass,
-            periodic_check,
-            interval
-        )
+    @property
+    def offset(self) -> timedelta:
+        return self._offset
 
-        _LOGGER.info("Utility meter %s: periodic check every %s",
-                     self.entity_id, interval)
+    @property
+    def cost(self) -> Optional[float]:
+        """Cost of the current cycle, or None if not priced."""
+        return self._cost
 
-        await self._handle_source_update(None)
+    @property
+    def cycle_started(self):
+        """Start of the current cycle (not ``last_reset``: this is a total_increasing sensor)."""
+        return self._last_reset
 
-    async def _handle_source_update(self, event):
-        """Handle source sensor update."""
-        try:
-            source_state = self.hass.states.get(self._source)
-            if not source_state or source_state.state in ["unknown", "unavailable"]:
-                return
-
-            source_value = float(source_state.state)
-
-            # Reject obviously-bad source values that would poison cycle_start_value
-            # and corrupt the meter for the whole cycle:
-            #  - Negative values (seen on 2026-04-18 shortly before a scooter shutdown
-            #    when the upstream MQTT energy counter glitched to -866.918).
-            #  - A huge regression vs the last seen value (source dropped by more than
-            #    100 kWh in a single update while we had a plausible previous reading)
-            #    which means the counter was transiently reset by the scooter/server.
-            if source_value < 0:
-                _LOGGER.warning(
-                    "%s: Rejecting negative source_value=%.3f (keeping previous state)",
-                    self.entity_id, source_value,
-                )
-                return
-            if (
-                self._last_source_value is not None
-                and self._last_source_value > 0
-                and source_value < self._last_source_value - 100
-            ):
-                _LOGGER.warning(
-                    "%s: Rejecting large source drop (source=%.3f, last=%.3f, delta=%.3f). "
-                    "Likely an upstream reset; keeping previous state.",
-                    self.entity_id, source_value, self._last_source_value,
-                    source_value - self._last_source_value,
-                )
-                return
-
-            # IMPORTANT: If source is 0 and we have a restored cycle_start_value > 0,
-            # it means the scooter is offline but we have valid restored data.
-            # Don't recalculate to avoid triggering negative consumption protection.
-            if source_value == 0.0 and self._cycle_start_value and self._cycle_start_value > 0:
-                _LOGGER.debug(
-                    "%s: Source is 0 (scooter offline) but we have restored cycle_start_value=%.3f. "
-                    "Keeping current state to preserve restored data.",
-                    self.entity_id, self._cycle_start_value
-                )
-                return
+    @callback
+    def async_add_listener(self, update_callback) -> CALLBACK_TYPE:
+        """Call ``update_callback`` after each state write (cost sensor)."""
+        self._listeners.append(update_callback)
 
-            now = dt_util.now()
-            should_reset = self._should_reset_cycle(now)
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
 
-            if should_reset:
-                _LOGGER.info("Resetting %s for new %s cycle", self.entity_id, self._cycle)
-                self._cycle_start_value = source_value
-                self._last_reset = self._get_cycle_start(now)
-                self._attr_native_value = 0
-            elif self._cycle_start_value is None or self._cycle_start_value == 0.0:
-                _LOGGER.info("Initializing %s: cycle_start_value=%s", self.entity_id, source_value)
-                self._cycle_start_value = source_value
-                self._attr_native_value = 0
-            else:
-                consumption = source_value - self._cycle_start_value
+        return remove_listener
 
-                # Fix: if consumption is negative, cycle_start_value is probably wrong
-                # This can happen after restoring state or if source sensor was reset
-                if consumption < 0:
-                    _LOGGER.warning(
-                        "%s: Negative consumption detected (source=%.3f, start=%.3f), "
-                        "resetting cycle_start_value",
-                        self.entity_id, source_value, self._cycle_start_value
-                    )
-                    detector = get_error_detector(self.hass)
-                    if detector:
-                        detector.record_error(
-                            ErrorCategory.DATA_INTEGRITY, ErrorSeverity.WARNING,
-                            f"Negative consumption on {self.entity_id}: source={source_value:.3f}, start={self._cycle_start_value:.3f}",
-                            source="ScooterUtilityMeterSensor", entity_id=self.entity_id,
-                        )
-                    self._cycle_start_value = source_value
-                    self._attr_native_value = 0
-                else:
-                    self._attr_native_value = round(consumption, 3)
+    @callback
+    def async_write_ha_state(self) -> None:
+        super().async_write_ha_state()
+        for update_callback in list(self._listeners):
+            update_callback()
 
-            self._last_source_value = source_value
-            self.async_write_ha_state()
+    def current_price(self) -> float:
+        """Price per kWh in force now (schedule, tariff sensor or default)."""
+        if self._pricer is None:
+            return DEFAULT_ELECTRICITY_PRICE
+        return self._pricer.price_at(dt_util.now())
 
-        except (ValueError, TypeError) as e:
-            _LOGGER.error("Error updating %s: %s", self.entity_id, e)
-            detector = get_error_detector(self.hass)
-            if detector:
-                detector.record_error(
-                    ErrorCategory.SENSOR_INVALID, ErrorSeverity.ERROR,
-                    f"Utility meter update failed for {self.entity_id}: {e}",
-                    source="ScooterUtilityMeterSensor", entity_id=self.entity_id,
-                )
+    @callback
+    def async_update_source(self, source_value: float, now, price: Optional[float] = None) -> None:
+        """Apply a validated source value (source update or cycle start).
+
+        ``price`` is the price per kWh at ``now``: the consumption since the
+        last update is added to the cost of the cycle at that price.
+        """
+        # IMPORTANT: If source is 0 and we have a restored cycle_start_value > 0,
+        # it means the scooter is offline but we have valid restored data.
+        # Don't recalculate to avoid triggering negative consumption protection.
+        offline = bool(source_value == 0.0 and self._cycle_start_value and self._cycle_start_value > 0)
+
+        # The cycle is closed at its boundary even while offline, so each
+        # cycle gets its own period (and ledger record)
+        if cycle_changed(self._cycle, self._last_reset, now, self._offset):
+            new_start = cycle_start(self._cycle, now, self._offset)
+            # Close the cycle at the boundary: its total is the value of the
+            # last update before it, and the new cycle starts from that reading
+            closing = float(self._attr_native_value or 0)
+            if self._cycle_start_value:
+                boundary_value = self._cycle_start_value + closing
+                if not offline:
+                    boundary_value = min(boundary_value, source_value)
+            else:
+                boundary_value = source_value
+            self._last_period = {
+                "start": self._last_reset.isoformat(),
+                "end": new_start.isoformat(),
+                "value": round(closing, 3),
+            }
+            if price is not None:
+                if self._cost is None:
+                    self._cost = closing * price
+                self._last_period["cost"] = round(self._cost, 2)
+            _LOGGER.info("Resetting %s for new %s cycle (closed at %.3f)", self.entity_id, self._cycle, closing)
+            self._async_archive_period(self._last_period)
+            self._cycle_start_value = boundary_value
+            self._last_reset = new_start
+            self._attr_native_value = 0 if offline else round(source_value - boundary_value, 3)
+            if price is not None:
+                # Consumption read after the boundary belongs to the new cycle
+                self._cost = self._attr_native_value * price
+        elif offline:
+            _LOGGER.debug(
+                "%s: Source is 0 (scooter offline) but we have restored cycle_start_value=%.3f. "
+                "Keeping current state to preserve restored data.",
+                self.entity_id, self._cycle_start_value
+            )
+            return
+        elif self._cycle_start_value is None or self._cycle_start_value == 0.0:
+            _LOGGER.info("Initializing %s: cycle_start_value=%s", self.entity_id, source_value)
+            self._cycle_start_value = source_value
+            self._attr_native_value = 0
+            if price is not None:
+                self._cost = 0.0
+        else:
+            consumption = source_value - self._cycle_start_value
 
-    def _get_cycle_start(self, now):
-        """Get the start timestamp of the current cycle."""
-        if self._cycle == "daily":
-            return now.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif self._cycle == "weekly":
-            # Start of week (Monday)
-            days_since_monday = now.weekday()
-            week_start = now - timedelta(days=days_since_monday)
-            return week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        elif self._cycle == "monthly":
-            return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        elif self._cycle == "yearly":
-            return now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-        return now
-
-    def _should_reset_cycle(self, now) -> bool:
-        """Check if cycle should be reset."""
-        if self._last_reset is None:
-            return False
+            # Fix: if consumption is negative, cycle_start_value is probably wrong
+            # This can happen after restoring state or if source sensor was reset
+            if consumption < 0:
+                _LOGGER.warning(
+                    "%s: Negative consumption detected (source=%.3f, start=%.3f), "
+                    "resetting cycle_start_value",
+                    self.entity_id, source_value, self._cycle_start_value
+                )
+                detector = get_error_detector(self.hass)
+                if detector:
+                    detector.record_error(
+                        ErrorCategory.DATA_INTEGRITY, ErrorSeverity.WARNING,
+                        f"Negative consumption on {self.entity_id}: source={source_value:.3f}, start={self._cycle_start_value:.3f}",
+                        source="ScooterUtilityMeterSensor", entity_id=self.entity_id,
+                    )
+                self._cycle_start_value = source_value
+                self._attr_native_value = 0
+                if price is not None:
+                    self._cost = 0.0
+            else:
+                if price is not None:
+                    previous = float(self._attr_native_value or 0)
+                    if self._cost is None:
+                        # First priced update (upgrade): the cycle so far at today's price
+                        self._cost = previous * price
+                    # O(1): only the kWh consumed since the last update, at the price of now
+                    self._cost += max(consumption - previous, 0) * price
+                self._attr_native_value = round(consumption, 3)
 
-        if self._cycle == "daily":
-            return now.date() > self._last_reset.date()
-        elif self._cycle == "weekly":
-            last_week_tuple = self._last_reset.isocalendar()[:2]
-            current_week_tuple = now.isocalendar()[:2]
-            return current_week_tuple != last_week_tuple
-        elif self._cycle == "monthly":
-            return now.month != self._last_reset.month or now.year != self._last_reset.year
-        elif self._cycle == "yearly":
-            return now.year != self._last_reset.year
+        self.async_write_ha_state()
 
-        return False
+    @callback
+    def _async_archive_period(self, period: dict) -> None:
+        """Append a closed cycle to the scooter's meter ledger."""
+        record = {
+            "meter": self._meter_id,
+            "cycle": self._cycle,
+            **period,
+            "unit": self._attr_native_unit_of_measurement,
+        }
+        if "cost" in period:
+            # Mean price of the period, the cost being accumulated at the price of each moment
+            record["price"] = round(period["cost"] / period["value"], 4) if period["value"] else None
+        ledger = get_meter_ledger(self.hass, self._imei, self._multi_device)
+        self.hass.async_create_task(ledger.async_append(record))
 
     @property
     def extra_state_attributes(self):
         """Return extra attributes."""
-        return {
+        attributes = {
             "source": self._source,
             "cycle": self._cycle,
             "last_reset": self._last_reset.isoformat() if self._last_reset else None,
             "cycle_start_value": self._cycle_start_value,
+            "next_reset": next_cycle_start(self._cycle, dt_util.now(), self._offset).isoformat(),
+            "last_period": self._last_period,
+        }
+        if self._pricer is not None:
+            attributes["cost"] = round(self._cost, 4) if self._cost is not None else None
+        return attributes
+
+
+class ScooterMeterCostSensor(SensorEntity):
+    """Cost of the current cycle of a priced utility meter.
+
+    The meter accumulates the cost at each update (kWh since the last update
+    x price of the moment); this sensor only exposes it, so a price change
+    does not re-price the consumption already counted.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(
+        self, hass: HomeAssistant, sensor_id: str, meter: "ScooterUtilityMeterSensor",
+        imei: str = "", multi_device: bool = False,
+    ) -> None:
+        """Initialize the sensor."""
+        self.hass = hass
+        self._sensor_id = sensor_id
+        self._meter = meter
+
+        if multi_device and imei:
+            self._attr_has_entity_name = True
+            self._attr_unique_id = f"{imei}_{sensor_id}"
+            self._attr_name = sensor_id.replace("scooter_", "").replace("_", " ").title()
+        else:
+            # Same ids as the former template sensors
+            self._attr_unique_id = f"{DOMAIN}_{sensor_id}"
+            self._attr_name = sensor_id.replace("_", " ").title().replace("Scooter ", "Scooter - ")
+            self.entity_id = f"sensor.{sensor_id}"
+
+        self._attr_native_unit_of_measurement = "€"
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_icon = "mdi:currency-eur"
+        self._attr_device_info = get_device_info(imei, multi_device)
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the meter's updates."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._meter.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self) -> Optional[float]:
+        cost = self._meter.cost
+        return round(cost, 2) if cost is not None else None
+
+    @property
+    def last_reset(self):
+        return self._meter.cycle_started
+
+    @property
+    def extra_state_attributes(self):
+        consumption = float(self._meter.native_value or 0)
+        cost = self._meter.cost
+        return {
+            "meter": self._meter.entity_id,
+            "average_price": round(cost / consumption, 4) if cost is not None and consumption > 0 else None,
         }
 
 
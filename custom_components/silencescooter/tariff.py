@@ -0,0 +1,120 @@
+"""Electricity price at the time of consumption.
+
+The energy cost sensors used to multiply the whole cycle's kWh by the
+current state of the tariff sensor, so a price change re-priced the whole
+cycle. The meters now accumulate their cost as they go (kWh consumed since
+the last update x price now), and an EnergyPricer gives that price:
+
+- with off-peak hours configured ("22:00-06:00, 12:00-14:00"), the off-peak
+  price inside them and the peak price outside;
+- otherwise the state of the tariff sensor (which may itself follow a
+  time-of-use tariff);
+- DEFAULT_ELECTRICITY_PRICE when the tariff sensor is unavailable.
+"""
+import logging
+import re
+from datetime import datetime, time
+from typing import List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_OFFPEAK_HOURS,
+    CONF_OFFPEAK_PRICE,
+    CONF_PEAK_PRICE,
+    DEFAULT_ELECTRICITY_PRICE,
+    DEFAULT_OFFPEAK_HOURS,
+    DEFAULT_OFFPEAK_PRICE,
+    DEFAULT_PEAK_PRICE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_RANGE = re.compile(r"^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})$")
+
+
+def parse_time_ranges(text: Optional[str]) -> List[Tuple[time, time]]:
+    """Parse "HH:MM-HH:MM, HH:MM-HH:MM" into (start, end) pairs.
+
+    A range may wrap around midnight (22:00-06:00). Raises ValueError on a
+    malformed or empty range.
+    """
+    ranges = []
+    for part in (text or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = _RANGE.match(part)
+        if not match:
+            raise ValueError(f"Invalid time range: {part}")
+        start_h, start_m, end_h, end_m = (int(group) for group in match.groups())
+        start, end = time(start_h, start_m), time(end_h, end_m)
+        if start == end:
+            raise ValueError(f"Empty time range: {part}")
+        ranges.append((start, end))
+    return ranges
+
+
+def in_time_ranges(ranges: List[Tuple[time, time]], moment: time) -> bool:
+    """Return True if the wall-clock ``moment`` is in one of the ranges (end excluded)."""
+    for start, end in ranges:
+        if start < end:
+            if start <= moment < end:
+                return True
+        elif moment >= start or moment < end:
+            return True
+    return False
+
+
+class EnergyPricer:
+    """Price per kWh at a given instant, for one scooter."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        tariff_sensor: Optional[str],
+        offpeak_ranges: Optional[List[Tuple[time, time]]] = None,
+        peak_price: float = DEFAULT_PEAK_PRICE,
+        offpeak_price: float = DEFAULT_OFFPEAK_PRICE,
+    ) -> None:
+        self._hass = hass
+        self._tariff_sensor = tariff_sensor
+        self._offpeak_ranges = offpeak_ranges or []
+        self._peak_price = peak_price
+        self._offpeak_price = offpeak_price
+
+    @classmethod
+    def from_config(cls, hass: HomeAssistant, config, tariff_sensor: Optional[str]) -> "EnergyPricer":
+        """Build the pricer of a config entry's data."""
+        try:
+            ranges = parse_time_ranges(config.get(CONF_OFFPEAK_HOURS, DEFAULT_OFFPEAK_HOURS))
+        except ValueError as e:
+            # Validated by the config flow; only a hand-edited entry gets here
+            _LOGGER.warning("Ignoring off-peak hours: %s", e)
+            ranges = []
+        return cls(
+            hass,
+            tariff_sensor,
+            ranges,
+            float(config.get(CONF_PEAK_PRICE, DEFAULT_PEAK_PRICE) or 0),
+            float(config.get(CONF_OFFPEAK_PRICE, DEFAULT_OFFPEAK_PRICE) or 0),
+        )
+
+    @property
+    def has_schedule(self) -> bool:
+        return bool(self._offpeak_ranges) and self._peak_price > 0 and self._offpeak_price > 0
+
+    def is_offpeak(self, now: datetime) -> bool:
+        return in_time_ranges(self._offpeak_ranges, dt_util.as_local(now).time())
+
+    def price_at(self, now: datetime) -> float:
+        """Return the price per kWh in force at ``now``."""
+        if self.has_schedule:
+            return self._offpeak_price if self.is_offpeak(now) else self._peak_price
+        state = self._hass.states.get(self._tariff_sensor) if self._tariff_sensor else None
+        try:
+            price = float(state.state)
+        except (AttributeError, TypeError, ValueError):
+            return DEFAULT_ELECTRICITY_PRICE
+        return price if price >= 0 else DEFAULT_ELECTRICITY_PRICE
@@ -0,0 +1,176 @@
+"""Named, cancellable trip timers of a scooter.
+
+The trip stop path waits on a few delays: the confirmation delay after the
+trip status goes off, the pause tolerance and the offline watchdog. They
+used to be bare ``loop.call_later`` handles in a closure, never cancelled on
+unload and lost on restart. A TimerManager owns them per scooter:
+
+- each timer has a name and a registered action (a coroutine function);
+- scheduling a name again replaces the pending timer;
+- persistent timers store their deadline, so after a restart the timer
+  resumes with the remaining time instead of starting over or being lost;
+- everything is cancelled on unload, and the pending timers are exposed in
+  the diagnostics.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .history_store import history_key
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# A timer that expired while HA was down fires this long after setup, once
+# the scooter sensors had a chance to reconnect (same as the startup guard
+# of the trip status handler)
+RESUME_MIN_DELAY = 10
+
+
+class _PendingTimer:
+    __slots__ = ("deadline", "unsub", "persistent")
+
+    def __init__(self, deadline: datetime, unsub: CALLBACK_TYPE, persistent: bool) -> None:
+        self.deadline = deadline
+        self.unsub = unsub
+        self.persistent = persistent
+
+
+class TimerManager:
+    """One-shot timers of a scooter, keyed by name."""
+
+    def __init__(self, hass: HomeAssistant, key: str) -> None:
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.timers.{key}")
+        self._actions: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self._pending: Dict[str, _PendingTimer] = {}
+        # Deadlines read from storage, not resumed yet
+        self._saved: Dict[str, datetime] = {}
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Read the persisted deadlines (once)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        data = await self._store.async_load() or {}
+        for name, value in data.get("deadlines", {}).items():
+            deadline = dt_util.parse_datetime(value) if isinstance(value, str) else None
+            if deadline is not None:
+                self._saved[name] = dt_util.as_utc(deadline)
+
+    @callback
+    def async_register(self, name: str, action: Callable[[], Awaitable[None]]) -> None:
+        """Set the coroutine function run when timer ``name`` expires."""
+        self._actions[name] = action
+
+    @callback
+    def async_resume(self) -> None:
+        """Re-arm the persisted timers whose action is registered."""
+        now = dt_util.utcnow()
+        for name, deadline in list(self._saved.items()):
+            if name not in self._actions:
+                continue
+            del self._saved[name]
+            remaining = max((deadline - now).total_seconds(), RESUME_MIN_DELAY)
+            _LOGGER.info("Resuming timer %s (%.0fs left)", name, remaining)
+            self._arm(name, now + timedelta(seconds=remaining), persistent=True)
+        self._async_save()
+
+    @callback
+    def async_schedule(self, name: str, delay: float, persistent: bool = True) -> None:
+        """Run the action of ``name`` in ``delay`` seconds, replacing a pending one."""
+        self.async_schedule_at(name, dt_util.utcnow() + timedelta(seconds=delay), persistent)
+
+    @callback
+    def async_schedule_at(self, name: str, deadline: datetime, persistent: bool = True) -> None:
+        """Run the action of ``name`` at ``deadline`` (UTC), replacing a pending one."""
+        self._cancel(name)
+        self._arm(name, deadline, persistent)
+        if persistent:
+            self._async_save()
+
+    @callback
+    def async_cancel(self, name: str) -> bool:
+        """Cancel timer ``name``. Returns True if it was pending."""
+        was_saved = name in self._saved
+        timer = self._cancel(name)
+        if was_saved or (timer is not None and timer.persistent):
+            self._async_save()
+        return timer is not None
+
+    def is_pending(self, name: str) -> bool:
+        return name in self._pending
+
+    @callback
+    def async_unload(self) -> None:
+        """Cancel every timer; the persisted deadlines are kept for the next setup."""
+        for name, timer in list(self._pending.items()):
+            timer.unsub()
+            if timer.persistent:
+                self._saved[name] = timer.deadline
+        self._pending.clear()
+
+    def as_diagnostics(self) -> dict:
+        now = dt_util.utcnow()
+        return {
+            "pending": {
+                name: {
+                    "deadline": timer.deadline.isoformat(),
+                    "remaining_s": round((timer.deadline - now).total_seconds(), 1),
+                    "persistent": timer.persistent,
+                }
+                for name, timer in self._pending.items()
+            },
+            "saved": {name: deadline.isoformat() for name, deadline in self._saved.items()},
+        }
+
+    def _arm(self, name: str, deadline: datetime, persistent: bool) -> None:
+        delay = max((deadline - dt_util.utcnow()).total_seconds(), 0)
+
+        @callback
+        def _expired(_now) -> None:
+            timer = self._pending.pop(name, None)
+            if timer is not None and timer.persistent:
+                self._async_save()
+            action = self._actions.get(name)
+            if action is not None:
+                self._hass.async_create_task(action())
+
+        self._pending[name] = _PendingTimer(deadline, async_call_later(self._hass, delay, _expired), persistent)
+
+    def _cancel(self, name: str) -> Optional[_PendingTimer]:
+        self._saved.pop(name, None)
+        timer = self._pending.pop(name, None)
+        if timer is not None:
+            timer.unsub()
+        return timer
+
+    @callback
+    def _async_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, 1)
+
+    def _data_to_save(self) -> dict:
+        deadlines = {name: deadline.isoformat() for name, deadline in self._saved.items()}
+        deadlines.update(
+            (name, timer.deadline.isoformat())
+            for name, timer in self._pending.items()
+            if timer.persistent
+        )
+        return {"deadlines": deadlines}
+
+
+def get_timer_manager(hass: HomeAssistant, imei: str = "", multi_device: bool = False) -> TimerManager:
+    """Return the timer manager of a scooter, creating it on first use."""
+    managers = hass.data.setdefault(DOMAIN, {}).setdefault("timers", {})
+    key = history_key(imei, multi_device)
+    if key not in managers:
+        managers[key] = TimerManager(hass, key)
+    return managers[key]
@@ -0,0 +1,331 @@
+"""In-memory trip state of a scooter.
+
+The trip lifecycle used to keep its state only in entities (start/end time,
+ODO and SoC at start/end, max speed) and re-read them with
+``hass.states.get`` plus date parsing on every ODO/SoC/speed message. A
+TripSession holds the same values as plain attributes, so the per-message
+path only reads attributes, and writes an entity only when its value
+actually changes.
+
+The entities stay the persisted, user-visible copy: the session is loaded
+from them at setup and follows their state changes, so values restored at
+startup or set by hand are picked up.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .gps_track import GpsTrack
+from .helpers import insert_imei_in_entity_id, parse_state_datetime, set_datetime_value, set_number_value
+from .history_store import history_key
+
+_LOGGER = logging.getLogger(__name__)
+
+# Session field -> mirrored entity (single-device id)
+SESSION_ENTITIES = {
+    "start_time": "datetime.scooter_start_time",
+    "end_time": "datetime.scooter_end_time",
+    "odo_start": "number.scooter_odo_debut",
+    "odo_end": "number.scooter_odo_fin",
+    "battery_start": "number.scooter_battery_soc_debut",
+    "battery_end": "number.scooter_battery_soc_fin",
+    "max_speed": "sensor.scooter_last_trip_max_speed",
+}
+DATETIME_FIELDS = ("start_time", "end_time")
+
+# A trip started longer ago than this was never stopped
+STALE_TRIP_AGE = timedelta(hours=24)
+
+# The max speed sensor is written at most this often (seconds)
+MAX_SPEED_WRITE_INTERVAL = 2.0
+
+# Speed histogram for the percentiles: 1 km/h bins, the last one open-ended
+SPEED_BIN_WIDTH = 1.0
+SPEED_BINS = 200
+
+
+def parse_session_datetime(value) -> Optional[datetime]:
+    """Parse a datetime state or service value (naive values are local time)."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif not value:
+        return None
+    else:
+        return parse_state_datetime(str(value))
+    return dt_util.as_local(parsed) if parsed.tzinfo is None else parsed
+
+
+def parse_session_number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SpeedStats:
+    """Running speed statistics of a trip, updated in O(1) per sample.
+
+    Keeps the sample count, the running mean and a fixed histogram; a
+    percentile is read from the histogram (upper edge of its bin).
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._bins = [0] * SPEED_BINS
+
+    def add(self, speed: float) -> None:
+        self.count += 1
+        self.mean += (speed - self.mean) / self.count
+        self._bins[min(int(speed / SPEED_BIN_WIDTH), SPEED_BINS - 1)] += 1
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, samples in enumerate(self._bins):
+            seen += samples
+            if samples and seen >= rank:
+                return (index + 1) * SPEED_BIN_WIDTH
+        return SPEED_BINS * SPEED_BIN_WIDTH
+
+    def as_attributes(self) -> dict:
+        return {
+            "mean_moving_speed": round(self.mean, 1) if self.count else None,
+            "p95_speed": self.percentile(95),
+            "speed_samples": self.count,
+        }
+
+
+class TripSession:
+    """Current trip of one scooter: start/end, ODO and SoC bounds, max speed."""
+
+    def __init__(self, hass: HomeAssistant, imei: str = "", multi_device: bool = False) -> None:
+        self._hass = hass
+        self.entity_ids = {
+            field: insert_imei_in_entity_id(base, imei, multi_device)
+            for field, base in SESSION_ENTITIES.items()
+        }
+        self._fields = {entity_id: field for field, entity_id in self.entity_ids.items()}
+        self._unsub_states: Optional[CALLBACK_TYPE] = None
+
+        # None when the entity is unknown; 1970 is the "trip running" placeholder of end_time
+        self.start_time: Optional[datetime] = None
+        self.end_time: Optional[datetime] = None
+        self.odo_start = 0.0
+        self.odo_end = 0.0
+        self.battery_start = 0.0
+        self.battery_end = 0.0
+        self.max_speed = 0.0
+
+        # Speeds above the written max_speed, not written yet (rate cap)
+        self.speed_stats = SpeedStats()
+        self._pending_max_speed: Optional[float] = None
+        self._max_speed_written_at = 0.0
+        self._unsub_max_speed: Optional[CALLBACK_TYPE] = None
+
+        # GPS fixes of the trip (only filled when record_gps_track is on)
+        self.track = GpsTrack()
+
+        # Runtime state of the trip, per scooter:
+        # - started_monotonic: monotonic time of the last trip start, anchor
+        #   of the grace period of the ODO/battery repair;
+        # - odo_tracking_fired / battery_tracking_fired: the live handlers ran
+        #   during this trip (reset at start, read by do_stop_trip);
+        # - stopping: a do_stop_trip is running for this scooter.
+        self.started_monotonic: Optional[float] = None
+        self.odo_tracking_fired = False
+        self.battery_tracking_fired = False
+        self.stopping = False
+
+        self._load_states()
+
+    def _load_states(self) -> None:
+        for entity_id, field in self._fields.items():
+            state = self._hass.states.get(entity_id)
+            if state is not None:
+                self._load(field, state.state)
+
+    def _load(self, field: str, value) -> None:
+        if field in DATETIME_FIELDS:
+            setattr(self, field, parse_session_datetime(value))
+        else:
+            setattr(self, field, parse_session_number(value))
+
+    @property
+    def valid_start_time(self) -> Optional[datetime]:
+        """Start time, or None if unset (1969/1970 placeholder or unknown)."""
+        if self.start_time is None or self.start_time.year <= 2000:
+            return None
+        return self.start_time
+
+    def is_stale(self, now: Optional[datetime] = None) -> bool:
+        """Return True if the trip started more than 24h ago."""
+        start = self.valid_start_time
+        return start is not None and ((now or dt_util.now()) - start) > STALE_TRIP_AGE
+
+    def is_active(self, now: Optional[datetime] = None) -> bool:
+        """Vérifie si un trajet est actuellement actif."""
+        if self.end_time is None:
+            return False
+        now = now or dt_util.now()
+        # Un trajet est actif si end_time est 1969/1970 OU si c'est dans le futur
+        if self.end_time.year <= 1970:
+            if self.is_stale(now):
+                _LOGGER.warning("⚠️ Trajet bloqué détecté (>24h), nettoyage nécessaire")
+                return False
+            return True
+        return self.end_time > now
+
+    def is_tracking(self, now: Optional[datetime] = None) -> bool:
+        """Return True if live ODO/SoC readings belong to the current trip."""
+        now = now or dt_util.now()
+        return self.is_active(now) and not self.is_stale(now)
+
+    @callback
+    def async_mark_started(self) -> None:
+        """Anchor the start grace period and reset the tracking flags."""
+        self.started_monotonic = time.monotonic()
+        self.odo_tracking_fired = False
+        self.battery_tracking_fired = False
+
+    def in_start_grace(self, seconds: float) -> bool:
+        """Return True within ``seconds`` of the last trip start."""
+        return self.started_monotonic is not None and (time.monotonic() - self.started_monotonic) < seconds
+
+    @property
+    def running_max_speed(self) -> float:
+        """Max speed of the trip, including a not yet written increase."""
+        if self._pending_max_speed is None:
+            return self.max_speed
+        return max(self.max_speed, self._pending_max_speed)
+
+    @callback
+    def async_record_speed(self, speed: float) -> None:
+        """Account a speed reading: statistics while on a trip, and the running max.
+
+        The max speed sensor is only written when the max increases, and at
+        most every MAX_SPEED_WRITE_INTERVAL seconds.
+        """
+        if speed > 0 and self.is_tracking():
+            self.speed_stats.add(speed)
+        if speed <= self.running_max_speed:
+            return
+        self._pending_max_speed = speed
+        if self._unsub_max_speed is not None:
+            return
+        delay = self._max_speed_written_at + MAX_SPEED_WRITE_INTERVAL - time.monotonic()
+        if delay <= 0:
+            self._hass.async_create_task(self.async_flush_max_speed())
+        else:
+            self._unsub_max_speed = async_call_later(self._hass, delay, self._handle_max_speed_timer)
+
+    @callback
+    def _handle_max_speed_timer(self, _now) -> None:
+        self._unsub_max_speed = None
+        self._hass.async_create_task(self.async_flush_max_speed())
+
+    async def async_flush_max_speed(self) -> None:
+        """Write the pending max speed increase, if any."""
+        if self._unsub_max_speed is not None:
+            self._unsub_max_speed()
+            self._unsub_max_speed = None
+        if self._pending_max_speed is None:
+            return
+        speed, self._pending_max_speed = self._pending_max_speed, None
+        if speed > self.max_speed:
+            _LOGGER.debug("New max speed: %.1f km/h (was %.1f)", speed, self.max_speed)
+            self._max_speed_written_at = time.monotonic()
+            await self.async_set(max_speed=speed)
+
+    @callback
+    def async_reset_speed_tracking(self) -> None:
+        """Forget the speed statistics and any pending max (trip start)."""
+        if self._unsub_max_speed is not None:
+            self._unsub_max_speed()
+            self._unsub_max_speed = None
+        self._pending_max_speed = None
+        self.speed_stats.reset()
+
+    @callback
+    def async_start_listening(self) -> None:
+        """Follow the mirrored entities (restored states, manual changes)."""
+        if self._unsub_states is None:
+            self._load_states()
+            self._unsub_states = async_track_state_change_event(
+                self._hass, list(self._fields), self._handle_entity_change
+            )
+
+    @callback
+    def async_stop_listening(self) -> None:
+        if self._unsub_states is not None:
+            self._unsub_states()
+            self._unsub_states = None
+        if self._unsub_max_speed is not None:
+            self._unsub_max_speed()
+            self._unsub_max_speed = None
+
+    @callback
+    def _handle_entity_change(self, event) -> None:
+        new_state = event.data.get("new_state")
+        field = self._fields.get(event.data.get("entity_id"))
+        if field is None or new_state is None or new_state.state == "unavailable":
+            return
+        self._load(field, new_state.state)
+
+    async def async_set(self, **values) -> None:
+        """Update fields, writing the entity of each field whose value changed."""
+        for field, value in values.items():
+            if field in DATETIME_FIELDS:
+                parsed = parse_session_datetime(value)
+                if parsed is not None and parsed == getattr(self, field):
+                    continue
+                setattr(self, field, parsed)
+                await set_datetime_value(self._hass, self.entity_ids[field], value)
+                continue
+
+            value = float(value)
+            if value == getattr(self, field):
+                continue
+            setattr(self, field, value)
+            if field == "max_speed":
+                # Writable sensor: set directly, it has no set_value service
+                sensor = self._hass.data.get(DOMAIN, {}).get("sensors", {}).get(self.entity_ids[field])
+                if sensor is None:
+                    _LOGGER.error("Writable sensor %s not found or not writable!", self.entity_ids[field])
+                    continue
+                await sensor.async_set_native_value(value)
+            else:
+                await set_number_value(self._hass, self.entity_ids[field], value)
+
+
+def get_trip_session(hass: HomeAssistant, imei: str = "", multi_device: bool = False) -> TripSession:
+    """Return the trip session of a scooter, creating it on first use."""
+    sessions = hass.data.setdefault(DOMAIN, {}).setdefault("trip_sessions", {})
+    key = history_key(imei, multi_device)
+    if key not in sessions:
+        sessions[key] = TripSession(hass, imei, multi_device)
+    return sessions[key]
+
+
+@callback
+def async_close_trip_session(hass: HomeAssistant, imei: str = "", multi_device: bool = False) -> None:
+    """Stop following the entities of a scooter's session.
+
+    The session is kept: a reload in the middle of a trip keeps its runtime
+    state (tracking flags, start anchor), the entity values are read again
+    when it starts listening.
+    """
+    session = hass.data.get(DOMAIN, {}).get("trip_sessions", {}).get(history_key(imei, multi_device))
+    if session is not None:
+        session.async_stop_listening()